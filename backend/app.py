@@ -1,78 +1,122 @@
-from flask import Flask, redirect, url_for, session, render_template
-from datetime import datetime, timedelta
-import threading
-import time
-from .database import init_db
+"""The Flask application.
+
+create_app() builds an app without touching the database: the schema and
+the default users are set up by the first request that needs them
+(database.ensure_db()), once per process and database file. Background
+services never start on import; whatever serves the app calls
+start_background() once per process (main.py, the post_fork hook in
+gunicorn.conf.py, the ASGI lifespan).
+
+`backend.app:app` still works for gunicorn and uvicorn: it is built with
+create_app() the first time it is looked up.
+"""
+from flask import Flask, redirect, url_for, session, render_template, make_response
+from . import database
 from .auth import auth_bp
-from .routes import followups_bp, dashboard_bp
-from .models import get_db_connection, update_followup_status
-import os
-
-app = Flask(__name__,
-            static_folder=os.path.join(os.path.dirname(__file__), '../frontend/static'),
-            template_folder=os.path.join(os.path.dirname(__file__), '../frontend/templates'))
-
-# Generate a strong, random secret key for session management
-app.secret_key = os.urandom(24)
-
-# Initialize the database
-init_db()
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(followups_bp, url_prefix='/api/followups')
-app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
-
-
-# --- Background task for marking missed follow-ups ---
-def check_missed_followups():
-    with app.app_context():
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        now_str = datetime.now().isoformat()
-
-        cursor.execute("""
-            UPDATE follow_ups
-            SET status = 'Missed'
-            WHERE followup_datetime < ? AND status = 'Pending';
-        """, (now_str,))
-        conn.commit()
-        conn.close()
-    # print(f"Background task: Checked for missed follow-ups at {datetime.now()}")
-
-def start_missed_followup_checker():
-    # Run every 5 minutes (300 seconds)
-    interval = 300
-    while True:
-        check_missed_followups()
-        time.sleep(interval)
-
-# Start the background thread when the app starts
-thread = threading.Thread(target=start_missed_followup_checker, daemon=True)
-thread.start()
-# ---------------------------------------------------
-
-
-# Route to serve the main HTML pages
-@app.route('/')
+from .http_cache import invalidate_response_cache
+from .models import invalidate_dashboard_cache
+from .routes import followups_bp, dashboard_bp, events_bp, reports_bp
+from .scheduler import missed_scheduler
+from .users import user_directory
+from . import assets, compression, coordination, instrumentation
+import threading
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def create_app(config=None):
+    """Build the app. `config` is applied to app.config first.
+
+    DATABASE switches this process to another database file (dropping data
+    cached from the previous one), which gives each test its own state.
+    SECRET_KEY overrides the shared key from coordination.secret_key().
+    """
+    app = Flask(__name__, static_folder=assets.STATIC_DIR, template_folder=assets.TEMPLATE_DIR)
+    app.config.update(config or {})
+
+    if app.config.get('DATABASE') and app.config['DATABASE'] != database.DATABASE:
+        database.DATABASE = app.config['DATABASE']
+        invalidate_dashboard_cache()
+        invalidate_response_cache()
+        user_directory.invalidate()
+
+    # The same session key in every worker and across restarts
+    if not app.config.get('SECRET_KEY'):
+        app.secret_key = coordination.secret_key()
+
+    # Schema and default users on first use, before any other hook reads the database
+    app.before_request(database.ensure_db)
+
+    # Register blueprints
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(followups_bp, url_prefix='/api/followups')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    app.register_blueprint(reports_bp, url_prefix='/api/reports')
+
+    # Request timing, SQL tracing and /metrics
+    instrumentation.init_app(app)
+
+    # Fingerprinted static files under /assets/ and gzip for large JSON responses
+    assets.init_app(app)
+    compression.init_app(app)
+
+    # Routes to serve the main HTML pages
+    app.add_url_rule('/', 'index', index)
+    app.add_url_rule('/login', 'login', login)
+    app.add_url_rule('/followups', 'followups_page', followups_page)
+    app.add_url_rule('/service-worker.js', 'service_worker', service_worker)
+    app.context_processor(inject_user_data)
+    return app
+
+
+def start_background():
+    """Start this process's background services; call it once in every serving process, after any fork.
+
+    Only the process holding the scheduler's lease actually runs it.
+    """
+    database.ensure_db()
+    missed_scheduler.start()
+
+
+def __getattr__(name):
+    # `from backend.app import app` builds the default app on first use
+    global _app
+    if name == 'app':
+        if _app is None:
+            with _app_lock:
+                if _app is None:
+                    _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def index():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     return render_template('index.html')
 
-@app.route('/login')
 def login():
     if 'user_id' in session:
         return redirect(url_for('index'))
     return render_template('login.html')
 
-@app.route('/followups')
 def followups_page():
     if 'user_id' not in session:
         return redirect(url_for('login'))
     return render_template('followups.html')
 
-@app.context_processor
+def service_worker():
+    # Served from the root so its scope covers the pages and the API
+    cache_version, precache_urls = assets.precache()
+    response = make_response(render_template(assets.SERVICE_WORKER_TEMPLATE,
+                                             cache_version=cache_version,
+                                             precache_urls=precache_urls))
+    response.mimetype = 'application/javascript'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 def inject_user_data():
     """Inject user data into all templates."""
     user_id = session.get('user_id')
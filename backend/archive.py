@@ -0,0 +1,236 @@
+"""Cold tier for closed follow-ups and their history.
+
+Completed and Missed follow-ups left untouched for ARCHIVE_AFTER_DAYS are
+moved, with all of their history, into a second SQLite file
+(archive_path()) in batches, so follow_ups and followup_history only hold
+live data. The hot database keeps one row per archived follow-up in
+archived_followups; readers look there first and ATTACH the archive only
+when a request actually needs archived rows.
+
+A batch is copied into the archive and committed first, then removed from
+the hot tables in a second transaction that only takes rows whose copy is
+complete and current. A crash in between leaves a follow-up in both tiers
+until the next run finishes it, never in neither. Archived follow-ups
+leave the lists, search and counters the way deleted ones would; their
+history stays readable through the history endpoints.
+
+    python -m backend.cli archive run [--days 180] [--batch-size 1000]
+"""
+import os
+from datetime import date, datetime, timedelta
+
+from . import database
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('CRM_ARCHIVE_AFTER_DAYS', 180))
+ARCHIVE_BATCH_SIZE = 1000
+CLOSED_STATUSES = ('Completed', 'Missed')
+
+FOLLOWUP_COLUMNS = ('id, lead_id, customer_id, followup_type, followup_datetime, priority, '
+                    'status, assigned_to, notes, created_at, updated_at')
+HISTORY_COLUMNS = 'id, followup_id, action, remarks, action_date, acted_by'
+
+# Same columns as the hot tables, so reads can UNION ALL across tiers
+ARCHIVE_SCHEMA = [
+    "PRAGMA archive.journal_mode = WAL",
+    """
+    CREATE TABLE IF NOT EXISTS archive.follow_ups (
+        id INTEGER PRIMARY KEY,
+        lead_id TEXT,
+        customer_id TEXT,
+        followup_type TEXT NOT NULL,
+        followup_datetime TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        status TEXT NOT NULL,
+        assigned_to INTEGER NOT NULL,
+        notes TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        archived_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.followup_history (
+        id INTEGER PRIMARY KEY,
+        followup_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        remarks TEXT,
+        action_date TEXT NOT NULL,
+        acted_by INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_followup_history_followup_date "
+    "ON followup_history (followup_id, action_date)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_follow_ups_lead_id ON follow_ups (lead_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_follow_ups_customer_id ON follow_ups (customer_id)",
+]
+
+
+def archive_path():
+    return (os.environ.get('CRM_ARCHIVE_DATABASE')
+            or f'{os.path.splitext(database.DATABASE)[0]}_archive.db')
+
+
+def attach(conn):
+    """ATTACH the archive to conn as `archive`; a no-op once done on that connection."""
+    path = archive_path()
+    attached = getattr(conn, 'attached_archive', None)
+    if attached == path:
+        return conn
+    if attached is not None:
+        conn.execute("DETACH DATABASE archive")
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    conn.attached_archive = path
+    return conn
+
+
+def is_archived(cursor, followup_id, scope_user_id=None):
+    sql = "SELECT 1 FROM archived_followups WHERE followup_id = ?"
+    params = [followup_id]
+    if scope_user_id is not None:
+        sql += " AND assigned_to = ?"
+        params.append(scope_user_id)
+    cursor.execute(sql, params)
+    return cursor.fetchone() is not None
+
+
+def has_entity_history(cursor, field, value, day_from=None, day_to=None, scope_user_id=None):
+    """Whether archived follow-ups of a lead or customer have history in [day_from, day_to]."""
+    sql = f"SELECT 1 FROM archived_followups WHERE {field} = ?"
+    params = [value]
+    if day_from:
+        sql += " AND last_action_date >= ?"
+        params.append(day_from)
+    if day_to:
+        sql += " AND first_action_date < ?"
+        params.append((date.fromisoformat(day_to) + timedelta(days=1)).isoformat())
+    if scope_user_id is not None:
+        sql += " AND assigned_to = ?"
+        params.append(scope_user_id)
+    cursor.execute(sql + " LIMIT 1", params)
+    return cursor.fetchone() is not None
+
+
+def _copy(conn, ids, now):
+    placeholders = ', '.join('?' * len(ids))
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")  # writes only the archive; the hot database is just read
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO archive.follow_ups ({FOLLOWUP_COLUMNS}, archived_at)
+            SELECT {FOLLOWUP_COLUMNS}, ? FROM main.follow_ups WHERE id IN ({placeholders})
+        """, [now.isoformat(), *ids])
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO archive.followup_history ({HISTORY_COLUMNS})
+            SELECT {HISTORY_COLUMNS} FROM main.followup_history WHERE followup_id IN ({placeholders})
+        """, ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _move(conn, ids, cutoff, now):
+    from .models import roll_up_team_days
+
+    placeholders = ', '.join('?' * len(ids))
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        # Only rows still closed and old, whose archived copy matches and
+        # holds every history row
+        cursor.execute(f"""
+            SELECT f.id FROM main.follow_ups f
+            JOIN archive.follow_ups a ON a.id = f.id AND a.updated_at = f.updated_at AND a.status = f.status
+            WHERE f.id IN ({placeholders})
+              AND f.status IN ({', '.join('?' * len(CLOSED_STATUSES))}) AND f.updated_at < ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM main.followup_history h
+                  WHERE h.followup_id = f.id
+                    AND NOT EXISTS (SELECT 1 FROM archive.followup_history ah WHERE ah.id = h.id)
+              )
+        """, [*ids, *CLOSED_STATUSES, cutoff])
+        moved = [row[0] for row in cursor.fetchall()]
+        if not moved:
+            conn.rollback()
+            return 0
+        placeholders = ', '.join('?' * len(moved))
+
+        # Team report rollups are computed from hot history; take them now
+        cursor.execute(f"""
+            SELECT DISTINCT substr(action_date, 1, 10) AS day FROM main.followup_history
+            WHERE followup_id IN ({placeholders}) AND action IN ('Completed', 'Missed', 'Rescheduled')
+              AND action_date < ?
+            ORDER BY day
+        """, [*moved, date.today().isoformat()])
+        days = [row['day'] for row in cursor.fetchall()]
+        if days:
+            roll_up_team_days(cursor, days)
+
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO archived_followups
+                (followup_id, lead_id, customer_id, assigned_to, first_action_date, last_action_date, archived_at)
+            SELECT f.id, f.lead_id, f.customer_id, f.assigned_to,
+                   MIN(h.action_date), MAX(h.action_date), ?
+            FROM main.follow_ups f
+            LEFT JOIN archive.followup_history h ON h.followup_id = f.id
+            WHERE f.id IN ({placeholders})
+            GROUP BY f.id
+        """, [now.isoformat(), *moved])
+        cursor.execute(f"DELETE FROM main.followup_history WHERE followup_id IN ({placeholders})", moved)
+        cursor.execute(f"DELETE FROM main.follow_ups WHERE id IN ({placeholders})", moved)
+        database.bump_data_version(cursor)
+        conn.commit()
+        return len(moved)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def archive_closed(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None, now=None):
+    """Move closed follow-ups untouched for `days` days to the archive, batch by batch.
+
+    Runs on its own connection and transactions, so it is meant for a
+    maintenance process (the CLI), not a request. Returns the number moved.
+    """
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=days)).isoformat()
+    conn = attach(database.open_db_connection())
+    moved = 0
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id FROM follow_ups
+                WHERE status IN ({', '.join('?' * len(CLOSED_STATUSES))}) AND updated_at < ?
+                ORDER BY updated_at
+                LIMIT ?
+            """, [*CLOSED_STATUSES, cutoff, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            _copy(conn, ids, now)
+            count = _move(conn, ids, cutoff, now)
+            moved += count
+            batches += 1
+            if count == 0:
+                break  # everything left changed under us; the next run picks it up
+    finally:
+        conn.dispose()
+    return moved
+
+
+def stats():
+    """Row counts per tier."""
+    conn = attach(database.open_db_connection())
+    try:
+        return {
+            'hot_followups': conn.execute("SELECT COUNT(*) FROM main.follow_ups").fetchone()[0],
+            'hot_history': conn.execute("SELECT COUNT(*) FROM main.followup_history").fetchone()[0],
+            'archived_followups': conn.execute("SELECT COUNT(*) FROM archive.follow_ups").fetchone()[0],
+            'archived_history': conn.execute("SELECT COUNT(*) FROM archive.followup_history").fetchone()[0],
+        }
+    finally:
+        conn.dispose()
@@ -0,0 +1,319 @@
+"""ASGI entry point, an alternative to running the Flask app under gunicorn.
+
+    uvicorn backend.asgi:app --host 0.0.0.0 --port 10000
+
+Requests that hold a connection open or are read on every poll (the live
+event stream, the CSV/NDJSON exports, the follow-up list and the
+dashboard) are served here on the event loop, with data access through
+backend.async_models. An idle SSE client then costs a coroutine instead of
+a worker thread. Every other request is handed to the Flask app on a small
+thread pool, so the API is the same as in the WSGI deployment, including
+sessions, ETags and error bodies.
+
+Needs the optional packages in requirements-asgi.txt.
+"""
+import asyncio
+import json
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError as e:
+    raise ImportError('ASGI mode needs the packages in requirements-asgi.txt '
+                      '(pip install -r requirements-asgi.txt)') from e
+
+from itsdangerous import BadSignature
+
+from . import async_models
+from .compression import gzip_json
+from .app import app as flask_app, start_background
+from .events import AsyncSubscription, HEARTBEAT_SECONDS, event_bus
+from .http_cache import cache_body, cached_body, make_etag
+from .instrumentation import request_duration
+from .models import (
+    DASHBOARD_CACHE_TTL, DASHBOARD_MISSED_LIMIT, DASHBOARD_UPCOMING_LIMIT,
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from .routes import EXPORT_FORMATS, _parse_day, batch_encoder
+
+WSGI_THREADS = 16   # threads for requests handed to Flask
+
+_flask = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+
+
+class Request:
+    def __init__(self, scope):
+        self.scope = scope
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = {k: v[0] for k, v in parse_qs(self.query_string, keep_blank_values=True).items()}
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.session = _load_session(self.headers.get('cookie'))
+
+    @property
+    def full_path(self):
+        return f'{self.path}?{self.query_string}'  # same shape as Flask's request.full_path
+
+    def arg_int(self, name, default):
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return default
+
+
+def _load_session(cookie_header):
+    """Decode Flask's signed session cookie; {} when missing or invalid."""
+    if not cookie_header:
+        return {}
+    cookie = SimpleCookie()
+    cookie.load(cookie_header)
+    morsel = cookie.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return serializer.loads(morsel.value,
+                                max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+async def _send(send, status, body=b'', headers=()):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _dumps(data):
+    # Byte-for-byte what jsonify produces outside debug mode
+    return (flask_app.json.dumps(data, separators=(',', ':')) + '\n').encode()
+
+
+async def _json(send, status, data, headers=()):
+    body = _dumps(data)
+    await _send(send, status, body, [('Content-Type', 'application/json'), *headers])
+
+
+async def _stream(receive, send, chunks, headers):
+    """Send an async iterator of str chunks, stopping when the client goes away."""
+    async def pump():
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+        try:
+            async for chunk in chunks:
+                await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        finally:
+            await chunks.aclose()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _conditional(request, send, endpoint, compute, time_bucket=None):
+    """Async counterpart of http_cache.conditional; produces the same ETags."""
+    session = request.session
+    etag = make_etag(endpoint, request.full_path, session.get('user_id'), session.get('role'),
+                     await async_models.get_data_version(), time_bucket)
+    headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+    if_none_match = request.headers.get('if-none-match', '')
+    if f'"{etag}"' in if_none_match or if_none_match.strip() == '*':
+        await _send(send, 304, headers=headers)
+        return
+    body = cached_body(etag)
+    if body is None:
+        status, data = await compute()
+        if status != 200:
+            await _json(send, status, data)
+            return
+        body = _dumps(data)
+        cache_body(etag, body)
+    body, vary, compressed = gzip_json(body, request.headers.get('accept-encoding'))
+    if vary:
+        headers.append(('Vary', 'Accept-Encoding'))
+    if compressed:
+        headers = [('ETag', f'W/"{etag}"'), *headers[1:], ('Content-Encoding', 'gzip')]
+    await _send(send, 200, body, [('Content-Type', 'application/json'), *headers])
+
+
+# --- Natively served endpoints, mirroring backend.routes ---
+
+async def get_followups(request, receive, send):
+    session, args = request.session, request.args
+
+    async def compute():
+        filters = {
+            'status': args.get('status'),
+            'followup_type': args.get('type'),
+            'priority': args.get('priority'),
+            'assigned_to': request.arg_int('assigned_to', None),
+            'search': args.get('search', '').strip(),
+        }
+        try:
+            followups, next_cursor = await async_models.get_followups_page(
+                session['user_id'], session['role'], filters,
+                sort=args.get('sort', 'followup_datetime'),
+                limit=request.arg_int('limit', DEFAULT_PAGE_SIZE),
+                cursor=args.get('cursor')
+            )
+            return 200, {'items': followups, 'next_cursor': next_cursor}
+        except ValueError as e:
+            return 400, {'message': str(e)}
+        except Exception as e:
+            return 500, {'message': f'Error fetching follow-ups: {str(e)}'}
+
+    await _conditional(request, send, 'followups.get_followups', compute)
+
+
+async def get_dashboard(request, receive, send):
+    session = request.session
+
+    async def compute():
+        try:
+            upcoming_limit = request.arg_int('upcoming_limit', DASHBOARD_UPCOMING_LIMIT)
+            missed_limit = request.arg_int('missed_limit', DASHBOARD_MISSED_LIMIT)
+            data = await async_models.get_dashboard_data(
+                session['user_id'], session['role'],
+                upcoming_limit=max(0, min(upcoming_limit, MAX_PAGE_SIZE)),
+                missed_limit=max(0, min(missed_limit, MAX_PAGE_SIZE))
+            )
+            return 200, data
+        except Exception as e:
+            return 500, {'message': f'Error fetching dashboard data: {str(e)}'}
+
+    await _conditional(request, send, 'dashboard.get_user_dashboard_data', compute,
+                       time_bucket=DASHBOARD_CACHE_TTL)
+
+
+async def _export(receive, send, batches, export_format, filename):
+    encode = batch_encoder(export_format)
+
+    async def chunks():
+        async for rows in batches:
+            yield encode(rows)
+
+    await _stream(receive, send, chunks(), [
+        ('Content-Type', EXPORT_FORMATS[export_format]
+         + ('; charset=utf-8' if export_format == 'csv' else '')),
+        ('Content-Disposition', f'attachment; filename="{filename}.{export_format}"'),
+    ])
+
+
+async def export_followups(request, receive, send):
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        await _json(send, 400, {'message': 'format must be csv or ndjson'})
+        return
+    batches = async_models.iter_followups(request.session['user_id'], request.session['role'])
+    await _export(receive, send, batches, export_format, 'followups')
+
+
+async def export_entity_history(request, receive, send):
+    lead_id = request.args.get('lead_id')
+    customer_id = request.args.get('customer_id')
+    export_format = request.args.get('format', 'csv')
+
+    if not lead_id and not customer_id:
+        await _json(send, 400, {'message': 'Either lead_id or customer_id must be provided'})
+        return
+    if export_format not in EXPORT_FORMATS:
+        await _json(send, 400, {'message': 'format must be csv or ndjson'})
+        return
+    try:
+        day_from, day_to = _parse_day(request.args.get('from')), _parse_day(request.args.get('to'))
+    except ValueError:
+        await _json(send, 400, {'message': 'from and to must be dates (YYYY-MM-DD)'})
+        return
+
+    session = request.session
+    if lead_id:
+        batches = async_models.iter_lead_customer_history('lead_id', lead_id, session['user_id'], session['role'],
+                                                          day_from=day_from, day_to=day_to)
+    else:
+        batches = async_models.iter_lead_customer_history('customer_id', customer_id,
+                                                          session['user_id'], session['role'],
+                                                          day_from=day_from, day_to=day_to)
+    await _export(receive, send, batches, export_format, 'followup_history')
+
+
+async def stream_events(request, receive, send):
+    loop = asyncio.get_running_loop()
+    subscription = event_bus.subscribe(
+        request.session['user_id'], request.session['role'],
+        factory=lambda user_id, role: AsyncSubscription(user_id, role, loop)
+    )
+
+    async def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = await subscription.aget(HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    await _stream(receive, send, events(), [
+        ('Content-Type', 'text/event-stream; charset=utf-8'),
+        ('Cache-Control', 'no-cache'),
+        ('X-Accel-Buffering', 'no'),
+    ])
+
+
+# (method, path) -> (endpoint name, handler); all of these need a login
+ROUTES = {
+    ('GET', '/api/followups/'): ('followups.get_followups', get_followups),
+    ('GET', '/api/followups/export'): ('followups.export_followups', export_followups),
+    ('GET', '/api/followups/history_by_entity/export'):
+        ('followups.export_entity_history', export_entity_history),
+    ('GET', '/api/dashboard/'): ('dashboard.get_user_dashboard_data', get_dashboard),
+    ('GET', '/api/events/stream'): ('events.stream_events', stream_events),
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # The routes served here read the database without passing through Flask's hooks
+                await asyncio.get_running_loop().run_in_executor(None, start_background)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    route = ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if route is None:
+        await _flask(scope, receive, send)
+        return
+
+    endpoint, handler = route
+    started = time.perf_counter()
+    statuses = []
+
+    async def tracked_send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        await send(message)
+
+    request = Request(scope)
+    if 'user_id' not in request.session:
+        await _json(tracked_send, 401, {'message': 'Unauthorized', 'code': 401})
+    else:
+        await handler(request, receive, tracked_send)
+    request_duration.observe(time.perf_counter() - started, endpoint, 'GET',
+                             str(statuses[0] if statuses else 499))
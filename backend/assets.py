@@ -0,0 +1,139 @@
+"""Fingerprinted, precompressed static assets.
+
+Every file under frontend/static is written to ASSET_DIR as
+name.<content hash>.ext, next to a .gz copy and, when the optional brotli
+package is installed, a .br copy. Templates link to them with asset_url(),
+and /assets/ serves them with a year-long immutable Cache-Control, so a
+browser never revalidates an asset; a changed file simply gets a new name.
+
+The build runs the first time an asset URL is needed in a process and
+only writes files that are not there yet. `python -m backend.cli assets
+build` does the same ahead of a deploy.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from flask import abort, request, send_file, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '../frontend/static')
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '../frontend/templates')
+ASSET_DIR = os.environ.get('CRM_ASSET_DIR', os.path.join(os.path.dirname(__file__), '../build/assets'))
+ASSET_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 12
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.html', '.txt')
+
+SERVICE_WORKER_TEMPLATE = 'service-worker.js'
+
+_manifest = None
+_build_lock = threading.Lock()
+_precache = None
+
+
+def _static_files():
+    for dirpath, dirnames, filenames in os.walk(STATIC_DIR):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, STATIC_DIR).replace(os.sep, '/'), path
+
+
+def _write(path, data):
+    # Several workers may build at once; each file appears whole or not at all
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)  # mkstemp creates files readable by the owner only
+    os.replace(tmp, path)
+
+
+def build(asset_dir=ASSET_DIR):
+    """Write fingerprinted and compressed copies of every static file.
+
+    Returns the manifest, source name -> fingerprinted name.
+    """
+    manifest = {}
+    for filename, path in _static_files():
+        with open(path, 'rb') as f:
+            data = f.read()
+        base, ext = os.path.splitext(filename)
+        name = f'{base}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        manifest[filename] = name
+
+        target = os.path.join(asset_dir, name)
+        variants = [(target, lambda: data)]
+        if ext in COMPRESSIBLE:
+            variants.append((target + '.gz', lambda: gzip.compress(data, 9, mtime=0)))
+            if brotli is not None:
+                variants.append((target + '.br', lambda: brotli.compress(data, quality=11)))
+        for variant, encode in variants:
+            if not os.path.exists(variant):
+                _write(variant, encode())
+    return manifest
+
+
+def manifest():
+    global _manifest
+    if _manifest is None:
+        with _build_lock:
+            if _manifest is None:
+                _manifest = build()
+    return _manifest
+
+
+def asset_url(filename):
+    """URL of the fingerprinted copy of a file under frontend/static."""
+    return url_for('assets', filename=manifest()[filename])
+
+
+def precache():
+    """(cache version, asset URLs) for the service worker.
+
+    The fingerprinted names already change with their content, so the
+    version only has to cover them and the worker script itself.
+    """
+    global _precache
+    if _precache is None:
+        urls = [asset_url(filename) for filename in manifest()]
+        digest = hashlib.sha256('\n'.join(urls).encode())
+        with open(os.path.join(TEMPLATE_DIR, SERVICE_WORKER_TEMPLATE), 'rb') as f:
+            digest.update(f.read())
+        _precache = (digest.hexdigest()[:16], urls)
+    return _precache
+
+
+def serve_asset(filename):
+    if filename not in set(manifest().values()):
+        abort(404)
+    path = os.path.join(ASSET_DIR, filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    if os.path.splitext(filename)[1] in COMPRESSIBLE:
+        for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings.quality(coding) > 0 and os.path.exists(path + suffix):
+                encoding, path = coding, path + suffix
+                break
+
+    response = send_file(path, mimetype=mimetype, etag=False, max_age=ASSET_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    if os.path.splitext(filename)[1] in COMPRESSIBLE:
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Serve /assets/ and make asset_url() available to templates."""
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve_asset)
+    app.add_template_global(asset_url)
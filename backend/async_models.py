@@ -0,0 +1,69 @@
+"""Async counterparts of the functions in backend.models.
+
+Every call runs on one dedicated SQLite thread, so the event loop never
+blocks on the database and that thread keeps a single pooled connection
+(and statement cache) for the life of the process. Calls are queued and
+run in order. Writes are not committed here: as in the WSGI app they go
+through backend.writer's write_coordinator, and the SQLite thread waits
+for their group commit, so reads queued behind a write wait for it too.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from . import models
+from .database import get_data_version as _get_data_version
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='crm-sqlite')
+
+
+async def run(fn, *args, **kwargs):
+    """Run a blocking data-access call on the SQLite thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _mirror(fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run(fn, *args, **kwargs)
+    return wrapper
+
+
+async def _batches(iterator):
+    """Drive a models.iter_* generator one batch per SQLite-thread call."""
+    try:
+        while True:
+            batch = await run(next, iterator, None)
+            if batch is None:
+                return
+            yield batch
+    finally:
+        await run(iterator.close)
+
+
+get_data_version = _mirror(_get_data_version)
+
+# Writes
+add_followup = _mirror(models.add_followup)
+update_followup = _mirror(models.update_followup)
+update_followup_status = _mirror(models.update_followup_status)
+update_followups_status = _mirror(models.update_followups_status)
+bulk_add_followups = _mirror(models.bulk_add_followups)
+
+# Reads
+get_user_ids = _mirror(models.get_user_ids)
+get_followup_by_id = _mirror(models.get_followup_by_id)
+get_followup_history = _mirror(models.get_followup_history)
+get_followups_page = _mirror(models.get_followups_page)
+search_followups = _mirror(models.search_followups)
+get_dashboard_data = _mirror(models.get_dashboard_data)
+get_lead_customer_history = _mirror(models.get_lead_customer_history)
+
+
+def iter_followups(*args, **kwargs):
+    return _batches(models.iter_followups(*args, **kwargs))
+
+
+def iter_lead_customer_history(*args, **kwargs):
+    return _batches(models.iter_lead_customer_history(*args, **kwargs))
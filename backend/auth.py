@@ -1,11 +1,34 @@
+import logging
+import math
+import os
 from flask import Blueprint, request, jsonify, session
-from werkzeug.security import generate_password_hash, check_password_hash
 from .models import get_db_connection
+from .database import bump_data_version
+from .http_cache import conditional
+from .instrumentation import login_rejected, timed_password_hash
+from .passwords import PasswordPoolBusy, dummy_hash, password_pool
+from .ratelimit import rate_limiter
+from .users import user_directory
+from .writer import write_coordinator
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
+
+
+def _limit(value):
+    """'attempts/seconds' -> (burst, refill per second)."""
+    attempts, seconds = value.split('/')
+    return int(attempts), int(attempts) / float(seconds)
+
+
+# Login attempts per client address and per username
+LOGIN_IP_LIMIT = _limit(os.environ.get('CRM_LOGIN_IP_LIMIT', '20/60'))
+LOGIN_USER_LIMIT = _limit(os.environ.get('CRM_LOGIN_USER_LIMIT', '10/120'))
+BUSY_RETRY_AFTER = 1
 
 def login_required(f):
+    # The session is the signed cookie itself; checking it needs no database lookup
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
@@ -23,6 +46,28 @@ def roles_required(roles):
         return decorated_function
     return decorator
 
+def _insert_user(cursor, username, password_hash, role):
+    cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                   (username, password_hash, role))
+    bump_data_version(cursor)
+
+
+def _update_password_hash(cursor, user_id, old_hash, new_hash):
+    cursor.execute("UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                   (new_hash, user_id, old_hash))
+
+
+def _retry_later(message, seconds, status):
+    response = jsonify({'message': message, 'code': status})
+    response.headers['Retry-After'] = str(max(1, math.ceil(seconds)))
+    return response, status
+
+
+def _too_busy():
+    login_rejected.inc('busy')
+    return _retry_later('Server busy, please retry', BUSY_RETRY_AFTER, 503)
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register_user():
     data = request.get_json()
@@ -33,20 +78,18 @@ def register_user():
     if not username or not password or not role:
         return jsonify({'message': 'Missing username, password, or role'}), 400
 
-    hashed_password = generate_password_hash(password)
+    try:
+        with timed_password_hash('hash'):
+            hashed_password = password_pool.hash(password)
+    except PasswordPoolBusy:
+        return _too_busy()
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                       (username, hashed_password, role))
-        conn.commit()
+        write_coordinator.run(_insert_user, username, hashed_password, role)
+        user_directory.invalidate()
         return jsonify({'message': 'User registered successfully'}), 201
     except Exception as e:
-        conn.rollback()
         return jsonify({'message': f'Error registering user: {str(e)}'}), 500
-    finally:
-        conn.close()
 
 @auth_bp.route('/login', methods=['POST'])
 def login_user():
@@ -57,13 +100,32 @@ def login_user():
     if not username or not password:
         return jsonify({'message': 'Missing username or password'}), 400
 
+    # Cheapest checks first: throttled attempts never reach the database or a hash
+    wait = max(rate_limiter.hit(f'login-ip:{request.remote_addr}', LOGIN_IP_LIMIT[1], LOGIN_IP_LIMIT[0]),
+               rate_limiter.hit(f'login-user:{username.lower()}', LOGIN_USER_LIMIT[1], LOGIN_USER_LIMIT[0]))
+    if wait:
+        login_rejected.inc('rate_limited')
+        return _retry_later('Too many login attempts, please retry later', wait, 429)
+
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT id, username, password_hash, role FROM users WHERE username = ?", (username,))
     user = cursor.fetchone()
     conn.close()
 
-    if user and check_password_hash(user['password_hash'], password):
+    try:
+        with timed_password_hash('check'):
+            password_ok, new_hash = password_pool.check(user['password_hash'] if user else dummy_hash(), password)
+    except PasswordPoolBusy:
+        return _too_busy()
+
+    if password_ok and user is not None:
+        if new_hash:
+            # Stored with an older cost; replace it while we have the password
+            try:
+                write_coordinator.run(_update_password_hash, user['id'], user['password_hash'], new_hash)
+            except Exception:
+                logger.exception("Could not upgrade password hash for user %s", user['id'])
         session['user_id'] = user['id']
         session['username'] = user['username']
         session['role'] = user['role']
@@ -91,10 +153,6 @@ def get_current_user():
 @auth_bp.route('/users', methods=['GET'])
 @login_required
 @roles_required(['Admin', 'Sales Manager'])
+@conditional()
 def get_all_users():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, username, role FROM users")
-    users = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(u) for u in users]), 200
+    return jsonify(user_directory.all()), 200
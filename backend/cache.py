@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class TTLCache:
+    """A small thread-safe cache with per-entry expiry and bulk invalidation.
+
+    invalidate() bumps a generation counter instead of walking the entries,
+    so writers pay O(1) no matter how many users have something cached.
+    """
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            generation, expires_at, value = entry
+            if generation != self._generation or expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (self._generation, time.monotonic() + self.ttl, value)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
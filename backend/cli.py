@@ -0,0 +1,108 @@
+"""Maintenance commands.
+
+    python -m backend.cli counters verify    # exit 1 if the counter tables drifted
+    python -m backend.cli counters rebuild   # recompute them from follow_ups
+    python -m backend.cli assets build       # fingerprint and precompress static files
+    python -m backend.cli archive run        # move old closed follow-ups to the archive database
+    python -m backend.cli archive stats      # row counts in the hot and archive tiers
+    python -m backend.cli team roll-up       # store team report rollups for closed days
+"""
+import argparse
+import os
+import sys
+
+from . import archive, assets, database, models
+
+
+def counters_verify(args):
+    conn = database.get_db_connection()
+    mismatches = database.verify_counters(conn.cursor())
+    conn.close()
+    for table, key, stored, actual in mismatches:
+        print(f'{table} {key}: stored {stored}, actual {actual}')
+    print(f'{len(mismatches)} mismatched buckets')
+    return 1 if mismatches else 0
+
+
+def counters_rebuild(args):
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        database.rebuild_counters(cursor)
+        database.bump_data_version(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    print('Counters rebuilt')
+    return 0
+
+
+def assets_build(args):
+    manifest = assets.build()
+    for filename, name in manifest.items():
+        print(f'{filename} -> {name}')
+    print(f'{len(manifest)} assets in {os.path.abspath(assets.ASSET_DIR)}'
+          + ('' if assets.brotli else ' (gzip only; install brotli for .br)'))
+    return 0
+
+
+def archive_run(args):
+    moved = archive.archive_closed(days=args.days, batch_size=args.batch_size, max_batches=args.max_batches)
+    print(f'Archived {moved} follow-ups to {os.path.abspath(archive.archive_path())}')
+    return 0
+
+
+def archive_stats(args):
+    for name, count in archive.stats().items():
+        print(f'{name:<20}{count:>12,}')
+    return 0
+
+
+def team_roll_up(args):
+    models.roll_up_closed_days(args.days)
+    print(f'Rolled up the {args.days} days up to yesterday')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.cli', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    counters = commands.add_parser('counters', help='follow-up counter tables')
+    counters_actions = counters.add_subparsers(dest='action', required=True)
+    counters_actions.add_parser('verify').set_defaults(handler=counters_verify)
+    counters_actions.add_parser('rebuild').set_defaults(handler=counters_rebuild)
+
+    assets_parser = commands.add_parser('assets', help='static asset build')
+    assets_actions = assets_parser.add_subparsers(dest='action', required=True)
+    assets_actions.add_parser('build').set_defaults(handler=assets_build)
+
+    archive_parser = commands.add_parser('archive', help='cold tier for closed follow-ups')
+    archive_actions = archive_parser.add_subparsers(dest='action', required=True)
+    run = archive_actions.add_parser('run')
+    run.add_argument('--days', type=int, default=archive.ARCHIVE_AFTER_DAYS,
+                     help='archive Completed/Missed follow-ups not updated for this many days')
+    run.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE)
+    run.add_argument('--max-batches', type=int, default=None)
+    run.set_defaults(handler=archive_run)
+    archive_actions.add_parser('stats').set_defaults(handler=archive_stats)
+
+    team_parser = commands.add_parser('team', help='team report rollups')
+    team_actions = team_parser.add_subparsers(dest='action', required=True)
+    roll_up = team_actions.add_parser('roll-up')
+    roll_up.add_argument('--days', type=int, default=models.TEAM_ROLLUP_LOOKBACK_DAYS,
+                         help='closed days to cover, counting back from yesterday')
+    roll_up.set_defaults(handler=team_roll_up)
+
+    args = parser.parse_args(argv)
+    if args.command != 'assets':
+        database.ensure_db()
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import gzip
+import os
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+# JSON bodies at least this large are gzipped for clients that accept it;
+# below it the header overhead and CPU are not worth it
+JSON_GZIP_MIN_BYTES = int(os.environ.get('CRM_GZIP_MIN_BYTES', 1024))
+JSON_GZIP_LEVEL = 5
+
+
+def gzip_json(body, accept_encoding):
+    """Gzip a JSON body if it is large enough and the client accepts gzip.
+
+    Returns (body, vary, compressed). vary is True whenever the encoding
+    depends on Accept-Encoding, i.e. the body is large enough to compress.
+    """
+    if len(body) < JSON_GZIP_MIN_BYTES:
+        return body, False, False
+    if parse_accept_header(accept_encoding or '').quality('gzip') <= 0:
+        return body, True, False
+    return gzip.compress(body, JSON_GZIP_LEVEL), True, True
+
+
+def _compress_response(response):
+    if (response.mimetype != 'application/json' or response.status_code != 200
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    body, vary, compressed = gzip_json(response.get_data(), request.headers.get('Accept-Encoding'))
+    if vary:
+        response.vary.add('Accept-Encoding')
+    if compressed:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        # The bytes differ from the identity encoding, so the tag can only be weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Gzip large JSON responses."""
+    app.after_request(_compress_response)
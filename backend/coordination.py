@@ -0,0 +1,90 @@
+"""State shared by every process serving one database.
+
+Several gunicorn workers, or several hosts sharing the database file, each
+run their own copy of the app. For them to act as one:
+
+- the session secret must be the same everywhere and survive restarts, so
+  a cookie signed by one process is accepted by all of them (secret_key());
+- background jobs must run in exactly one process, which holds a named
+  lease row in the database and keeps renewing it (Lease).
+"""
+import os
+import secrets
+import socket
+import tempfile
+import time
+
+from . import database
+from .writer import write_coordinator
+
+LEASE_TTL = 90  # seconds a lease lasts without renewal
+
+
+def secret_key():
+    """CRM_SECRET_KEY, else a random key kept in a file next to the database.
+
+    The file (CRM_SECRET_KEY_FILE, default <DATABASE>.secret_key) is created
+    on first use, readable by the owner only; whichever process creates it
+    first wins and every other process reads that key.
+    """
+    key = os.environ.get('CRM_SECRET_KEY')
+    if key:
+        return key
+    path = os.environ.get('CRM_SECRET_KEY_FILE') or database.DATABASE + '.secret_key'
+    if not os.path.exists(path):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))  # mode 0600
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+            os.link(tmp, path)  # fails if another process got there first
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _try_acquire(cursor, name, holder, now, ttl):
+    cursor.execute("""
+        INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+        WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+    """, (name, holder, now + ttl, now))
+    return cursor.rowcount == 1
+
+
+def _release(cursor, name, holder):
+    cursor.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+
+class Lease:
+    """A named lease row, held by at most one process until it lapses.
+
+    The holder renews it by calling acquire() well within `ttl`; if it stops
+    (crashed, hung, or the host went away) any other process can take the
+    lease once it has expired. Expiry compares wall clocks, so hosts sharing
+    a database need them in sync to well under `ttl`.
+    """
+
+    def __init__(self, name, ttl=LEASE_TTL):
+        self.name = name
+        self.ttl = ttl
+        self._holder = None
+        self._pid = None
+
+    @property
+    def holder(self):
+        # A forked child is a different holder from its parent
+        if self._pid != os.getpid():
+            self._holder = f'{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}'
+            self._pid = os.getpid()
+        return self._holder
+
+    def acquire(self):
+        """Take the lease or renew it; returns whether this process holds it now."""
+        return write_coordinator.run(_try_acquire, self.name, self.holder, time.time(), self.ttl)
+
+    def release(self):
+        """Give the lease up early, if held, so another process need not wait for it to lapse."""
+        write_coordinator.run(_release, self.name, self.holder)
@@ -1,30 +1,240 @@
 import sqlite3
 import os
-from werkzeug.security import generate_password_hash
+import threading
+import time
 
-DATABASE = 'crm_followup.db'
+DATABASE = os.environ.get('CRM_DATABASE', 'crm_followup.db')
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
+# Connection tuning
+BUSY_TIMEOUT_MS = 5000           # wait this long for a write lock instead of failing
+CACHE_SIZE_KB = 20000            # page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024    # memory-map the first 256 MB of the file
+STATEMENT_CACHE_SIZE = 256       # prepared statements kept per connection
+
+_local = threading.local()
+
+# Callables (sql, seconds, rows) told about every statement run through a
+# pooled connection; the instrumentation layer registers itself here.
+query_observers = []
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's duration and row count to query_observers.
+
+    Writes are reported as soon as they run. Queries are reported once their
+    rows have been consumed (fetchall, fetchone, an exhausted fetchmany), so
+    the time includes stepping through the results.
+    """
+
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        if not query_observers:
+            return super().execute(sql, parameters)
+        self._report()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = [sql, time.perf_counter() - started, 0]
+        if self.description is None:
+            self._pending[2] = max(self.rowcount, 0)
+            self._report()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        if not query_observers:
+            return super().executemany(sql, seq_of_parameters)
+        self._report()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._pending = [sql, time.perf_counter() - started, max(self.rowcount, 0)]
+        self._report()
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._consumed(started, 0 if row is None else 1, done=True)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._consumed(started, len(rows), done=not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._consumed(started, len(rows), done=True)
+        return rows
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def _consumed(self, started, rows, done):
+        if self._pending is None:
+            return
+        self._pending[1] += time.perf_counter() - started
+        self._pending[2] += rows
+        if done:
+            self._report()
+
+    def _report(self):
+        if self._pending is None:
+            return
+        sql, seconds, rows = self._pending
+        self._pending = None
+        for observer in query_observers:
+            observer(sql, seconds, rows)
+
+
+class PooledConnection(sqlite3.Connection):
+    """A connection owned by one thread and reused for every call on it.
+
+    close() only ends an open transaction, so callers can keep the usual
+    open/commit/close pattern while the handle (and its statement cache)
+    stays alive for the next call on the same thread.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        super().close()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000,
+                           factory=PooledConnection,
+                           cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
-def init_db():
+
+def get_db_connection():
+    """Return this thread's connection to DATABASE, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == DATABASE and _local.pid == os.getpid():
+        return conn
+    if conn is not None and _local.pid == os.getpid():
+        conn.dispose()
+    _local.conn = _connect(DATABASE)
+    _local.path = DATABASE
+    _local.pid = os.getpid()  # never reuse a handle inherited across fork()
+    return _local.conn
+
+
+def open_db_connection():
+    """Open a dedicated connection the caller must dispose() of.
+
+    For long-running readers such as streaming exports that should not hold
+    the thread's shared connection.
+    """
+    return _connect(DATABASE)
+
+
+def bump_data_version(cursor):
+    """Advance the data version inside the caller's write transaction.
+
+    Every write path calls this before committing, so the version changes
+    exactly when readable data does, across all processes sharing the file.
+    """
+    cursor.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def get_data_version():
     conn = get_db_connection()
-    cursor = conn.cursor()
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'data_version'").fetchone()
+    conn.close()
+    return row[0]
+
 
-    # Create users table
-    cursor.execute("""
+def close_db_connection():
+    """Dispose of this thread's connection, e.g. when a worker thread exits."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        if _local.pid == os.getpid():
+            conn.dispose()
+        _local.conn = None
+
+def due_epoch_sql(value):
+    """SQL for a due time's wall-clock minute ("YYYY-MM-DDTHH:MM") as seconds since 1970.
+
+    Read as UTC like calendar.timegm, with any offset ignored, so the day
+    of the result is always substr(value, 1, 10): the day the daily
+    counters file the follow-up under.
+    """
+    return f"CAST(strftime('%s', substr({value}, 1, 16)) AS INTEGER)"
+
+
+# Indexed as an expression: a query only uses those indexes when it spells
+# the expression exactly like this, so never change it.
+FOLLOWUP_EPOCH_SQL = due_epoch_sql('followup_datetime')
+
+_DUE_MINUTE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]'
+
+
+def normalize_stored_due_times(cursor):
+    """Rewrite follow_ups.followup_datetime values not yet in canonical form.
+
+    Rows written before due times were normalised on the way in (offsets,
+    a space instead of 'T', ':00' seconds, fractions) are converted with
+    models.normalize_followup_datetime; values it cannot parse are left
+    alone. The counter triggers move rows whose day changes. Returns the
+    number of rows rewritten.
+    """
+    from .models import normalize_followup_datetime  # models imports this module
+    cursor.execute(f"""
+        SELECT id, followup_datetime FROM follow_ups
+        WHERE NOT (followup_datetime GLOB '{_DUE_MINUTE_GLOB}'
+                   OR (followup_datetime GLOB '{_DUE_MINUTE_GLOB}:[0-9][0-9]'
+                       AND substr(followup_datetime, 18) != '00'))
+    """)
+    changes = []
+    for followup_id, value in cursor.fetchall():
+        try:
+            changes.append((normalize_followup_datetime(value), followup_id))
+        except ValueError:
+            continue
+    cursor.executemany("UPDATE follow_ups SET followup_datetime = ? WHERE id = ?", changes)
+    if changes:
+        bump_data_version(cursor)
+    return len(changes)
+
+# --- Schema migrations ---
+# Each entry is (version, description, steps). A step is either an SQL
+# string or a callable taking the cursor. Versions are applied in order
+# inside one transaction each and recorded in PRAGMA user_version, so a
+# migration only ever runs once per database file. Never edit a shipped
+# migration; append a new one instead.
+MIGRATIONS = [
+    (1, 'initial schema', [
+        """
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT NOT NULL UNIQUE,
             password_hash TEXT NOT NULL,
             role TEXT NOT NULL DEFAULT 'Sales Executive' -- Admin, Sales Manager, Sales Executive
         );
-    """)
-
-    # Create follow_ups table
-    cursor.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS follow_ups (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             lead_id TEXT,
@@ -39,10 +249,8 @@ def init_db():
             updated_at TEXT NOT NULL, -- ISO format
             FOREIGN KEY (assigned_to) REFERENCES users(id)
         );
-    """)
-
-    # Create followup_history table
-    cursor.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS followup_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             followup_id INTEGER NOT NULL, -- FK to follow_ups.id
@@ -53,12 +261,313 @@ def init_db():
             FOREIGN KEY (followup_id) REFERENCES follow_ups(id),
             FOREIGN KEY (acted_by) REFERENCES users(id)
         );
-    """)
+        """,
+    ]),
+    (2, 'secondary indexes for the hot follow-up queries', [
+        # Per-user lists and dashboards: filter by assignee (and status), ordered by time
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_assignee_status_datetime "
+        "ON follow_ups (assigned_to, status, followup_datetime)",
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_assignee_datetime "
+        "ON follow_ups (assigned_to, followup_datetime)",
+        # Admin dashboards and the missed-followup checker
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_status_datetime "
+        "ON follow_ups (status, followup_datetime)",
+        # Admin list ordered by time
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_datetime "
+        "ON follow_ups (followup_datetime)",
+        # Entity history lookups
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_lead_id ON follow_ups (lead_id)",
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_customer_id ON follow_ups (customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_followup_history_followup_date "
+        "ON followup_history (followup_id, action_date)",
+    ]),
+    (3, 'full-text index over follow-up notes, lead_id and customer_id', [
+        # External-content FTS5 table: the text lives in follow_ups only.
+        # '-' and '_' are token characters so ids like "L-1042" stay whole.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS follow_ups_fts USING fts5(
+            lead_id, customer_id, notes,
+            content = 'follow_ups', content_rowid = 'id',
+            tokenize = "unicode61 tokenchars '-_'"
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS follow_ups_fts_insert AFTER INSERT ON follow_ups BEGIN
+            INSERT INTO follow_ups_fts (rowid, lead_id, customer_id, notes)
+            VALUES (new.id, new.lead_id, new.customer_id, new.notes);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS follow_ups_fts_delete AFTER DELETE ON follow_ups BEGIN
+            INSERT INTO follow_ups_fts (follow_ups_fts, rowid, lead_id, customer_id, notes)
+            VALUES ('delete', old.id, old.lead_id, old.customer_id, old.notes);
+        END
+        """,
+        # Status changes (the common write) do not touch the index
+        """
+        CREATE TRIGGER IF NOT EXISTS follow_ups_fts_update
+        AFTER UPDATE OF lead_id, customer_id, notes ON follow_ups BEGIN
+            INSERT INTO follow_ups_fts (follow_ups_fts, rowid, lead_id, customer_id, notes)
+            VALUES ('delete', old.id, old.lead_id, old.customer_id, old.notes);
+            INSERT INTO follow_ups_fts (rowid, lead_id, customer_id, notes)
+            VALUES (new.id, new.lead_id, new.customer_id, new.notes);
+        END
+        """,
+        "INSERT INTO follow_ups_fts (follow_ups_fts) VALUES ('rebuild')",
+    ]),
+    (4, 'data version counter for conditional GETs', [
+        """
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_version', 0)",
+    ]),
+    (5, 'follow-up counters maintained by triggers', [
+        # Rows per (assignee, status): dashboard counts read a handful of rows
+        # instead of scanning follow_ups.
+        """
+        CREATE TABLE IF NOT EXISTS followup_counters (
+            assigned_to INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (assigned_to, status)
+        ) WITHOUT ROWID
+        """,
+        # The same split by due day, type and priority, for reports
+        """
+        CREATE TABLE IF NOT EXISTS followup_daily_counters (
+            assigned_to INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            day TEXT NOT NULL, -- date part of followup_datetime
+            followup_type TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (assigned_to, status, day, followup_type, priority)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_followup_daily_counters_day ON followup_daily_counters (day)",
+        """
+        CREATE TRIGGER IF NOT EXISTS followup_counters_insert AFTER INSERT ON follow_ups BEGIN
+            INSERT INTO followup_counters (assigned_to, status, total)
+            VALUES (new.assigned_to, new.status, 1)
+            ON CONFLICT (assigned_to, status) DO UPDATE SET total = total + 1;
+            INSERT INTO followup_daily_counters (assigned_to, status, day, followup_type, priority, total)
+            VALUES (new.assigned_to, new.status, substr(new.followup_datetime, 1, 10),
+                    new.followup_type, new.priority, 1)
+            ON CONFLICT (assigned_to, status, day, followup_type, priority) DO UPDATE SET total = total + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS followup_counters_delete AFTER DELETE ON follow_ups BEGIN
+            UPDATE followup_counters SET total = total - 1
+            WHERE assigned_to = old.assigned_to AND status = old.status;
+            UPDATE followup_daily_counters SET total = total - 1
+            WHERE assigned_to = old.assigned_to AND status = old.status
+              AND day = substr(old.followup_datetime, 1, 10)
+              AND followup_type = old.followup_type AND priority = old.priority;
+        END
+        """,
+        # Only writes that move a row between buckets touch the counters
+        """
+        CREATE TRIGGER IF NOT EXISTS followup_counters_update
+        AFTER UPDATE OF assigned_to, status, followup_datetime, followup_type, priority ON follow_ups
+        WHEN old.assigned_to IS NOT new.assigned_to OR old.status IS NOT new.status
+          OR substr(old.followup_datetime, 1, 10) IS NOT substr(new.followup_datetime, 1, 10)
+          OR old.followup_type IS NOT new.followup_type OR old.priority IS NOT new.priority
+        BEGIN
+            UPDATE followup_counters SET total = total - 1
+            WHERE assigned_to = old.assigned_to AND status = old.status;
+            INSERT INTO followup_counters (assigned_to, status, total)
+            VALUES (new.assigned_to, new.status, 1)
+            ON CONFLICT (assigned_to, status) DO UPDATE SET total = total + 1;
+            UPDATE followup_daily_counters SET total = total - 1
+            WHERE assigned_to = old.assigned_to AND status = old.status
+              AND day = substr(old.followup_datetime, 1, 10)
+              AND followup_type = old.followup_type AND priority = old.priority;
+            INSERT INTO followup_daily_counters (assigned_to, status, day, followup_type, priority, total)
+            VALUES (new.assigned_to, new.status, substr(new.followup_datetime, 1, 10),
+                    new.followup_type, new.priority, 1)
+            ON CONFLICT (assigned_to, status, day, followup_type, priority) DO UPDATE SET total = total + 1;
+        END
+        """,
+        lambda cursor: rebuild_counters(cursor),
+    ]),
+    (6, 'team report rollups and history lookups by action', [
+        # Team reports read one action over a date range
+        "CREATE INDEX IF NOT EXISTS idx_followup_history_action_date "
+        "ON followup_history (action, action_date, followup_id)",
+        # Per-day, per-assignee totals for days that are over; filled by the scheduler leader or the CLI
+        """
+        CREATE TABLE IF NOT EXISTS team_daily_rollups (
+            day TEXT NOT NULL,
+            assigned_to INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            missed INTEGER NOT NULL,
+            rescheduled INTEGER NOT NULL,
+            completion_hours REAL NOT NULL, -- summed created -> completed time
+            PRIMARY KEY (day, assigned_to)
+        ) WITHOUT ROWID
+        """,
+        # Days already rolled up, including days without any activity
+        "CREATE TABLE IF NOT EXISTS team_rollup_days (day TEXT PRIMARY KEY) WITHOUT ROWID",
+    ]),
+    (7, 'idempotency keys for replayed writes', [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            request_hash TEXT NOT NULL,
+            status_code INTEGER, -- NULL while the first request is running
+            response_body TEXT,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, key)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys (created_at)",
+    ]),
+    (8, 'directory of follow-ups moved to the archive database', [
+        # One row per archived follow-up, so reads know when the cold tier is needed
+        """
+        CREATE TABLE IF NOT EXISTS archived_followups (
+            followup_id INTEGER PRIMARY KEY,
+            lead_id TEXT,
+            customer_id TEXT,
+            assigned_to INTEGER NOT NULL,
+            first_action_date TEXT, -- span of its archived history
+            last_action_date TEXT,
+            archived_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_archived_followups_lead "
+        "ON archived_followups (lead_id, last_action_date)",
+        "CREATE INDEX IF NOT EXISTS idx_archived_followups_customer "
+        "ON archived_followups (customer_id, last_action_date)",
+        # The archiver picks closed follow-ups by age
+        "CREATE INDEX IF NOT EXISTS idx_follow_ups_status_updated_at ON follow_ups (status, updated_at)",
+    ]),
+    (9, 'leases for electing the process that runs background jobs', [
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL -- unix time
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (10, 'numeric due-time indexes for calendar ranges and scheduling conflicts', [
+        # Integer range scans instead of ISO text comparison; per assignee for
+        # calendars and conflict checks, across assignees for team timelines
+        f"CREATE INDEX IF NOT EXISTS idx_follow_ups_assignee_epoch "
+        f"ON follow_ups (assigned_to, {FOLLOWUP_EPOCH_SQL}, status)",
+        f"CREATE INDEX IF NOT EXISTS idx_follow_ups_epoch ON follow_ups ({FOLLOWUP_EPOCH_SQL}, status)",
+    ]),
+    (11, 'due times rewritten to the form new writes store', [
+        # Text comparisons on followup_datetime only follow time order in that form
+        normalize_stored_due_times,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# What the counter tables should contain, computed from follow_ups
+COUNTER_QUERIES = {
+    'followup_counters': """
+        SELECT assigned_to, status, COUNT(*) AS total
+        FROM follow_ups
+        GROUP BY assigned_to, status
+    """,
+    'followup_daily_counters': """
+        SELECT assigned_to, status, substr(followup_datetime, 1, 10) AS day,
+               followup_type, priority, COUNT(*) AS total
+        FROM follow_ups
+        GROUP BY assigned_to, status, day, followup_type, priority
+    """,
+}
+
+
+def rebuild_counters(cursor):
+    """Recompute the counter tables from follow_ups inside the caller's transaction."""
+    for table, query in COUNTER_QUERIES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} {query}")
+
+
+def verify_counters(cursor):
+    """Compare the counter tables with follow_ups.
+
+    Returns (table, key, stored, actual) for every bucket that differs;
+    buckets counted down to zero are treated as absent.
+    """
+    mismatches = []
+    for table, query in COUNTER_QUERIES.items():
+        cursor.execute(query)
+        actual = {tuple(row)[:-1]: row['total'] for row in cursor.fetchall()}
+        cursor.execute(f"SELECT * FROM {table} WHERE total != 0")
+        stored = {tuple(row)[:-1]: row['total'] for row in cursor.fetchall()}
+        for key in sorted(actual.keys() | stored.keys(), key=repr):
+            if actual.get(key) != stored.get(key):
+                mismatches.append((table, key, stored.get(key), actual.get(key)))
+    return mismatches
+
+
+def migrate(conn):
+    """Bring the schema up to SCHEMA_VERSION. Returns the versions applied."""
+    applied = []
+    cursor = conn.cursor()
+    for version, description, steps in MIGRATIONS:
+        if version <= cursor.execute("PRAGMA user_version").fetchone()[0]:
+            continue
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if version <= cursor.execute("PRAGMA user_version").fetchone()[0]:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"Applied migration {version}: {description}")
+    if applied:
+        cursor.execute("PRAGMA optimize")
+    return applied
+
+
+# Hashes of the default users' passwords (printed below when they are
+# created), computed ahead of time: hashing them on a fresh start would
+# cost about a third of a second. A login rehashes them if the configured
+# method differs (see backend.passwords).
+SEED_PASSWORD_HASHES = {
+    'admin': ('scrypt:32768:8:1$GM6VIqBbJ5X40tt0$'
+              'e73440f374847f893f9fbba6629d748ee07c24ff0d9a3c6fd7a1af2f4966b109'
+              'befb6d13705debd5d2547c2e8449304dd4fcfd874fa87bb390e62f16f10afdbf'),
+    'manager': ('scrypt:32768:8:1$26EOP09zKhWLsopv$'
+                '201de5ea33967563d8a0886019fd4bf5d3ac33b86461a8c828c1177f17fbf273'
+                '26d61270be530887079c848781406e8c1eade7fae7effbd76336ef10b19ae0a0'),
+    'executive1': ('scrypt:32768:8:1$eV6ymsfBdI0C3Fe2$'
+                   'b004bb590ad0f0f09f84b643518dfdc77b259f93939c4bfe34afb766d8e81982'
+                   '6ddd75980fe0acdfa8859e4c84a4e4217d3149883c6c7623c8a39d1cf9b62c3c'),
+}
+
+
+def init_db():
+    conn = get_db_connection()
+    migrate(conn)
+    cursor = conn.cursor()
 
     # Insert default admin user if not exists
     cursor.execute("SELECT id FROM users WHERE username = 'admin'")
     if not cursor.fetchone():
-        admin_password_hash = generate_password_hash('admin123')
+        admin_password_hash = SEED_PASSWORD_HASHES['admin']
         cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
                        ('admin', admin_password_hash, 'Admin'))
         print("Default Admin user created (username: admin, password: admin123)")
@@ -66,7 +575,7 @@ def init_db():
     # Insert default sales manager user if not exists
     cursor.execute("SELECT id FROM users WHERE username = 'manager'")
     if not cursor.fetchone():
-        manager_password_hash = generate_password_hash('manager123')
+        manager_password_hash = SEED_PASSWORD_HASHES['manager']
         cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
                        ('manager', manager_password_hash, 'Sales Manager'))
         print("Default Sales Manager user created (username: manager, password: manager123)")
@@ -74,14 +583,39 @@ def init_db():
     # Insert default sales executive user if not exists
     cursor.execute("SELECT id FROM users WHERE username = 'executive1'")
     if not cursor.fetchone():
-        executive_password_hash = generate_password_hash('exec123')
+        executive_password_hash = SEED_PASSWORD_HASHES['executive1']
         cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
                        ('executive1', executive_password_hash, 'Sales Executive'))
         print("Default Sales Executive user created (username: executive1, password: exec123)")
 
+    if conn.in_transaction:
+        bump_data_version(cursor)
     conn.commit()
     conn.close()
 
+
+_ready = set()  # database files this process has initialised
+_ready_lock = threading.Lock()
+
+
+def ensure_db():
+    """Run init_db() on DATABASE once per process, the first time it is needed.
+
+    A database already at SCHEMA_VERSION only costs one PRAGMA read here.
+    A forked child inherits what its parent already did.
+    """
+    if DATABASE in _ready:
+        return
+    with _ready_lock:
+        if DATABASE in _ready:
+            return
+        conn = get_db_connection()
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        if current < SCHEMA_VERSION:
+            init_db()
+        _ready.add(DATABASE)
+
 if __name__ == '__main__':
     # This block runs when database.py is executed directly for setup
     init_db()
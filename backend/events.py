@@ -0,0 +1,199 @@
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+# 'memory' delivers within this process only. 'file' appends every event to
+# <DATABASE>.events and each process tails that file, so subscribers on any
+# worker see writes made by every other worker.
+BACKEND = os.environ.get('CRM_EVENTS_BACKEND', 'memory')
+
+HEARTBEAT_SECONDS = 15          # SSE comment sent when nothing happened
+SUBSCRIBER_QUEUE_SIZE = 256     # events buffered per connection before it is told to resync
+FILE_POLL_SECONDS = 0.2         # how often the file backend checks for new lines
+FILE_ROTATE_BYTES = 1024 * 1024
+
+
+class Subscription:
+    def __init__(self, user_id, role):
+        self.user_id = user_id
+        self.role = role
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event):
+        return self.role == 'Admin' or self.user_id in event.get('assignees', ())
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class _LoopQueue(queue.Queue):
+    """Queue that also wakes an asyncio consumer whenever something is put."""
+
+    def __init__(self, maxsize, loop, wakeup):
+        super().__init__(maxsize)
+        self._loop = loop
+        self._wakeup = wakeup
+
+    def _put(self, item):
+        super()._put(item)
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # loop already closed; the subscriber is going away
+
+
+class AsyncSubscription(Subscription):
+    """A Subscription read from an asyncio event loop (see backend.asgi)."""
+
+    def __init__(self, user_id, role, loop):
+        import asyncio  # only the ASGI entry point needs it; keeps it out of WSGI start-up
+        super().__init__(user_id, role)
+        self._wakeup = asyncio.Event()
+        self.queue = _LoopQueue(SUBSCRIBER_QUEUE_SIZE, loop, self._wakeup)
+
+    async def aget(self, timeout):
+        import asyncio
+        self._wakeup.clear()
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Fan follow-up change events out to the connected users allowed to see them."""
+
+    def __init__(self, backend=BACKEND):
+        self.backend = backend
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._tailer = None
+
+    def subscribe(self, user_id, role, factory=Subscription):
+        subscription = factory(user_id, role)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self.backend == 'file' and self._tailer is None:
+                self._tailer = threading.Thread(target=self._tail, name='event-file-tailer',
+                                                daemon=True)
+                self._tailer.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        event.setdefault('at', time.time())
+        if self.backend == 'file':
+            self._append(event)
+        else:
+            self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # A slow client: drop what it has and ask it to reload once
+                with subscription.queue.mutex:
+                    subscription.queue.queue.clear()
+                subscription.queue.put_nowait({'type': 'resync'})
+
+    # --- file backend ---
+    def _path(self):
+        return database.DATABASE + '.events'
+
+    def _append(self, event):
+        path = self._path()
+        line = json.dumps(event) + '\n'
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if f.tell() > FILE_ROTATE_BYTES and self._rotation_settled(path):
+                    # Tailers notice the new inode and finish the old file first
+                    os.replace(path, path + '.1')
+                    with open(path, 'a') as fresh:
+                        fresh.write(line)
+                else:
+                    f.write(line)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _rotation_settled(self, path):
+        # Never rotate twice before every tailer has polled past the last rotation
+        try:
+            return time.time() - os.path.getmtime(path + '.1') > FILE_POLL_SECONDS * 10
+        except OSError:
+            return True
+
+    def _tail(self):
+        handle = None
+        inode = None
+        while True:
+            try:
+                if handle is None:
+                    open(self._path(), 'a').close()
+                    handle = open(self._path(), 'r')
+                    handle.seek(0, os.SEEK_END)  # only events published from now on
+                    inode = os.fstat(handle.fileno()).st_ino
+                self._read_lines(handle)
+                if os.stat(self._path()).st_ino != inode:
+                    self._read_lines(handle)  # whatever landed before the rotation
+                    handle.close()
+                    handle = open(self._path(), 'r')
+                    inode = os.fstat(handle.fileno()).st_ino
+                    self._read_lines(handle)
+            except OSError:
+                logger.exception("Event file tailer failed; reopening")
+                handle = None
+            time.sleep(FILE_POLL_SECONDS)
+
+    def _read_lines(self, handle):
+        while True:
+            position = handle.tell()
+            line = handle.readline()
+            if not line:
+                return
+            if not line.endswith('\n'):
+                handle.seek(position)  # partial write, pick it up next time
+                return
+            try:
+                self._dispatch(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping malformed event line")
+
+
+event_bus = EventBus()
+
+
+def publish(event_type, rows, **fields):
+    """Publish one event per assignee for rows of (followup_id, assigned_to)."""
+    by_assignee = {}
+    for followup_id, assigned_to in rows:
+        by_assignee.setdefault(assigned_to, []).append(followup_id)
+    for assigned_to, ids in by_assignee.items():
+        event_bus.publish(dict(fields, type=event_type, ids=ids, assignees=[assigned_to]))
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import time
+from functools import wraps
+
+from flask import request, session, make_response
+
+from .cache import TTLCache
+from .database import get_data_version
+
+# Server-side cache of serialized 200 responses, keyed by their ETag. Set
+# CRM_RESPONSE_CACHE=0 to rely on ETags alone.
+RESPONSE_CACHE_ENABLED = os.environ.get('CRM_RESPONSE_CACHE', '1') == '1'
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024   # larger bodies are not kept
+
+_response_cache = TTLCache(ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def make_etag(endpoint, full_path, user_id, role, data_version, time_bucket=None, extra=()):
+    parts = [endpoint, full_path, user_id, role, data_version, *extra]
+    if time_bucket:
+        parts.append(int(time.time() // time_bucket))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def cached_body(etag):
+    return _response_cache.get(etag) if RESPONSE_CACHE_ENABLED else None
+
+
+def cache_body(etag, body):
+    if RESPONSE_CACHE_ENABLED and len(body) <= RESPONSE_CACHE_MAX_BYTES:
+        _response_cache.set(etag, body)
+
+
+def invalidate_response_cache():
+    _response_cache.invalidate()
+
+
+def conditional(time_bucket=None, vary=None):
+    """Serve a read endpoint with a strong ETag derived from the data version.
+
+    The tag covers the endpoint, the full query string, the user's scope
+    and the current data version, so a matching If-None-Match is answered
+    with 304 before the view runs at all. time_bucket (seconds) also rolls
+    the tag for views whose output moves with the clock, like the
+    dashboard's "next 24h" window. vary is a callable returning more
+    values the output depends on, such as today's date for views whose
+    default range ends today.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            etag = make_etag(request.endpoint, request.full_path, session.get('user_id'),
+                             session.get('role'), get_data_version(), time_bucket,
+                             vary() if vary else ())
+
+            # Weak comparison: gzipped responses carry the same tag as W/"..."
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                body = cached_body(etag)
+                if body is not None:
+                    response = make_response(body, 200, {'Content-Type': 'application/json'})
+                else:
+                    response = make_response(f(*args, **kwargs))
+                    if response.status_code == 200 and response.content_length is not None:
+                        cache_body(etag, response.get_data())
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,89 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, session, jsonify, make_response
+
+from .writer import write_coordinator
+
+# How long a key is remembered. Clients replaying an offline outbox do so
+# within minutes or hours of the original attempt.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+MAX_KEY_LENGTH = 255
+
+
+def _reserve(cursor, user_id, key, request_hash, now):
+    """Claim a key for this request; returns the existing row if it was already used."""
+    cursor.execute("DELETE FROM idempotency_keys WHERE created_at < ?",
+                   ((now - IDEMPOTENCY_KEY_TTL).isoformat(),))
+    cursor.execute("""
+        SELECT request_hash, status_code, response_body
+        FROM idempotency_keys
+        WHERE user_id = ? AND key = ?
+    """, (user_id, key))
+    existing = cursor.fetchone()
+    if existing is not None:
+        return dict(existing)
+    cursor.execute("""
+        INSERT INTO idempotency_keys (user_id, key, request_hash, created_at)
+        VALUES (?, ?, ?, ?)
+    """, (user_id, key, request_hash, now.isoformat()))
+    return None
+
+
+def _store(cursor, user_id, key, status_code, body):
+    cursor.execute("""
+        UPDATE idempotency_keys SET status_code = ?, response_body = ?
+        WHERE user_id = ? AND key = ?
+    """, (status_code, body, user_id, key))
+
+
+def _release(cursor, user_id, key):
+    cursor.execute("DELETE FROM idempotency_keys WHERE user_id = ? AND key = ?", (user_id, key))
+
+
+def idempotent(f):
+    """Apply a write at most once per Idempotency-Key header.
+
+    The first request with a key reserves it before the view runs and
+    stores the response afterwards; a repeat gets the stored response back
+    (marked Idempotent-Replayed) without the view running again. Keys are
+    per user, a key reused with a different body is rejected with 422, and
+    a repeat that arrives while the first is still running gets 409. A 5xx
+    or an exception releases the key so the client can retry. Requests
+    without the header are not affected.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        user_id = session['user_id']
+        request_hash = hashlib.sha256(
+            f'{request.method} {request.full_path}\n'.encode() + request.get_data()
+        ).hexdigest()
+        existing = write_coordinator.run(_reserve, user_id, key, request_hash, datetime.now())
+        if existing is not None:
+            if existing['request_hash'] != request_hash:
+                return jsonify({'message': 'Idempotency-Key was already used for a different request'}), 422
+            if existing['status_code'] is None:
+                return jsonify({'message': 'A request with this Idempotency-Key is still being processed'}), 409
+            response = make_response(existing['response_body'], existing['status_code'],
+                                     {'Content-Type': 'application/json'})
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            write_coordinator.run(_release, user_id, key)
+            raise
+        if response.status_code >= 500:
+            write_coordinator.run(_release, user_id, key)
+        else:
+            write_coordinator.run(_store, user_id, key, response.status_code, response.get_data(as_text=True))
+        return response
+    return decorated_function
@@ -0,0 +1,239 @@
+import collections
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request, session
+
+from . import database
+from .scheduler import missed_scheduler
+from .writer import write_coordinator
+
+logger = logging.getLogger(__name__)
+sql_logger = logging.getLogger('crm.sql')
+
+SLOW_QUERY_MS = float(os.environ.get('CRM_SLOW_QUERY_MS', 100))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('CRM_N_PLUS_ONE_THRESHOLD', 5))  # same statement, one request
+PROFILING_ENABLED = os.environ.get('CRM_PROFILING') == '1'
+PROFILE_DIR = os.environ.get('CRM_PROFILE_DIR', 'profiles')
+# If set, /metrics needs "Authorization: Bearer <token>"; otherwise it needs an Admin session
+METRICS_TOKEN = os.environ.get('CRM_METRICS_TOKEN')
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.label_names, labels)} {value}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = [(labels, list(counts), total, count)
+                      for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in series:
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield (f'{self.name}_bucket'
+                       f'{_format_labels(self.label_names, labels, [("le", bound)])} {bucket_count}')
+            yield f'{self.name}_bucket{_format_labels(self.label_names, labels, [("le", "+Inf")])} {count}'
+            yield f'{self.name}_sum{_format_labels(self.label_names, labels)} {total}'
+            yield f'{self.name}_count{_format_labels(self.label_names, labels)} {count}'
+
+
+request_duration = Histogram('crm_http_request_duration_seconds', 'Request latency by endpoint.',
+                             ('endpoint', 'method', 'status'))
+sql_duration = Histogram('crm_sql_query_duration_seconds', 'SQL statement latency, including fetching rows.',
+                         ('operation', 'table'))
+sql_rows = Counter('crm_sql_rows_total', 'Rows returned (queries) or affected (writes).',
+                   ('operation', 'table'))
+sql_slow = Counter('crm_sql_slow_queries_total', f'Statements slower than {SLOW_QUERY_MS:g} ms.',
+                   ('operation', 'table'))
+sql_repeated = Counter('crm_sql_repeated_queries_total',
+                       f'Statements run {N_PLUS_ONE_THRESHOLD}+ times in one request (likely N+1).',
+                       ('endpoint',))
+password_hash_duration = Histogram('crm_password_hash_duration_seconds', 'Password hash and check time.',
+                                   ('operation',))
+login_rejected = Counter('crm_login_rejected_total', 'Logins turned away before the password was checked.',
+                         ('reason',))
+
+METRICS = [request_duration, sql_duration, sql_rows, sql_slow, sql_repeated, password_hash_duration,
+           login_rejected]
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(\w+)', re.IGNORECASE)
+
+
+def _sql_shape(sql):
+    words = sql.split(None, 1)
+    operation = words[0].upper() if words else ''
+    match = _TABLE.search(sql)
+    return operation, match.group(1) if match else ''
+
+
+def _observe_query(sql, seconds, rows):
+    operation, table = _sql_shape(sql)
+    sql_duration.observe(seconds, operation, table)
+    sql_rows.inc(operation, table, amount=rows)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        sql_slow.inc(operation, table)
+        sql_logger.warning("Slow query (%.1f ms, %d rows): %s", seconds * 1000, rows, ' '.join(sql.split()))
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements[' '.join(sql.split())] += 1
+        g.sql_seconds += seconds
+
+
+@contextmanager
+def timed_password_hash(operation):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        password_hash_duration.observe(time.perf_counter() - started, operation)
+
+
+def _scheduler_lines():
+    metrics = missed_scheduler.metrics()
+    gauges = [
+        ('crm_missed_scheduler_is_leader', 'Whether this process runs the missed-followup scheduler.',
+         int(metrics['is_leader'])),
+        ('crm_missed_scheduler_marked_total', 'Follow-ups marked Missed by this process.',
+         metrics['marked_total']),
+        ('crm_missed_scheduler_lag_seconds', 'Delay between a deadline and marking it, last batch.',
+         metrics['last_lag_seconds']),
+        ('crm_missed_scheduler_rows_per_second', 'Marking throughput of the last batch.',
+         metrics['last_rows_per_second']),
+    ]
+    for name, help_text, value in gauges:
+        yield f'# HELP {name} {help_text}'
+        yield f'# TYPE {name} gauge'
+        yield f'{name} {value}'
+
+
+def _writer_lines():
+    metrics = write_coordinator.metrics()
+    series = [
+        ('crm_writer_groups_total', 'counter', 'Transactions committed by the write coordinator.',
+         metrics['groups']),
+        ('crm_writer_jobs_total', 'counter', 'Mutations committed by the write coordinator.',
+         metrics['jobs']),
+        ('crm_writer_failed_jobs_total', 'counter', 'Mutations rolled back to their savepoint.',
+         metrics['failed_jobs']),
+        ('crm_writer_failed_groups_total', 'counter', 'Groups whose transaction failed as a whole.',
+         metrics['failed_groups']),
+        ('crm_writer_last_group_size', 'gauge', 'Mutations in the last committed group.',
+         metrics['last_group_size']),
+    ]
+    for name, kind, help_text, value in series:
+        yield f'# HELP {name} {help_text}'
+        yield f'# TYPE {name} {kind}'
+        yield f'{name} {value}'
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(_scheduler_lines())
+    lines.extend(_writer_lines())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    if METRICS_TOKEN:
+        allowed = request.headers.get('Authorization') == f'Bearer {METRICS_TOKEN}'
+    else:
+        allowed = session.get('role') == 'Admin'
+    if not allowed:
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+def _before_request():
+    g.request_started = time.perf_counter()
+    g.sql_statements = collections.Counter()
+    g.sql_seconds = 0.0
+    if PROFILING_ENABLED and (request.args.get('_profile') == '1' or request.headers.get('X-Profile') == '1'):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _after_request(response):
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    endpoint = request.endpoint or 'unknown'
+    request_duration.observe(elapsed, endpoint, request.method, str(response.status_code))
+
+    repeated = {sql: n for sql, n in g.get('sql_statements', {}).items() if n >= N_PLUS_ONE_THRESHOLD}
+    if repeated:
+        sql_repeated.inc(endpoint, amount=len(repeated))
+        for sql, n in repeated.items():
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", endpoint, n, sql)
+
+    response.headers['Server-Timing'] = (f"db;dur={g.get('sql_seconds', 0.0) * 1000:.2f}, "
+                                         f"total;dur={elapsed * 1000:.2f}")
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f'{endpoint}-{int(time.time() * 1000)}.prof')
+        profiler.dump_stats(path)
+        response.headers['X-Profile-File'] = path
+    return response
+
+
+def init_app(app):
+    """Time every request, observe every SQL statement and serve /metrics."""
+    if _observe_query not in database.query_observers:
+        database.query_observers.append(_observe_query)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
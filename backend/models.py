@@ -1,140 +1,482 @@
-from .database import get_db_connection
-from datetime import datetime, timedelta
+from .database import (get_db_connection, open_db_connection, bump_data_version, get_data_version,
+                       due_epoch_sql, FOLLOWUP_EPOCH_SQL)
+from . import archive
+from .cache import TTLCache
+from .events import publish
+from .users import user_directory
+from .writer import write_coordinator
+from datetime import date, datetime, timedelta
+import base64
+import calendar
+import json
+
+# Page sizes for the follow-up list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Allowed values for follow-up fields
+FOLLOWUP_TYPES = ('Call', 'Meeting', 'Visit', 'Task')
+PRIORITIES = ('Low', 'Medium', 'High')
+STATUSES = ('Completed', 'Pending', 'Rescheduled', 'Missed')
+
+# Rows per transaction for bulk writes
+BULK_CHUNK_SIZE = 1000
+
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+# Dashboard list sizes and cache lifetime. Entries are keyed on the data
+# version, so a write by any process sharing the database retires them; the
+# TTL keeps the "next 24h" window moving.
+DASHBOARD_UPCOMING_LIMIT = 20
+DASHBOARD_MISSED_LIMIT = 20
+DASHBOARD_CACHE_TTL = 30
+
+_dashboard_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL)
+
+# Longest date range a team report may cover
+TEAM_REPORT_MAX_DAYS = 3660
+
+# Closed days the background job rolls up once a day, counting back from yesterday
+TEAM_ROLLUP_LOOKBACK_DAYS = 31
+
+# Calendar bucket sizes in seconds, and the longest range (days) each may cover
+CALENDAR_BUCKETS = {'day': 86400, 'hour': 3600}
+CALENDAR_MAX_DAYS = {'day': 366, 'hour': 31}
+
+# Rows returned with a calendar; past this the response is marked truncated
+CALENDAR_MAX_ROWS = 1000
+
+# Open follow-ups of one assignee due closer together than this conflict
+SCHEDULE_CONFLICT_MINUTES = 30
+SCHEDULE_CONFLICT_LIMIT = 20
+OPEN_STATUSES = ('Pending', 'Rescheduled')
+
+# Sort keys accepted by get_followups_page; all are keyset-paginated on (followup_datetime, id)
+SORT_KEYS = {
+    'followup_datetime': 'ASC',
+    '-followup_datetime': 'DESC',
+}
+
+
+# Callbacks run after a write that may move the next missed-followup deadline
+schedule_listeners = []
+
+
+def invalidate_dashboard_cache():
+    _dashboard_cache.invalidate()
+
+
+def _schedule_changed():
+    for listener in schedule_listeners:
+        listener()
+
+
+def _after_write(event_type, rows, reschedule=False, **fields):
+    """Run once a write has committed.
+
+    Drops cached dashboards, wakes the missed-followup scheduler when
+    deadlines may have moved, and publishes a change event for the
+    (followup_id, assigned_to) rows touched.
+    """
+    invalidate_dashboard_cache()
+    if reschedule:
+        _schedule_changed()
+    publish(event_type, rows, **fields)
+
+
+def _insert_followup(cursor, lead_id, customer_id, followup_type, followup_datetime,
+                     priority, assigned_to, notes, user_id):
+    now = datetime.now().isoformat()
+    cursor.execute("""
+        INSERT INTO follow_ups (
+            lead_id, customer_id, followup_type, followup_datetime,
+            priority, status, assigned_to, notes, created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, 'Pending', ?, ?, ?, ?)
+    """, (
+        lead_id, customer_id, followup_type, followup_datetime,
+        priority, assigned_to, notes, now, now
+    ))
+
+    followup_id = cursor.lastrowid
+
+    cursor.execute("""
+        INSERT INTO followup_history
+        (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        followup_id,
+        'Created',
+        'Follow-up created',
+        now,
+        user_id
+    ))
+
+    bump_data_version(cursor)
+    return followup_id, _schedule_conflicts(cursor, followup_id, followup_datetime, assigned_to)
 
 
 def add_followup(lead_id, customer_id, followup_type, followup_datetime,
                  priority, assigned_to, notes, user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Returns (followup_id, conflicts); see _schedule_conflicts.
+
+    Raises ValueError for a due time that is not an ISO datetime.
+    """
+    followup_datetime = normalize_followup_datetime(followup_datetime)
+    followup_id, conflicts = write_coordinator.run(
+        _insert_followup, lead_id, customer_id, followup_type, followup_datetime,
+        priority, assigned_to, notes, user_id
+    )
+    _after_write('followup.created', [(followup_id, assigned_to)], reschedule=True)
+    return followup_id, conflicts
+
+
+def _schedule_conflicts(cursor, followup_id, followup_datetime, assigned_to):
+    """Other open follow-ups of the assignee due within SCHEDULE_CONFLICT_MINUTES.
+
+    Runs in the write's transaction, so it sees the row as just written. The
+    due time is converted by SQLite with the indexed expression, which makes
+    this a short range scan of idx_follow_ups_assignee_epoch.
+    """
+    window = SCHEDULE_CONFLICT_MINUTES * 60
+    cursor.execute(f"""
+        SELECT id, lead_id, customer_id, followup_type, followup_datetime, status
+        FROM follow_ups
+        WHERE assigned_to = ?
+          AND {FOLLOWUP_EPOCH_SQL} > {due_epoch_sql('?')} - ?
+          AND {FOLLOWUP_EPOCH_SQL} < {due_epoch_sql('?')} + ?
+          AND status IN ({', '.join('?' * len(OPEN_STATUSES))}) AND id != ?
+        ORDER BY {FOLLOWUP_EPOCH_SQL}
+        LIMIT ?
+    """, (assigned_to, followup_datetime, window, followup_datetime, window,
+          *OPEN_STATUSES, followup_id, SCHEDULE_CONFLICT_LIMIT))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def access_scope(user_id, user_role):
+    """The assignee a user's reads and writes are limited to; None for Admins."""
+    return None if user_role == 'Admin' else user_id
+
+
+def _update_followup(cursor, followup_id, lead_id, customer_id, followup_type,
+                     followup_datetime, priority, assigned_to, notes, user_id, scope_user_id):
+    """Returns (previous assignee, conflicts), or None if nothing matched."""
     now = datetime.now().isoformat()
-    status = 'Pending'
+    sql = "SELECT assigned_to, status FROM follow_ups WHERE id = ?"
+    params = [followup_id]
+    if scope_user_id is not None:
+        sql += " AND assigned_to = ?"
+        params.append(scope_user_id)
+    cursor.execute(sql, params)
+    previous = cursor.fetchone()
+    if previous is None:
+        return None
 
-    try:
-        cursor.execute("""
-            INSERT INTO follow_ups (
-                lead_id, customer_id, followup_type, followup_datetime,
-                priority, status, assigned_to, notes, created_at, updated_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            lead_id, customer_id, followup_type, followup_datetime,
-            priority, status, assigned_to, notes, now, now
-        ))
+    cursor.execute("""
+        UPDATE follow_ups
+        SET lead_id = ?, customer_id = ?, followup_type = ?,
+            followup_datetime = ?, priority = ?, assigned_to = ?,
+            notes = ?, updated_at = ?
+        WHERE id = ?
+    """, (
+        lead_id, customer_id, followup_type,
+        followup_datetime, priority, assigned_to,
+        notes, now, followup_id
+    ))
 
-        followup_id = cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO followup_history
+        (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        followup_id,
+        'Updated',
+        'Follow-up updated',
+        now,
+        user_id
+    ))
 
-        cursor.execute("""
-            INSERT INTO followup_history
-            (followup_id, action, remarks, action_date, acted_by)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            followup_id,
-            'Created',
-            'Follow-up created',
-            now,
-            user_id
-        ))
-
-        conn.commit()
-        return followup_id
-
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    bump_data_version(cursor)
+    conflicts = []
+    if previous['status'] in OPEN_STATUSES:
+        conflicts = _schedule_conflicts(cursor, followup_id, followup_datetime, assigned_to)
+    return previous['assigned_to'], conflicts
 
 
 def update_followup(followup_id, lead_id, customer_id, followup_type,
-                    followup_datetime, priority, assigned_to, notes, user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+                    followup_datetime, priority, assigned_to, notes, user_id,
+                    scope_user_id=None):
+    """Update one follow-up; returns (updated, conflicts).
+
+    `updated` is False if it does not exist or is out of scope. The
+    ownership check and the write share one transaction, so there is no
+    separate permission query. Raises ValueError for a due time that is
+    not an ISO datetime.
+    """
+    followup_datetime = normalize_followup_datetime(followup_datetime)
+    result = write_coordinator.run(
+        _update_followup, followup_id, lead_id, customer_id, followup_type,
+        followup_datetime, priority, assigned_to, notes, user_id, scope_user_id
+    )
+    if result is None:
+        return False, []
+    previous_assignee, conflicts = result
+    rows = [(followup_id, assigned_to)]
+    if previous_assignee != assigned_to:
+        rows.append((followup_id, previous_assignee))  # so the old assignee drops it
+    _after_write('followup.updated', rows, reschedule=True)
+    return True, conflicts
+
+
+def update_followup_status(followup_id, new_status, user_id, remarks="", scope_user_id=None):
+    """Returns False if the follow-up does not exist or is out of scope."""
+    return bool(update_followups_status([followup_id], new_status, user_id, remarks, scope_user_id))
+
+
+def _update_statuses(cursor, followup_ids, new_status, user_id, remarks, scope_user_id):
     now = datetime.now().isoformat()
+    updated = []
+    for chunk in _chunks(followup_ids, BULK_CHUNK_SIZE):
+        sql = f"SELECT id, assigned_to FROM follow_ups WHERE id IN ({', '.join('?' * len(chunk))})"
+        params = list(chunk)
+        if scope_user_id is not None:
+            sql += " AND assigned_to = ?"
+            params.append(scope_user_id)
+        cursor.execute(sql, params)
+        updated.extend((row['id'], row['assigned_to']) for row in cursor.fetchall())
+
+    cursor.executemany("""
+        UPDATE follow_ups
+        SET status = ?, updated_at = ?
+        WHERE id = ?
+    """, [(new_status, now, followup_id) for followup_id, _ in updated])
 
+    cursor.executemany("""
+        INSERT INTO followup_history
+        (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(followup_id, new_status, remarks, now, user_id) for followup_id, _ in updated])
+
+    if updated:
+        bump_data_version(cursor)
+    return updated
+
+
+def update_followups_status(followup_ids, new_status, user_id, remarks="", scope_user_id=None):
+    """Set the status of many follow-ups in one transaction.
+
+    Each updated row gets its own history entry. With scope_user_id only
+    rows assigned to that user are touched. Returns the ids updated.
+    """
+    updated = write_coordinator.run(_update_statuses, list(dict.fromkeys(followup_ids)),
+                                    new_status, user_id, remarks, scope_user_id)
+    if updated:
+        _after_write('followup.status', updated, reschedule=new_status == 'Pending',
+                     status=new_status)
+    return [followup_id for followup_id, _ in updated]
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def normalize_followup_datetime(value):
+    """A due time in the one form follow_ups stores: local YYYY-MM-DDTHH:MM[:SS].
+
+    Due times are compared as text (missed sweep, keyset cursors, daily
+    counters), which only matches time order when every row has this form.
+    Offsets are converted to this server's local time and dropped, as are
+    fractions of a second. Raises ValueError for anything else.
+    """
     try:
-        cursor.execute("""
-            UPDATE follow_ups
-            SET lead_id = ?, customer_id = ?, followup_type = ?,
-                followup_datetime = ?, priority = ?, assigned_to = ?,
-                notes = ?, updated_at = ?
-            WHERE id = ?
-        """, (
-            lead_id, customer_id, followup_type,
-            followup_datetime, priority, assigned_to,
-            notes, now, followup_id
-        ))
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid followup_datetime: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat(timespec='seconds' if parsed.second else 'minutes')
 
-        cursor.execute("""
-            INSERT INTO followup_history
-            (followup_id, action, remarks, action_date, acted_by)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            followup_id,
-            'Updated',
-            'Follow-up updated',
-            now,
-            user_id
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
 
+def validate_followup(data, user_ids):
+    """Check one incoming follow-up row; returns a normalized dict or raises ValueError."""
+    try:
+        followup_type = data['followup_type']
+        followup_datetime = data['followup_datetime']
+        priority = data['priority']
+        assigned_to = data['assigned_to']
+    except KeyError as e:
+        raise ValueError(f'Missing required field: {e}')
+    lead_id = data.get('lead_id') or None
+    customer_id = data.get('customer_id') or None
 
-def update_followup_status(followup_id, new_status, user_id, remarks=""):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if not lead_id and not customer_id:
+        raise ValueError('Either lead_id or customer_id must be provided')
+    if followup_type not in FOLLOWUP_TYPES:
+        raise ValueError(f'Invalid followup_type: {followup_type}')
+    if priority not in PRIORITIES:
+        raise ValueError(f'Invalid priority: {priority}')
+    followup_datetime = normalize_followup_datetime(followup_datetime)
+    try:
+        assigned_to = int(assigned_to)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid assigned_to: {assigned_to}')
+    if assigned_to not in user_ids:
+        raise ValueError(f'Unknown user for assigned_to: {assigned_to}')
+
+    return {
+        'lead_id': lead_id,
+        'customer_id': customer_id,
+        'followup_type': followup_type,
+        'followup_datetime': followup_datetime,
+        'priority': priority,
+        'assigned_to': assigned_to,
+        'notes': data.get('notes') or None,
+    }
+
+
+def get_user_ids():
+    return user_directory.ids()
+
+
+def _insert_followups(cursor, followups, user_id):
     now = datetime.now().isoformat()
+    # Ids are reserved under the group's write lock so both tables can be
+    # filled with executemany
+    cursor.execute("""
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'follow_ups'), 0),
+            COALESCE((SELECT MAX(id) FROM follow_ups), 0)
+        )
+    """)
+    first_id = cursor.fetchone()[0] + 1
+    ids = list(range(first_id, first_id + len(followups)))
 
-    try:
-        cursor.execute("""
-            UPDATE follow_ups
-            SET status = ?, updated_at = ?
-            WHERE id = ?
-        """, (new_status, now, followup_id))
+    cursor.executemany("""
+        INSERT INTO follow_ups (
+            id, lead_id, customer_id, followup_type, followup_datetime,
+            priority, status, assigned_to, notes, created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, 'Pending', ?, ?, ?, ?)
+    """, [
+        (followup_id, f['lead_id'], f['customer_id'], f['followup_type'],
+         f['followup_datetime'], f['priority'], f['assigned_to'], f['notes'], now, now)
+        for followup_id, f in zip(ids, followups)
+    ])
 
-        cursor.execute("""
-            INSERT INTO followup_history
-            (followup_id, action, remarks, action_date, acted_by)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            followup_id,
-            new_status,
-            remarks,
-            now,
-            user_id
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    cursor.executemany("""
+        INSERT INTO followup_history
+        (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, 'Created', 'Follow-up created', ?, ?)
+    """, [(followup_id, now, user_id) for followup_id in ids])
+
+    bump_data_version(cursor)
+    return ids
+
+
+def bulk_add_followups(followups, user_id):
+    """Insert validated follow-ups and their 'Created' history rows in one transaction.
+
+    Returns the new ids in input order.
+    """
+    if not followups:
+        return []
+    ids = write_coordinator.run(_insert_followups, followups, user_id)
+    _after_write('followup.created', [(followup_id, f['assigned_to'])
+                                      for followup_id, f in zip(ids, followups)], reschedule=True)
+    return ids
 
 
-def get_followup_history(followup_id):
+def get_next_missed_deadline():
+    """Earliest followup_datetime still Pending, or None."""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute("SELECT MIN(followup_datetime) FROM follow_ups WHERE status = 'Pending'")
+    row = cursor.fetchone()
+    conn.close()
+    return row[0]
 
+
+def _mark_missed(cursor, batch_size, now):
     cursor.execute("""
-        SELECT fh.*, u.username AS acted_by_username
-        FROM followup_history fh
-        LEFT JOIN users u ON fh.acted_by = u.id
-        WHERE fh.followup_id = ?
-        ORDER BY fh.action_date DESC
-    """, (followup_id,))
+        SELECT id, assigned_to, followup_datetime
+        FROM follow_ups
+        WHERE status = 'Pending' AND followup_datetime < ?
+        ORDER BY followup_datetime
+        LIMIT ?
+    """, (now, batch_size))
+    due = cursor.fetchall()
+
+    cursor.executemany("""
+        UPDATE follow_ups
+        SET status = 'Missed', updated_at = ?
+        WHERE id = ? AND status = 'Pending'
+    """, [(now, row['id']) for row in due])
+
+    cursor.executemany("""
+        INSERT INTO followup_history
+        (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (row['id'], 'Missed', 'Automatically marked as missed', now, None)
+        for row in due
+    ])
+
+    if due:
+        bump_data_version(cursor)
+    return [dict(row) for row in due]
+
+
+def mark_missed_followups(batch_size, now=None):
+    """Mark one batch of overdue Pending follow-ups as Missed.
+
+    The status change and the matching 'Missed' history rows are written in
+    the same transaction. Returns (number marked, oldest due datetime in the
+    batch or None).
+    """
+    due = write_coordinator.run(_mark_missed, batch_size, now or datetime.now().isoformat())
+    if due:
+        _after_write('followup.status', [(row['id'], row['assigned_to']) for row in due],
+                     status='Missed')
+        return len(due), due[0]['followup_datetime']
+    return 0, None
+
+
+def get_followup_history(followup_id, scope_user_id=None):
+    """History of one follow-up, newest first.
+
+    Returns None if the follow-up does not exist or is out of scope; the
+    access check is part of the same query. A follow-up missing from the
+    hot tables is looked up in the archive directory before giving up.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    sql = """
+        SELECT fh.*
+        FROM follow_ups f
+        LEFT JOIN followup_history fh ON fh.followup_id = f.id
+        WHERE f.id = ?
+    """
+    params = [followup_id]
+    if scope_user_id is not None:
+        sql += " AND f.assigned_to = ?"
+        params.append(scope_user_id)
+    cursor.execute(sql + " ORDER BY fh.action_date DESC", params)
 
     rows = cursor.fetchall()
+    if not rows:
+        if not archive.is_archived(cursor, followup_id, scope_user_id):
+            conn.close()
+            return None
+        archive.attach(conn)
+        cursor.execute("SELECT * FROM archive.followup_history WHERE followup_id = ? ORDER BY action_date DESC",
+                       (followup_id,))
+        rows = cursor.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
+    return user_directory.annotate([dict(row) for row in rows if row['id'] is not None],
+                                   'acted_by', 'acted_by_username')
 
 
 def get_all_followups(user_id, user_role):
@@ -143,23 +485,146 @@ def get_all_followups(user_id, user_role):
 
     if user_role == 'Admin':
         cursor.execute("""
-            SELECT f.*, u.username AS assigned_username
+            SELECT f.*
             FROM follow_ups f
-            JOIN users u ON f.assigned_to = u.id
             ORDER BY f.followup_datetime
         """)
     else:
         cursor.execute("""
-            SELECT f.*, u.username AS assigned_username
+            SELECT f.*
             FROM follow_ups f
-            JOIN users u ON f.assigned_to = u.id
             WHERE f.assigned_to = ?
             ORDER BY f.followup_datetime
         """, (user_id,))
 
     rows = cursor.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
+    return user_directory.annotate([dict(row) for row in rows], 'assigned_to', 'assigned_username')
+
+
+def _encode(values):
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        first, second = json.loads(raw)
+        return first, second
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def encode_cursor(followup_datetime, followup_id):
+    return _encode([followup_datetime, followup_id])
+
+
+def decode_cursor(cursor):
+    followup_datetime, followup_id = _decode(cursor)
+    try:
+        return str(followup_datetime), int(followup_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def get_followups_page(user_id, user_role, filters=None, sort='followup_datetime',
+                       limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Return one page of follow-ups and the cursor for the next page.
+
+    Pages are keyed on (followup_datetime, id) rather than OFFSET, so the
+    cost of a page does not depend on how deep into the list it is.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f'Invalid sort key: {sort}')
+    direction = SORT_KEYS[sort]
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    filters = filters or {}
+
+    where = []
+    params = []
+    if user_role != 'Admin':
+        where.append("f.assigned_to = ?")
+        params.append(user_id)
+    for column in ('status', 'followup_type', 'priority', 'assigned_to'):
+        if filters.get(column) not in (None, ''):
+            where.append(f"f.{column} = ?")
+            params.append(filters[column])
+    match = fts_query(filters.get('search'))
+    if match:
+        where.append("f.id IN (SELECT rowid FROM follow_ups_fts WHERE follow_ups_fts MATCH ?)")
+        params.append(match)
+    if cursor:
+        after = decode_cursor(cursor)
+        where.append(f"(f.followup_datetime, f.id) {'>' if direction == 'ASC' else '<'} (?, ?)")
+        params.extend(after)
+
+    sql = "SELECT f.* FROM follow_ups f"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY f.followup_datetime {direction}, f.id {direction} LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    cursor_ = conn.cursor()
+    cursor_.execute(sql, params)
+    rows = [dict(row) for row in cursor_.fetchall()]
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['followup_datetime'], rows[-1]['id'])
+    user_directory.annotate(rows, 'assigned_to', 'assigned_username')
+    return rows, next_cursor
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    terms = (text or '').replace('"', ' ').split()
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_followups(user_id, user_role, text, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Ranked full-text search over notes, lead_id and customer_id.
+
+    Results are ordered by bm25 relevance and paged with a (rank, id)
+    keyset cursor. Returns (rows, next_cursor).
+    """
+    match = fts_query(text)
+    if not match:
+        return [], None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    sql = """
+        SELECT f.*, bm25(follow_ups_fts) AS rank
+        FROM follow_ups_fts
+        JOIN follow_ups f ON f.id = follow_ups_fts.rowid
+        WHERE follow_ups_fts MATCH ?
+    """
+    params = [match]
+    if user_role != 'Admin':
+        sql += " AND f.assigned_to = ?"
+        params.append(user_id)
+    if cursor:
+        after_rank, after_id = _decode(cursor)
+        sql += " AND (bm25(follow_ups_fts), f.id) > (?, ?)"
+        params.extend([float(after_rank), int(after_id)])
+    sql += " ORDER BY rank, f.id LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    cursor_ = conn.cursor()
+    cursor_.execute(sql, params)
+    rows = [dict(row) for row in cursor_.fetchall()]
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode([rows[-1]['rank'], rows[-1]['id']])
+    user_directory.annotate(rows, 'assigned_to', 'assigned_username')
+    return rows, next_cursor
 
 
 def get_followup_by_id(followup_id, user_id, user_role):
@@ -168,25 +633,31 @@ def get_followup_by_id(followup_id, user_id, user_role):
 
     if user_role == 'Admin':
         cursor.execute("""
-            SELECT f.*, u.username AS assigned_username
+            SELECT f.*
             FROM follow_ups f
-            JOIN users u ON f.assigned_to = u.id
             WHERE f.id = ?
         """, (followup_id,))
     else:
         cursor.execute("""
-            SELECT f.*, u.username AS assigned_username
+            SELECT f.*
             FROM follow_ups f
-            JOIN users u ON f.assigned_to = u.id
             WHERE f.id = ? AND f.assigned_to = ?
         """, (followup_id, user_id))
 
     row = cursor.fetchone()
     conn.close()
-    return dict(row) if row else None
+    if row is None:
+        return None
+    return user_directory.annotate([dict(row)], 'assigned_to', 'assigned_username')[0]
 
 
-def get_dashboard_data(user_id, user_role):
+def get_dashboard_data(user_id, user_role, upcoming_limit=DASHBOARD_UPCOMING_LIMIT,
+                       missed_limit=DASHBOARD_MISSED_LIMIT):
+    key = (user_id, user_role, upcoming_limit, missed_limit, get_data_version())
+    cached = _dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -194,55 +665,418 @@ def get_dashboard_data(user_id, user_role):
     now_str = now.isoformat()
     next_24h = (now + timedelta(hours=24)).isoformat()
 
-    base = """
-        SELECT f.*, u.username AS assigned_username
-        FROM follow_ups f
-        JOIN users u ON f.assigned_to = u.id
-    """
-
+    scope = ""
+    counts_scope = ""
     params = ()
     if user_role != 'Admin':
-        base += " WHERE f.assigned_to = ?"
+        scope = " AND f.assigned_to = ?"
+        counts_scope = " AND assigned_to = ?"
         params = (user_id,)
 
-    cursor.execute(base + " AND f.status = 'Pending'", params)
-    pending = [dict(r) for r in cursor.fetchall()]
+    # Counts come from the trigger-maintained counters, not from follow_ups
+    cursor.execute(f"""
+        SELECT status, SUM(total) AS total
+        FROM followup_counters
+        WHERE total != 0{counts_scope}
+        GROUP BY status
+    """, params)
+    counts = {row['status']: row['total'] for row in cursor.fetchall()}
 
-    cursor.execute(
-        base + " AND f.status = 'Pending' AND f.followup_datetime BETWEEN ? AND ?",
-        params + (now_str, next_24h)
-    )
+    # Only the bounded lists are materialized
+    cursor.execute(f"""
+        SELECT f.*
+        FROM follow_ups f
+        WHERE f.status = 'Pending' AND f.followup_datetime BETWEEN ? AND ?{scope}
+        ORDER BY f.followup_datetime
+        LIMIT ?
+    """, (now_str, next_24h) + params + (upcoming_limit,))
     upcoming = [dict(r) for r in cursor.fetchall()]
 
-    cursor.execute(base + " AND f.status = 'Missed'", params)
+    cursor.execute(f"""
+        SELECT f.*
+        FROM follow_ups f
+        WHERE f.status = 'Missed'{scope}
+        ORDER BY f.followup_datetime DESC
+        LIMIT ?
+    """, params + (missed_limit,))
     missed = [dict(r) for r in cursor.fetchall()]
 
     conn.close()
+    user_directory.annotate(upcoming + missed, 'assigned_to', 'assigned_username')
 
-    return {
-        "pending": pending,
+    data = {
         "upcoming": upcoming,
         "missed": missed,
-        "pending_count": len(pending),
-        "missed_count": len(missed)
+        "status_counts": counts,
+        "pending_count": counts.get('Pending', 0),
+        "missed_count": counts.get('Missed', 0)
     }
+    _dashboard_cache.set(key, data)
+    return data
+
 
+def get_status_counts(day_from=None, day_to=None):
+    """Follow-up counts per assignee and status, from the counter tables.
 
-def get_lead_customer_history(identifier_type, identifier_value):
+    With day_from/day_to (inclusive YYYY-MM-DD bounds on the due date) the
+    daily counters are summed instead; the cost depends on the number of
+    buckets, never on the number of follow-ups.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    if day_from is None and day_to is None:
+        cursor.execute("""
+            SELECT assigned_to, status, total
+            FROM followup_counters
+            WHERE total != 0
+        """)
+    else:
+        cursor.execute("""
+            SELECT assigned_to, status, SUM(total) AS total
+            FROM followup_daily_counters
+            WHERE day BETWEEN ? AND ?
+            GROUP BY assigned_to, status
+            HAVING SUM(total) != 0
+        """, (day_from or '0000-00-00', day_to or '9999-99-99'))
+
+    rows = cursor.fetchall()
+    conn.close()
+    counts = user_directory.annotate([dict(row) for row in rows], 'assigned_to', 'assigned_username')
+    counts.sort(key=lambda r: (r['assigned_username'] or '', r['status']))
+    return counts
+
+
+# --- Calendar ---
+def to_epoch(day):
+    """Seconds since 1970 at the start of a YYYY-MM-DD day, matching FOLLOWUP_EPOCH_SQL."""
+    return calendar.timegm(date.fromisoformat(day).timetuple())
+
+
+def _bucket_start(epoch, size):
+    start = datetime(1970, 1, 1) + timedelta(seconds=epoch - epoch % size)
+    return start.date().isoformat() if size == CALENDAR_BUCKETS['day'] else start.isoformat(timespec='minutes')
+
+
+def _equals(**columns):
+    """' AND column = ?' for each value that is not None, with the parameters."""
+    columns = {column: value for column, value in columns.items() if value is not None}
+    return ''.join(f" AND {column} = ?" for column in columns), list(columns.values())
+
+
+def get_calendar(day_from, day_to, bucket='day', assignee=None, status=None,
+                 count_scope=None, with_rows=False, row_scope=None):
+    """Follow-ups due from day_from to day_to inclusive, bucketed by day or hour.
+
+    Each non-empty bucket has its count, split by status and by assignee.
+    Buckets, bounds and row placement all use the due time's wall-clock
+    day and hour (FOLLOWUP_EPOCH_SQL), the days the daily counters use.
+    Day counts are summed from followup_daily_counters; hour counts are a
+    range scan of the numeric due-time index. With with_rows the follow-ups
+    themselves are listed under their buckets, in due order, up to
+    CALENDAR_MAX_ROWS. count_scope and row_scope limit counts and rows to
+    one assignee (None: everyone); assignee narrows both.
+    """
+    size = CALENDAR_BUCKETS[bucket]
+    start, end = to_epoch(day_from), to_epoch(_next_day(day_to))
+
+    filters, params = _equals(assigned_to=assignee, status=status)
+    if count_scope is not None:
+        filters += " AND assigned_to = ?"
+        params.append(count_scope)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if bucket == 'day':
+        cursor.execute(f"""
+            SELECT day AS bucket, assigned_to, status, SUM(total) AS total
+            FROM followup_daily_counters
+            WHERE day BETWEEN ? AND ?{filters}
+            GROUP BY day, assigned_to, status
+            HAVING SUM(total) != 0
+        """, [day_from, day_to] + params)
+    else:
+        cursor.execute(f"""
+            SELECT {FOLLOWUP_EPOCH_SQL} / {size} AS bucket, assigned_to, status, COUNT(*) AS total
+            FROM follow_ups
+            WHERE {FOLLOWUP_EPOCH_SQL} >= ? AND {FOLLOWUP_EPOCH_SQL} < ?{filters}
+            GROUP BY 1, assigned_to, status
+        """, [start, end] + params)
+    counts = cursor.fetchall()
+
+    buckets = {}
+    for row in counts:
+        key = row['bucket'] if bucket == 'day' else _bucket_start(row['bucket'] * size, size)
+        entry = buckets.setdefault(key, {'start': key, 'count': 0, 'by_status': {}, 'by_assignee': {}})
+        entry['count'] += row['total']
+        entry['by_status'][row['status']] = entry['by_status'].get(row['status'], 0) + row['total']
+        entry['by_assignee'][row['assigned_to']] = entry['by_assignee'].get(row['assigned_to'], 0) + row['total']
+
+    truncated = False
+    if with_rows:
+        row_filters, row_params = _equals(assigned_to=assignee, status=status)
+        if row_scope is not None:
+            row_filters += " AND assigned_to = ?"
+            row_params.append(row_scope)
+        cursor.execute(f"""
+            SELECT *, {FOLLOWUP_EPOCH_SQL} AS due_epoch
+            FROM follow_ups
+            WHERE {FOLLOWUP_EPOCH_SQL} >= ? AND {FOLLOWUP_EPOCH_SQL} < ?{row_filters}
+            ORDER BY {FOLLOWUP_EPOCH_SQL}, id
+            LIMIT ?
+        """, [start, end] + row_params + [CALENDAR_MAX_ROWS + 1])
+        rows = [dict(r) for r in cursor.fetchall()]
+        truncated = len(rows) > CALENDAR_MAX_ROWS
+        rows = user_directory.annotate(rows[:CALENDAR_MAX_ROWS], 'assigned_to', 'assigned_username')
+        for row in rows:
+            entry = buckets.get(_bucket_start(row.pop('due_epoch'), size))
+            if entry is not None:
+                entry.setdefault('items', []).append(row)
+    conn.close()
+
+    result = []
+    for key in sorted(buckets):
+        entry = buckets[key]
+        entry['by_assignee'] = user_directory.annotate(
+            [{'assigned_to': user, 'total': total} for user, total in sorted(entry['by_assignee'].items())],
+            'assigned_to', 'assigned_username')
+        if with_rows:
+            entry.setdefault('items', [])
+        result.append(entry)
+    return {'buckets': result, 'truncated': truncated}
+
+
+# --- Team report ---
+# One set-based pass over the history actions in [start, end), per assignee
+# (and per day when rolling up). Attribution is to the follow-up's assignee.
+_TEAM_REPORT_SQL = """
+    SELECT {day}f.assigned_to,
+           SUM(fh.action = 'Completed') AS completed,
+           SUM(fh.action = 'Missed') AS missed,
+           SUM(fh.action = 'Rescheduled') AS rescheduled,
+           TOTAL(CASE WHEN fh.action = 'Completed'
+                      THEN (julianday(fh.action_date) - julianday(f.created_at)) * 24 END) AS completion_hours
+    FROM followup_history fh
+    JOIN follow_ups f ON f.id = fh.followup_id
+    WHERE fh.action IN ('Completed', 'Missed', 'Rescheduled')
+      AND fh.action_date >= ? AND fh.action_date < ?
+    GROUP BY {group}f.assigned_to
+"""
+
+
+def _days(first, last):
+    day = date.fromisoformat(first)
+    while day.isoformat() <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def _next_day(day):
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def _runs(days):
+    """[first, last] of each run of consecutive days in a sorted list."""
+    runs = []
+    for day in days:
+        if runs and _next_day(runs[-1][1]) == day:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def roll_up_team_days(cursor, days):
+    """Store per-day totals for those of the given closed days not rolled up yet.
+
+    Runs inside the caller's write transaction (the writer, or the
+    archiver before it moves history away). Days already rolled up are
+    never recomputed, since their history may have been archived since.
+    """
+    placeholders = ', '.join('?' * len(days))
+    cursor.execute(f"SELECT day FROM team_rollup_days WHERE day IN ({placeholders})", days)
+    done = {row['day'] for row in cursor.fetchall()}
+    for first, last in _runs([day for day in days if day not in done]):
+        cursor.execute("DELETE FROM team_daily_rollups WHERE day BETWEEN ? AND ?", (first, last))
+        cursor.execute(f"""
+            INSERT INTO team_daily_rollups
+                (day, assigned_to, completed, missed, rescheduled, completion_hours)
+            {_TEAM_REPORT_SQL.format(day="substr(fh.action_date, 1, 10) AS day, ", group="day, ")}
+        """, (first, _next_day(last)))
+        cursor.executemany("INSERT OR IGNORE INTO team_rollup_days (day) VALUES (?)",
+                           [(day,) for day in _days(first, last)])
+
+
+def roll_up_closed_days(days=TEAM_ROLLUP_LOOKBACK_DAYS):
+    """Store rollups for the `days` closed days up to yesterday that have none yet.
+
+    Run by the missed-followup scheduler's leader once a day and by
+    `python -m backend.cli team roll-up`, never by a request.
+    """
+    yesterday = date.today() - timedelta(days=1)
+    first = (yesterday - timedelta(days=days - 1)).isoformat()
+    write_coordinator.run(roll_up_team_days, list(_days(first, yesterday.isoformat())))
+
+
+def get_team_report(day_from, day_to):
+    """Completion, miss and reschedule figures per assignee for actions in [day_from, day_to].
+
+    Closed days are read from team_daily_rollups. Days not rolled up yet,
+    and today, are computed from followup_history, one grouped query per
+    run of such days; the report itself only reads.
+    """
+    today = date.today().isoformat()
+    totals = {}
+
+    def add(row):
+        entry = totals.setdefault(row['assigned_to'], {
+            'completed': 0, 'missed': 0, 'rescheduled': 0, 'completion_hours': 0.0})
+        for field in entry:
+            entry[field] += row[field]
+
+    closed_to = min(day_to, (date.fromisoformat(today) - timedelta(days=1)).isoformat())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if day_from <= closed_to:
+            cursor.execute("SELECT day FROM team_rollup_days WHERE day BETWEEN ? AND ?",
+                           (day_from, closed_to))
+            rolled_up = {row['day'] for row in cursor.fetchall()}
+            for first, last in _runs([day for day in _days(day_from, closed_to) if day not in rolled_up]):
+                cursor.execute(_TEAM_REPORT_SQL.format(day='', group=''), (first, _next_day(last)))
+                for row in cursor.fetchall():
+                    add(row)
+            cursor.execute("""
+                SELECT assigned_to, SUM(completed) AS completed, SUM(missed) AS missed,
+                       SUM(rescheduled) AS rescheduled, SUM(completion_hours) AS completion_hours
+                FROM team_daily_rollups
+                WHERE day BETWEEN ? AND ?
+                GROUP BY assigned_to
+            """, (day_from, closed_to))
+            for row in cursor.fetchall():
+                add(row)
+
+        if day_to >= today:
+            cursor.execute(_TEAM_REPORT_SQL.format(day='', group=''), (max(day_from, today), _next_day(day_to)))
+            for row in cursor.fetchall():
+                add(row)
+    finally:
+        conn.close()
+
+    report = []
+    for assigned_to, entry in totals.items():
+        decided = entry['completed'] + entry['missed']
+        user = user_directory.get(assigned_to)
+        report.append({
+            'assigned_to': assigned_to,
+            'username': user['username'] if user else None,
+            'role': user['role'] if user else None,
+            'completed': entry['completed'],
+            'missed': entry['missed'],
+            'rescheduled': entry['rescheduled'],
+            'completion_rate': entry['completed'] / decided if decided else None,
+            'miss_rate': entry['missed'] / decided if decided else None,
+            'avg_hours_to_complete': (entry['completion_hours'] / entry['completed']
+                                      if entry['completed'] else None),
+        })
+    report.sort(key=lambda r: (r['username'] or '', r['assigned_to']))
+    return report
+
+
+def _entity_history_sql(cursor, identifier_type, identifier_value, day_from, day_to, scope_user_id):
+    """(sql, params, needs archive) for a lead's or customer's history, newest first.
+
+    The archived tier is only UNIONed in when the archive directory has a
+    follow-up of this entity with history in the requested days.
+    """
     field = "lead_id" if identifier_type == "lead_id" else "customer_id"
+    where = [f"f.{field} = ?"]
+    params = [identifier_value]
+    if day_from:
+        where.append("fh.action_date >= ?")
+        params.append(day_from)
+    if day_to:
+        where.append("fh.action_date < ?")
+        params.append(_next_day(day_to))
+    if scope_user_id is not None:
+        where.append("f.assigned_to = ?")
+        params.append(scope_user_id)
+
+    tiers = ['main']
+    if archive.has_entity_history(cursor, field, identifier_value, day_from, day_to, scope_user_id):
+        tiers.append('archive')
+    sql = " UNION ALL ".join(f"""
+        SELECT fh.*
+        FROM {tier}.followup_history fh
+        JOIN {tier}.follow_ups f ON fh.followup_id = f.id
+        WHERE {' AND '.join(where)}
+    """ for tier in tiers)
+    return sql + " ORDER BY action_date DESC", params * len(tiers), len(tiers) > 1
 
-    cursor.execute(f"""
-        SELECT fh.*, u.username AS acted_by_username
-        FROM followup_history fh
-        JOIN follow_ups f ON fh.followup_id = f.id
-        LEFT JOIN users u ON fh.acted_by = u.id
-        WHERE f.{field} = ?
-        ORDER BY fh.action_date DESC
-    """, (identifier_value,))
+
+def get_lead_customer_history(identifier_type, identifier_value, day_from=None, day_to=None):
+    """History of every follow-up of a lead or customer, across both tiers.
+
+    day_from/day_to are inclusive YYYY-MM-DD bounds on the action date.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    sql, params, cold = _entity_history_sql(cursor, identifier_type, identifier_value,
+                                            day_from, day_to, None)
+    if cold:
+        archive.attach(conn)
+    cursor.execute(sql, params)
 
     rows = cursor.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
+    return user_directory.annotate([dict(row) for row in rows], 'acted_by', 'acted_by_username')
+
+
+def _iter_query(sql, params, batch_size, user_field=None, cold=False):
+    """Yield batches of row dicts from a dedicated connection, fetchmany at a time.
+
+    user_field is an (id column, name key) pair to resolve from the user
+    directory; cold attaches the archive first.
+    """
+    conn = open_db_connection()
+    try:
+        if cold:
+            archive.attach(conn)
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = [dict(row) for row in rows]
+            if user_field:
+                user_directory.annotate(batch, *user_field)
+            yield batch
+    finally:
+        conn.dispose()
+
+
+def iter_followups(user_id, user_role, batch_size=EXPORT_BATCH_SIZE):
+    """Stream every follow-up visible to the user, same scoping as get_all_followups."""
+    sql = "SELECT f.* FROM follow_ups f"
+    params = ()
+    if user_role != 'Admin':
+        sql += " WHERE f.assigned_to = ?"
+        params = (user_id,)
+    sql += " ORDER BY f.followup_datetime, f.id"
+    return _iter_query(sql, params, batch_size, ('assigned_to', 'assigned_username'))
+
+
+def iter_lead_customer_history(identifier_type, identifier_value, user_id, user_role,
+                               batch_size=EXPORT_BATCH_SIZE, day_from=None, day_to=None):
+    """Stream the history of a lead or customer, limited to follow-ups the user can see.
+
+    A generator like _iter_query: nothing touches the database until the
+    first next(), so async callers run the archive lookup on the SQLite thread.
+    """
+    conn = get_db_connection()
+    sql, params, cold = _entity_history_sql(conn.cursor(), identifier_type, identifier_value,
+                                            day_from, day_to, access_scope(user_id, user_role))
+    conn.close()
+    yield from _iter_query(sql, params, batch_size, ('acted_by', 'acted_by_username'), cold)
@@ -0,0 +1,112 @@
+"""Bounded-cost password hashing.
+
+Hashes are computed and checked on a small pool of PASSWORD_WORKERS
+threads, so a burst of logins costs at most that many cores per process
+however many request threads it arrives on. hashlib releases the GIL for
+scrypt and pbkdf2, so the pool runs alongside request threads rather than
+stalling them; a process pool would add no parallelism on top of that, only
+start-up cost and workers that re-import the app's entry points. At most PASSWORD_QUEUE_LIMIT checks may be queued or running
+per process; beyond that callers get PasswordPoolBusy at once instead of
+waiting in line.
+
+PASSWORD_HASH_METHOD is any werkzeug method string, e.g. "scrypt",
+"scrypt:16384:8:1" or "pbkdf2:sha256:600000". A successful check against
+a hash made with other parameters also returns a fresh hash, so stored
+hashes move to the configured cost as users log in.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.environ.get('CRM_PASSWORD_HASH_METHOD', 'scrypt')
+PASSWORD_WORKERS = int(os.environ.get('CRM_PASSWORD_WORKERS', min(2, os.cpu_count() or 1)))  # 0: inline
+PASSWORD_QUEUE_LIMIT = int(os.environ.get('CRM_PASSWORD_QUEUE', 16))
+PASSWORD_TIMEOUT = float(os.environ.get('CRM_PASSWORD_TIMEOUT', 5))
+
+
+class PasswordPoolBusy(Exception):
+    """The hashing pool is saturated; the request should be retried later."""
+
+
+def _method_prefix(pwhash):
+    return pwhash.split('$', 1)[0]
+
+
+_dummy_hash = None
+
+
+def configured_prefix():
+    """Method string as stored in hashes, e.g. "scrypt:32768:8:1" for "scrypt"."""
+    return _method_prefix(dummy_hash())
+
+
+def dummy_hash():
+    """A hash at the configured cost to check unknown usernames against, so they take as long as known ones."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = generate_password_hash(os.urandom(16).hex(), method=PASSWORD_HASH_METHOD)
+    return _dummy_hash
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _check(pwhash, password, method, prefix):
+    """(password ok, new hash if the stored one uses other parameters)."""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if _method_prefix(pwhash) != prefix:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class PasswordPool:
+    def __init__(self, workers=PASSWORD_WORKERS, queue_limit=PASSWORD_QUEUE_LIMIT, timeout=PASSWORD_TIMEOUT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        """(executor, slots) for this process; threads and their slots do not survive a fork."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password')
+                    self._slots = threading.BoundedSemaphore(self.queue_limit)
+                    self._pid = os.getpid()
+        return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise PasswordPoolBusy()
+
+    def hash(self, password):
+        return self._run(_hash, password, PASSWORD_HASH_METHOD)
+
+    def check(self, pwhash, password):
+        """(ok, upgraded hash or None); raises PasswordPoolBusy when saturated."""
+        return self._run(_check, pwhash, password, PASSWORD_HASH_METHOD, configured_prefix())
+
+
+password_pool = PasswordPool()
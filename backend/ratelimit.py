@@ -0,0 +1,103 @@
+"""Token-bucket rate limiting.
+
+A bucket holds up to `burst` tokens and refills at `rate` tokens a second;
+each attempt takes one. The memory backend is per process. With several
+worker processes set CRM_RATE_LIMIT_BACKEND=sqlite so they share buckets
+through a small SQLite file next to the database (CRM_RATE_LIMIT_DATABASE),
+kept apart from the main file so attempts never contend with data writes.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from . import database
+
+RATE_LIMIT_BACKEND = os.environ.get('CRM_RATE_LIMIT_BACKEND', 'memory')
+MAX_MEMORY_BUCKETS = 10000
+PRUNE_EVERY = 1000  # SQLite backend: drop long-idle buckets every this many attempts
+IDLE_SECONDS = 3600
+
+
+def _refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+class MemoryBuckets:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self._lock:
+            if len(self._buckets) >= MAX_MEMORY_BUCKETS:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < IDLE_SECONDS}
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            return tokens, allowed
+
+
+class SQLiteBuckets:
+    def __init__(self, path=None):
+        self._path = path
+        self._local = threading.local()
+        self._attempts = 0
+
+    @property
+    def path(self):
+        return (self._path or os.environ.get('CRM_RATE_LIMIT_DATABASE')
+                or f'{os.path.splitext(database.DATABASE)[0]}_ratelimit.db')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.key != (self.path, os.getpid()):
+            conn = sqlite3.connect(self.path, timeout=database.BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+            self._local.key = (self.path, os.getpid())
+        return conn
+
+    def take(self, key, rate, burst, now):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], now, rate, burst)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            self._attempts += 1
+            if self._attempts % PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return tokens, allowed
+
+
+class RateLimiter:
+    def __init__(self, backend=None):
+        self.backend = backend or (SQLiteBuckets() if RATE_LIMIT_BACKEND == 'sqlite' else MemoryBuckets())
+
+    def hit(self, key, rate, burst):
+        """Take a token from key's bucket; returns 0 if allowed, else seconds until one is available."""
+        tokens, allowed = self.backend.take(key, rate, burst, time.time())
+        return 0 if allowed else (1 - tokens) / rate
+
+
+rate_limiter = RateLimiter()
@@ -1,22 +1,42 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session
 from .auth import login_required, roles_required
+from .http_cache import conditional
+from .idempotency import idempotent
 from .models import (
-    add_followup, update_followup, update_followup_status,
-    get_followup_history, get_all_followups, get_followup_by_id,
-    get_dashboard_data, get_lead_customer_history
+    add_followup, update_followup, update_followup_status, update_followups_status,
+    bulk_add_followups, validate_followup, get_user_ids, BULK_CHUNK_SIZE, STATUSES,
+    get_followup_history, get_followups_page, get_followup_by_id, access_scope,
+    get_dashboard_data, get_lead_customer_history, get_status_counts, get_team_report,
+    TEAM_REPORT_MAX_DAYS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    iter_followups, iter_lead_customer_history, search_followups,
+    DASHBOARD_UPCOMING_LIMIT, DASHBOARD_MISSED_LIMIT, DASHBOARD_CACHE_TTL,
+    get_calendar, CALENDAR_BUCKETS, CALENDAR_MAX_DAYS
 )
-from datetime import datetime
+from .scheduler import missed_scheduler
+from .events import event_bus, HEARTBEAT_SECONDS
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
 
 followups_bp = Blueprint('followups', __name__)
 dashboard_bp = Blueprint('dashboard', __name__)
+events_bp = Blueprint('events', __name__)
+reports_bp = Blueprint('reports', __name__)
+
+def _today():
+    """ETag input for views whose default date range is relative to today."""
+    return (date.today().isoformat(),)
+
 
 @followups_bp.route('/', methods=['POST'])
 @login_required
 @roles_required(['Admin', 'Sales Manager', 'Sales Executive'])
+@idempotent
 def create_followup():
     data = request.get_json()
     try:
-        followup_id = add_followup(
+        followup_id, conflicts = add_followup(
             lead_id=data.get('lead_id'),
             customer_id=data.get('customer_id'),
             followup_type=data['followup_type'],
@@ -26,23 +46,101 @@ def create_followup():
             notes=data.get('notes'),
             user_id=session['user_id']
         )
-        return jsonify({'message': 'Follow-up created successfully', 'id': followup_id}), 201
+        return jsonify({'message': 'Follow-up created successfully', 'id': followup_id,
+                        'conflicts': conflicts}), 201
     except KeyError as e:
         return jsonify({'message': f'Missing required field: {e}'}), 400
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error creating follow-up: {str(e)}'}), 500
 
 @followups_bp.route('/', methods=['GET'])
 @login_required
+@conditional()
 def get_followups():
+    args = request.args
+    filters = {
+        'status': args.get('status'),
+        'followup_type': args.get('type'),
+        'priority': args.get('priority'),
+        'assigned_to': args.get('assigned_to', type=int),
+        'search': args.get('search', '').strip(),
+    }
     try:
-        followups = get_all_followups(session['user_id'], session['role'])
-        return jsonify(followups), 200
+        followups, next_cursor = get_followups_page(
+            session['user_id'], session['role'], filters,
+            sort=args.get('sort', 'followup_datetime'),
+            limit=args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            cursor=args.get('cursor')
+        )
+        return jsonify({'items': followups, 'next_cursor': next_cursor}), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error fetching follow-ups: {str(e)}'}), 500
 
+@followups_bp.route('/search', methods=['GET'])
+@login_required
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'Query parameter q is required'}), 400
+    try:
+        results, next_cursor = search_followups(
+            session['user_id'], session['role'], query,
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify({'items': results, 'next_cursor': next_cursor}), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error searching follow-ups: {str(e)}'}), 500
+
+@followups_bp.route('/calendar', methods=['GET'])
+@login_required
+@conditional(vary=_today)
+def calendar():
+    """Follow-ups due from..to inclusive, bucketed by day or hour (default: the next 7 days by day).
+
+    Query: bucket=day|hour, assignee, status, rows=1 to include the follow-ups.
+    Admins and managers see counts for everyone, executives only their own;
+    rows are limited like the follow-up list.
+    """
+    args = request.args
+    bucket = args.get('bucket', 'day')
+    if bucket not in CALENDAR_BUCKETS:
+        return jsonify({'message': f"bucket must be one of: {', '.join(CALENDAR_BUCKETS)}"}), 400
+    status = args.get('status') or None
+    if status is not None and status not in STATUSES:
+        return jsonify({'message': f'Invalid status: {status}'}), 400
+    try:
+        day_from = _parse_day(args.get('from')) or date.today().isoformat()
+        day_to = _parse_day(args.get('to')) or (date.fromisoformat(day_from) + timedelta(days=6)).isoformat()
+    except ValueError:
+        return jsonify({'message': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    if day_from > day_to:
+        return jsonify({'message': 'from must not be after to'}), 400
+    if (date.fromisoformat(day_to) - date.fromisoformat(day_from)).days >= CALENDAR_MAX_DAYS[bucket]:
+        return jsonify({'message': f'A {bucket} calendar may cover at most {CALENDAR_MAX_DAYS[bucket]} days'}), 400
+
+    user_id, role = session['user_id'], session['role']
+    assignee = args.get('assignee', type=int)
+    count_scope = None if role in ('Admin', 'Sales Manager') else user_id
+    if count_scope is not None and assignee not in (None, count_scope):
+        return jsonify({'message': 'Forbidden', 'code': 403}), 403
+    try:
+        data = get_calendar(day_from, day_to, bucket, assignee, status, count_scope=count_scope,
+                            with_rows=args.get('rows') in ('1', 'true'),
+                            row_scope=access_scope(user_id, role))
+        return jsonify({'from': day_from, 'to': day_to, 'bucket': bucket, **data}), 200
+    except Exception as e:
+        return jsonify({'message': f'Error building calendar: {str(e)}'}), 500
+
 @followups_bp.route('/<int:followup_id>', methods=['GET'])
 @login_required
+@conditional()
 def get_single_followup(followup_id):
     try:
         followup = get_followup_by_id(followup_id, session['user_id'], session['role'])
@@ -55,15 +153,11 @@ def get_single_followup(followup_id):
 @followups_bp.route('/<int:followup_id>', methods=['PUT'])
 @login_required
 @roles_required(['Admin', 'Sales Manager', 'Sales Executive'])
+@idempotent
 def edit_followup(followup_id):
     data = request.get_json()
     try:
-        # Check if the user is authorized to update this specific follow-up
-        existing_followup = get_followup_by_id(followup_id, session['user_id'], session['role'])
-        if not existing_followup:
-            return jsonify({'message': 'Follow-up not found or unauthorized'}), 404
-
-        success = update_followup(
+        success, conflicts = update_followup(
             followup_id,
             lead_id=data.get('lead_id'),
             customer_id=data.get('customer_id'),
@@ -72,71 +166,185 @@ def edit_followup(followup_id):
             priority=data['priority'],
             assigned_to=data['assigned_to'],
             notes=data.get('notes'),
-            user_id=session['user_id']
+            user_id=session['user_id'],
+            scope_user_id=access_scope(session['user_id'], session['role'])
         )
         if success:
-            return jsonify({'message': 'Follow-up updated successfully'}), 200
+            return jsonify({'message': 'Follow-up updated successfully', 'conflicts': conflicts}), 200
         else:
-            return jsonify({'message': 'Failed to update follow-up'}), 500
+            return jsonify({'message': 'Follow-up not found or unauthorized'}), 404
     except KeyError as e:
         return jsonify({'message': f'Missing required field: {e}'}), 400
     except ValueError as e:
-        return jsonify({'message': str(e)}), 404
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Error updating follow-up: {str(e)}'}), 500
 
 @followups_bp.route('/<int:followup_id>/status', methods=['PUT'])
 @login_required
 @roles_required(['Admin', 'Sales Manager', 'Sales Executive'])
+@idempotent
 def change_followup_status(followup_id):
     data = request.get_json()
     new_status = data.get('status')
     remarks = data.get('remarks', '')
 
-    if not new_status or new_status not in ['Completed', 'Pending', 'Rescheduled', 'Missed']:
+    if not new_status or new_status not in STATUSES:
         return jsonify({'message': 'Invalid status provided'}), 400
 
-    try:
-        # Check if the user is authorized to update this specific follow-up
-        existing_followup = get_followup_by_id(followup_id, session['user_id'], session['role'])
-        if not existing_followup:
-            return jsonify({'message': 'Follow-up not found or unauthorized'}), 404
-
-        # For 'Missed' status, only Admin/Manager can set it directly, otherwise it's set by background task
-        if new_status == 'Missed' and session['role'] not in ['Admin', 'Sales Manager']:
-             return jsonify({'message': 'Only Admin or Sales Manager can directly mark a follow-up as Missed.'}), 403
+    # For 'Missed' status, only Admin/Manager can set it directly, otherwise it's set by background task
+    if new_status == 'Missed' and session['role'] not in ['Admin', 'Sales Manager']:
+        return jsonify({'message': 'Only Admin or Sales Manager can directly mark a follow-up as Missed.'}), 403
 
-        success = update_followup_status(followup_id, new_status, session['user_id'], remarks)
+    try:
+        # Ownership is checked inside the update transaction
+        success = update_followup_status(followup_id, new_status, session['user_id'], remarks,
+                                         scope_user_id=access_scope(session['user_id'], session['role']))
         if success:
             return jsonify({'message': f'Follow-up status updated to {new_status}'}), 200
         else:
-            return jsonify({'message': 'Failed to update follow-up status'}), 500
+            return jsonify({'message': 'Follow-up not found or unauthorized'}), 404
+    except Exception as e:
+        return jsonify({'message': f'Error updating follow-up status: {str(e)}'}), 500
+
+def _iter_ndjson_rows(stream):
+    """A line that is not valid JSON is yielded as a ValueError so it can be reported per row."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {e}')
+
+
+def _bulk_rows():
+    """An iterator over incoming rows from a JSON array, CSV or NDJSON body.
+
+    CSV and NDJSON are read straight off the request stream as the iterator
+    is consumed. A JSON body that is not an array raises ValueError here,
+    before anything is imported.
+    """
+    if request.mimetype == 'text/csv':
+        return csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return _iter_ndjson_rows(io.TextIOWrapper(request.stream, encoding='utf-8'))
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of follow-ups')
+    return iter(data)
+
+
+@followups_bp.route('/bulk', methods=['POST'])
+@login_required
+@roles_required(['Admin', 'Sales Manager', 'Sales Executive'])
+def bulk_create_followups():
+    user_ids = get_user_ids()
+    created = []
+    errors = []
+    chunk = []
+    try:
+        rows = _bulk_rows()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    try:
+        for index, row in enumerate(rows):
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValueError('Each follow-up must be an object')
+                chunk.append(validate_followup(row, user_ids))
+            except ValueError as e:
+                errors.append({'index': index, 'message': str(e)})
+                continue
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                created.extend(bulk_add_followups(chunk, session['user_id']))
+                chunk = []
+        created.extend(bulk_add_followups(chunk, session['user_id']))
+    except UnicodeDecodeError as e:
+        # Earlier chunks are already committed; say which
+        return jsonify({'message': f'Body is not valid UTF-8: {e}',
+                        'created': len(created), 'ids': created}), 400
+    except Exception as e:
+        return jsonify({'message': f'Error importing follow-ups: {str(e)}',
+                        'created': len(created), 'ids': created}), 500
+
+    return jsonify({
+        'message': f'{len(created)} follow-ups created, {len(errors)} rejected',
+        'created': len(created),
+        'ids': created,
+        'failed': len(errors),
+        'errors': errors
+    }), 201 if not errors else 207
+
+
+@followups_bp.route('/bulk/status', methods=['PUT'])
+@login_required
+@roles_required(['Admin', 'Sales Manager', 'Sales Executive'])
+@idempotent
+def bulk_change_followup_status():
+    data = request.get_json(silent=True) or {}
+    followup_ids = data.get('ids')
+    new_status = data.get('status')
+    remarks = data.get('remarks', '')
+
+    if not isinstance(followup_ids, list) or not all(isinstance(i, int) for i in followup_ids):
+        return jsonify({'message': 'ids must be a list of follow-up ids'}), 400
+    if not new_status or new_status not in STATUSES:
+        return jsonify({'message': 'Invalid status provided'}), 400
+    if new_status == 'Missed' and session['role'] not in ['Admin', 'Sales Manager']:
+        return jsonify({'message': 'Only Admin or Sales Manager can directly mark a follow-up as Missed.'}), 403
+
+    try:
+        updated = update_followups_status(followup_ids, new_status, session['user_id'], remarks,
+                                          scope_user_id=access_scope(session['user_id'], session['role']))
+        updated_set = set(updated)
+        errors = [{'id': i, 'message': 'Follow-up not found or unauthorized'}
+                  for i in dict.fromkeys(followup_ids) if i not in updated_set]
+        return jsonify({
+            'message': f'{len(updated)} follow-ups updated to {new_status}',
+            'updated': len(updated),
+            'failed': len(errors),
+            'errors': errors
+        }), 200 if not errors else 207
     except Exception as e:
         return jsonify({'message': f'Error updating follow-up status: {str(e)}'}), 500
 
 @followups_bp.route('/<int:followup_id>/history', methods=['GET'])
 @login_required
+@conditional()
 def get_history(followup_id):
     try:
-        # Ensure user can view this followup before showing history
-        existing_followup = get_followup_by_id(followup_id, session['user_id'], session['role'])
-        if not existing_followup:
+        history = get_followup_history(followup_id, access_scope(session['user_id'], session['role']))
+        if history is None:
             return jsonify({'message': 'Follow-up not found or unauthorized'}), 404
-
-        history = get_followup_history(followup_id)
         return jsonify(history), 200
     except Exception as e:
         return jsonify({'message': f'Error fetching follow-up history: {str(e)}'}), 500
 
 @dashboard_bp.route('/', methods=['GET'])
 @login_required
+@conditional(time_bucket=DASHBOARD_CACHE_TTL)
 def get_user_dashboard_data():
     try:
-        data = get_dashboard_data(session['user_id'], session['role'])
+        upcoming_limit = request.args.get('upcoming_limit', DASHBOARD_UPCOMING_LIMIT, type=int)
+        missed_limit = request.args.get('missed_limit', DASHBOARD_MISSED_LIMIT, type=int)
+        data = get_dashboard_data(
+            session['user_id'], session['role'],
+            upcoming_limit=max(0, min(upcoming_limit, MAX_PAGE_SIZE)),
+            missed_limit=max(0, min(missed_limit, MAX_PAGE_SIZE))
+        )
         return jsonify(data), 200
     except Exception as e:
         return jsonify({'message': f'Error fetching dashboard data: {str(e)}'}), 500
 
+@dashboard_bp.route('/scheduler', methods=['GET'])
+@login_required
+@roles_required(['Admin'])
+def get_scheduler_metrics():
+    return jsonify(missed_scheduler.metrics()), 200
+
 @followups_bp.route('/history_by_entity', methods=['GET'])
 @login_required
 def get_entity_history():
@@ -145,13 +353,172 @@ def get_entity_history():
 
     if not lead_id and not customer_id:
         return jsonify({'message': 'Either lead_id or customer_id must be provided'}), 400
+    try:
+        day_from, day_to = _parse_day(request.args.get('from')), _parse_day(request.args.get('to'))
+    except ValueError:
+        return jsonify({'message': 'from and to must be dates (YYYY-MM-DD)'}), 400
 
     try:
         if lead_id:
-            history = get_lead_customer_history('lead_id', lead_id)
+            history = get_lead_customer_history('lead_id', lead_id, day_from, day_to)
         else: # customer_id
-            history = get_lead_customer_history('customer_id', customer_id)
+            history = get_lead_customer_history('customer_id', customer_id, day_from, day_to)
 
         return jsonify(history), 200
     except Exception as e:
-        return jsonify({'message': f'Error fetching entity history: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'message': f'Error fetching entity history: {str(e)}'}), 500
+
+# --- Reports ---
+def _parse_day(value):
+    """A YYYY-MM-DD query argument, or None; raises ValueError otherwise."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+@reports_bp.route('/status_counts', methods=['GET'])
+@login_required
+@roles_required(['Admin', 'Sales Manager'])
+@conditional()
+def status_counts():
+    """Follow-ups per assignee and status, optionally for due dates in [from, to]."""
+    try:
+        day_from = _parse_day(request.args.get('from'))
+        day_to = _parse_day(request.args.get('to'))
+    except ValueError:
+        return jsonify({'message': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    try:
+        return jsonify(get_status_counts(day_from, day_to)), 200
+    except Exception as e:
+        return jsonify({'message': f'Error fetching status counts: {str(e)}'}), 500
+
+@reports_bp.route('/team', methods=['GET'])
+@login_required
+@roles_required(['Admin', 'Sales Manager'])
+@conditional(vary=_today)
+def team_report():
+    """Per-assignee completion rate, miss rate, time to complete and reschedules.
+
+    Covers history actions dated from..to inclusive (default: the last 30 days).
+    """
+    try:
+        day_to = _parse_day(request.args.get('to')) or date.today().isoformat()
+        day_from = (_parse_day(request.args.get('from'))
+                    or (date.fromisoformat(day_to) - timedelta(days=29)).isoformat())
+    except ValueError:
+        return jsonify({'message': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    if day_from > day_to:
+        return jsonify({'message': 'from must not be after to'}), 400
+    if (date.fromisoformat(day_to) - date.fromisoformat(day_from)).days >= TEAM_REPORT_MAX_DAYS:
+        return jsonify({'message': f'A report may cover at most {TEAM_REPORT_MAX_DAYS} days'}), 400
+    try:
+        return jsonify({'from': day_from, 'to': day_to, 'team': get_team_report(day_from, day_to)}), 200
+    except Exception as e:
+        return jsonify({'message': f'Error building team report: {str(e)}'}), 500
+
+# --- Streaming exports ---
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def batch_encoder(export_format):
+    """Return a function turning one batch of row dicts into a CSV or NDJSON chunk.
+
+    The CSV header is written before the first batch only.
+    """
+    buffer = io.StringIO()
+    writer = None
+
+    def encode(rows):
+        nonlocal writer
+        if export_format == 'ndjson':
+            return ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+        writer.writerows(rows)
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    return encode
+
+
+def _encode_batches(batches, export_format):
+    """Turn batches of row dicts into CSV or NDJSON chunks, one chunk per batch."""
+    encode = batch_encoder(export_format)
+    for rows in batches:
+        yield encode(rows)
+
+
+def _export_response(batches, export_format, filename):
+    return Response(
+        _encode_batches(batches, export_format),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+
+@followups_bp.route('/export', methods=['GET'])
+@login_required
+def export_followups():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': 'format must be csv or ndjson'}), 400
+    batches = iter_followups(session['user_id'], session['role'])
+    return _export_response(batches, export_format, 'followups')
+
+
+@followups_bp.route('/history_by_entity/export', methods=['GET'])
+@login_required
+def export_entity_history():
+    lead_id = request.args.get('lead_id')
+    customer_id = request.args.get('customer_id')
+    export_format = request.args.get('format', 'csv')
+
+    if not lead_id and not customer_id:
+        return jsonify({'message': 'Either lead_id or customer_id must be provided'}), 400
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': 'format must be csv or ndjson'}), 400
+    try:
+        day_from, day_to = _parse_day(request.args.get('from')), _parse_day(request.args.get('to'))
+    except ValueError:
+        return jsonify({'message': 'from and to must be dates (YYYY-MM-DD)'}), 400
+
+    if lead_id:
+        batches = iter_lead_customer_history('lead_id', lead_id, session['user_id'], session['role'],
+                                             day_from=day_from, day_to=day_to)
+    else:
+        batches = iter_lead_customer_history('customer_id', customer_id, session['user_id'], session['role'],
+                                             day_from=day_from, day_to=day_to)
+    return _export_response(batches, export_format, 'followup_history')
+
+
+# --- Live updates ---
+@events_bp.route('/stream', methods=['GET'])
+@login_required
+def stream_events():
+    """Server-sent events for follow-up changes the current user can see.
+
+    Each event names the changed follow-up ids; clients fetch just those
+    rows instead of reloading whole lists.
+    """
+    subscription = event_bus.subscribe(session['user_id'], session['role'])
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
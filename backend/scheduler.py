@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+
+from . import models
+from .coordination import Lease
+from .database import get_data_version
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500      # rows marked per transaction
+MAX_SLEEP = 60        # re-check at least this often
+DATA_VERSION_POLL = 1.0  # how often a sleeping leader looks for writes by other workers
+LEADER_RETRY = 30     # how often a follower tries to take over
+LEASE_NAME = 'missed-followup-scheduler'
+
+
+def _local_time(value):
+    """A stored due time as a naive local datetime, comparable with datetime.now().
+
+    Rows written before due times were normalised may still carry an
+    offset; None if the value does not parse at all.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+class MissedFollowupScheduler:
+    """Marks overdue Pending follow-ups as Missed as soon as they fall due.
+
+    Rather than sweeping the table on a fixed interval, the scheduler asks
+    the (status, followup_datetime) index for the next deadline and sleeps
+    exactly until then. Writes in this process wake it early when they may
+    have moved that deadline; writes by other processes are noticed by
+    polling the data version every poll_interval seconds, so they are
+    marked at most that long after they are committed or fall due. Only one process per database runs the loop: the
+    one holding the scheduler's lease, which it renews on every pass (at
+    least every max_sleep seconds, well inside the lease's ttl). The
+    leader also rolls up the team report's closed days, on its first pass
+    of each day.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, max_sleep=MAX_SLEEP, poll_interval=DATA_VERSION_POLL):
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lease = Lease(LEASE_NAME)
+        self._rolled_up_on = None
+        self._is_leader = False
+        self._resigned = False
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'is_leader': False,
+            'runs': 0,
+            'batches': 0,
+            'marked_total': 0,
+            'last_run_at': None,
+            'last_batch_seconds': 0.0,
+            'last_rows_per_second': 0.0,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+            'next_due_at': None,
+            'errors': 0,
+        }
+
+    def start(self):
+        """Start the loop in this process; a forked child has to call this again."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        if self.notify not in models.schedule_listeners:
+            models.schedule_listeners.append(self.notify)
+        self._wakeup = threading.Event()
+        self._is_leader = self._resigned = False
+        self._set_leader(False)
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='missed-followup-scheduler',
+                                        daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def metrics(self):
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def resign(self):
+        """Stop competing for the lease and hand it back, e.g. when this worker shuts down."""
+        self._resigned = True
+        if self._is_leader and self._pid == os.getpid():
+            self._is_leader = False
+            self._set_leader(False)
+            self._lease.release()
+
+    def _set_leader(self, is_leader):
+        with self._metrics_lock:
+            self._metrics['is_leader'] = is_leader
+
+    def _hold_leadership(self):
+        if self._resigned:
+            return False
+        try:
+            is_leader = self._lease.acquire()
+        except Exception:
+            logger.exception("Could not renew the missed-followup scheduler lease")
+            is_leader = False
+        if is_leader != self._is_leader:
+            logger.info("Process %s %s the missed-followup scheduler leader", os.getpid(),
+                        'is now' if is_leader else 'is no longer')
+            self._is_leader = is_leader
+            self._set_leader(is_leader)
+        return is_leader
+
+    def _run(self):
+        while True:
+            if not self._hold_leadership():
+                time.sleep(LEADER_RETRY)
+                continue
+            try:
+                self.run_once()
+                self._roll_up_team_days()
+                # Read before the next deadline, so no write can fall in between
+                version = get_data_version()
+                timeout = self._seconds_until_next_due()
+            except Exception:
+                logger.exception("Missed-followup scheduler run failed")
+                with self._metrics_lock:
+                    self._metrics['errors'] += 1
+                version, timeout = None, self.max_sleep
+            self._wait(timeout, version)
+            self._wakeup.clear()
+
+    def _wait(self, timeout, version=None):
+        """Sleep up to timeout seconds, or until notify() or the data version moves past version."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if version is None:
+                self._wakeup.wait(remaining)
+                return
+            if self._wakeup.wait(min(remaining, self.poll_interval)):
+                return
+            try:
+                if get_data_version() != version:
+                    return
+            except Exception:
+                logger.exception("Could not read the data version")
+                version = None
+
+    def run_once(self):
+        """Mark everything that is due, one bounded batch at a time."""
+        with self._metrics_lock:
+            self._metrics['runs'] += 1
+        while True:
+            started = time.perf_counter()
+            marked, oldest_due = models.mark_missed_followups(self.batch_size)
+            elapsed = time.perf_counter() - started
+            with self._metrics_lock:
+                self._metrics['last_run_at'] = datetime.now().isoformat()
+                if marked:
+                    self._metrics['batches'] += 1
+                    self._metrics['marked_total'] += marked
+                    self._metrics['last_batch_seconds'] = elapsed
+                    self._metrics['last_rows_per_second'] = marked / elapsed if elapsed else 0.0
+                    due = _local_time(oldest_due)
+                    if due is not None:
+                        lag = (datetime.now() - due).total_seconds()
+                        self._metrics['last_lag_seconds'] = lag
+                        self._metrics['max_lag_seconds'] = max(self._metrics['max_lag_seconds'], lag)
+            if marked < self.batch_size:
+                return
+
+    def _roll_up_team_days(self):
+        today = date.today()
+        if self._rolled_up_on != today:
+            models.roll_up_closed_days()
+            self._rolled_up_on = today
+
+    def _seconds_until_next_due(self):
+        next_due = models.get_next_missed_deadline()
+        with self._metrics_lock:
+            self._metrics['next_due_at'] = next_due
+        due = _local_time(next_due)
+        if due is None:
+            return self.max_sleep
+        wait = (due - datetime.now()).total_seconds()
+        # Rows are missed once strictly past due; wake just after the deadline
+        return min(max(wait, 0) + 0.01, self.max_sleep)
+
+
+missed_scheduler = MissedFollowupScheduler()
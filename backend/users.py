@@ -0,0 +1,84 @@
+import threading
+import time
+
+from .database import get_db_connection
+
+# How long a loaded directory is trusted before it is read again. Users
+# registered in this process invalidate it at once; the TTL bounds how long
+# another worker's new user can be missing from the /users list.
+USER_DIRECTORY_TTL = 300
+# Lookups of unknown ids reload at most this often, so rows pointing at a
+# deleted user cannot turn every read into a reload
+USER_DIRECTORY_MISS_RELOAD = 1.0
+
+
+class UserDirectory:
+    """In-process map of user id -> {id, username, role}.
+
+    Usernames and roles never change once a user exists, so the only way
+    the map goes stale is a user being added. register_user() invalidates
+    it, and a lookup for an unknown id reloads it once, so a follow-up
+    assigned to a user registered in another worker still resolves.
+    Queries can then leave out the users join and fill usernames in here.
+    """
+
+    def __init__(self, ttl=USER_DIRECTORY_TTL):
+        self.ttl = ttl
+        self._users = None
+        self._expires_at = 0.0
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._users = None
+
+    def all(self):
+        """Every user, ordered by id."""
+        return list(self._load().values())
+
+    def ids(self):
+        """Every user id, reloaded first (at most once a second) since callers validate against it."""
+        return set(self._load(refresh=True))
+
+    def get(self, user_id):
+        users = self._load()
+        if user_id is not None and user_id not in users:
+            users = self._load(refresh=True)
+        return users.get(user_id)
+
+    def username(self, user_id):
+        user = self.get(user_id)
+        return user['username'] if user else None
+
+    def annotate(self, rows, id_field, name_field):
+        """Set row[name_field] to the username for row[id_field] on each row dict."""
+        users = self._load()
+        if any(row[id_field] is not None and row[id_field] not in users for row in rows):
+            users = self._load(refresh=True)
+        for row in rows:
+            user = users.get(row[id_field])
+            row[name_field] = user['username'] if user else None
+        return rows
+
+    def _load(self, refresh=False):
+        with self._lock:
+            if self._users is not None:
+                now = time.monotonic()
+                if refresh and now - self._loaded_at < USER_DIRECTORY_MISS_RELOAD:
+                    return self._users
+                if not refresh and self._expires_at > now:
+                    return self._users
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, username, role FROM users ORDER BY id")
+        users = {row['id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        with self._lock:
+            self._users = users
+            self._loaded_at = time.monotonic()
+            self._expires_at = self._loaded_at + self.ttl
+        return users
+
+
+user_directory = UserDirectory()
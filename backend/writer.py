@@ -0,0 +1,158 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+GROUP_WINDOW_SECONDS = float(os.environ.get('CRM_WRITE_GROUP_MS', 2)) / 1000  # wait this long for company
+GROUP_MAX_JOBS = 256      # mutations committed together at most
+
+
+class _Job:
+    __slots__ = ('fn', 'args', 'kwargs', 'future')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class WriteCoordinator:
+    """Runs every mutation on one writer thread and commits them in groups.
+
+    A mutation is a function taking a cursor (plus its own arguments) that
+    issues its statements and returns a result; it must not begin, commit
+    or roll back. The writer takes everything queued and, if that is more
+    than one mutation, waits up to GROUP_WINDOW_SECONDS for more. It then
+    runs the group in one BEGIN IMMEDIATE transaction with a savepoint
+    around each mutation, so one failing mutation is rolled back alone. Results, or the mutation's exception,
+    reach callers through futures once the group has committed, so a caller
+    always reads its own write afterwards.
+
+    Within a process there is then a single SQLite writer: no lock retries
+    between threads and one commit (one fsync) per group instead of per
+    mutation.
+    """
+
+    def __init__(self, window=GROUP_WINDOW_SECONDS, max_jobs=GROUP_MAX_JOBS):
+        self.window = window
+        self.max_jobs = max_jobs
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'groups': 0,
+            'jobs': 0,
+            'failed_jobs': 0,
+            'failed_groups': 0,
+            'last_group_size': 0,
+            'max_group_size': 0,
+            'last_group_seconds': 0.0,
+        }
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a mutation; returns a Future for its result."""
+        self._ensure_started()
+        job = _Job(fn, args, kwargs)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn, *args, **kwargs):
+        """Queue a mutation and wait for it to commit; returns its result."""
+        if threading.current_thread() is self._thread:
+            return fn(database.get_db_connection().cursor(), *args, **kwargs)  # already inside a group
+        return self.submit(fn, *args, **kwargs).result()
+
+    def metrics(self):
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()  # a forked child starts with nothing queued
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            group = [self._queue.get()]
+            while len(group) < self.max_jobs:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # A lone mutation is committed at once; only when writers are
+            # evidently concurrent is it worth waiting for more company.
+            deadline = time.monotonic() + (self.window if len(group) > 1 else 0)
+            while len(group) < self.max_jobs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit_group(group)
+
+    def _commit_group(self, group):
+        started = time.perf_counter()
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        outcomes = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for job in group:
+                cursor.execute("SAVEPOINT mutation")
+                try:
+                    result = job.fn(cursor, *job.args, **job.kwargs)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO mutation")
+                    outcomes.append((job, None, e))
+                else:
+                    outcomes.append((job, result, None))
+                cursor.execute("RELEASE mutation")
+            conn.commit()
+        except Exception as e:
+            logger.exception("Write group of %d failed", len(group))
+            if conn.in_transaction:
+                conn.rollback()
+            with self._metrics_lock:
+                self._metrics['failed_groups'] += 1
+            for job in group:
+                job.future.set_exception(e)
+            return
+        finally:
+            conn.close()
+
+        failed = 0
+        for job, result, error in outcomes:
+            if error is not None:
+                failed += 1
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+        with self._metrics_lock:
+            self._metrics['groups'] += 1
+            self._metrics['jobs'] += len(group)
+            self._metrics['failed_jobs'] += failed
+            self._metrics['last_group_size'] = len(group)
+            self._metrics['max_group_size'] = max(self._metrics['max_group_size'], len(group))
+            self._metrics['last_group_seconds'] = time.perf_counter() - started
+
+
+write_coordinator = WriteCoordinator()
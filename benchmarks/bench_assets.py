@@ -0,0 +1,83 @@
+"""Bytes and round trips to load each page, before and after the asset pipeline.
+
+"before" loads the page's CSS/JS from /static/ uncompressed and, on a
+repeat visit, revalidates each file; "after" uses the fingerprinted,
+precompressed /assets/ URLs the templates now emit, which a repeat visit
+does not request at all. The load time estimate assumes the assets are
+fetched in parallel after the HTML, on a link of --kbps and --rtt-ms.
+Large JSON responses are compared with and without gzip as well.
+
+    python -m benchmarks.bench_assets --kbps 1600 --rtt-ms 150
+"""
+import argparse
+import re
+
+from benchmarks.common import login, make_app
+
+PAGES = ('/login', '/', '/followups')
+ASSET_LINK = re.compile(r'(?:href|src)="(/assets/[^"]+)"')
+
+
+def load(client, page, manifest, compressed, repeat):
+    """(bytes, requests) for one page load."""
+    html = client.get(page, headers={'Accept-Encoding': 'gzip, br'})
+    total, requests = len(html.data), 1
+    for url in ASSET_LINK.findall(html.get_data(as_text=True)):
+        if compressed:
+            if repeat:
+                continue  # immutable: served from the browser cache without a request
+            response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+        else:
+            source = next(name for name, hashed in manifest.items() if url.endswith(hashed))
+            response = client.get(f'/static/{source}')
+            if repeat:
+                response = client.get(f'/static/{source}',
+                                      headers={'If-Modified-Since': response.headers['Last-Modified']})
+        total += len(response.data)
+        requests += 1
+    return total, requests
+
+
+def estimate_ms(total, requests, kbps, rtt_ms):
+    round_trips = 1 + (1 if requests > 1 else 0)
+    return round_trips * rtt_ms + total * 8 / kbps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kbps', type=float, default=1600)
+    parser.add_argument('--rtt-ms', type=float, default=150)
+    parser.add_argument('--followups', type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    from backend import assets
+    client = login(app)
+    with app.test_request_context():
+        manifest = assets.manifest()
+
+    print(f"{'page':<12}{'visit':<8}{'before':>18}{'after':>18}{'est. before':>14}{'est. after':>12}")
+    for page in PAGES:
+        for repeat in (False, True):
+            page_client = client if page != '/login' else app.test_client()
+            before = load(page_client, page, manifest, False, repeat)
+            after = load(page_client, page, manifest, True, repeat)
+            print(f"{page:<12}{'repeat' if repeat else 'first':<8}"
+                  f"{before[0]:>10,} B /{before[1]:>2} req{after[0]:>10,} B /{after[1]:>2} req"
+                  f"{estimate_ms(*before, args.kbps, args.rtt_ms):>11.0f} ms"
+                  f"{estimate_ms(*after, args.kbps, args.rtt_ms):>9.0f} ms")
+
+    for i in range(args.followups):
+        client.post('/api/followups/', json={
+            'lead_id': f'L-{i}', 'followup_type': 'Call', 'followup_datetime': f'2030-01-01T{i % 24:02d}:00',
+            'priority': 'Low', 'assigned_to': 3, 'notes': f'Follow up on quote {i}',
+        })
+    for url in ('/api/followups/?limit=200', '/api/dashboard/'):
+        plain = client.get(url)
+        gzipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        print(f"{url:<26}{len(plain.data):>10,} B -> {len(gzipped.data):>8,} B "
+              f"({gzipped.headers.get('Content-Encoding') or 'identity'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Rows/sec for bulk follow-up import and bulk status changes.
+
+Compares one POST per row against POST /api/followups/bulk with JSON,
+NDJSON and CSV bodies, then times PUT /api/followups/bulk/status.
+
+    python -m benchmarks.bench_bulk --rows 50000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from benchmarks.common import login, make_app
+
+FIELDS = ['lead_id', 'customer_id', 'followup_type', 'followup_datetime',
+          'priority', 'assigned_to', 'notes']
+
+
+def make_rows(count, offset=0):
+    return [{
+        'lead_id': f'LEAD-{offset + i}',
+        'customer_id': None,
+        'followup_type': 'Call',
+        'followup_datetime': f'2031-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T10:00',
+        'priority': 'Medium',
+        'assigned_to': 3,
+        'notes': 'nightly sync',
+    } for i in range(count)]
+
+
+def timed(label, rows, call):
+    started = time.perf_counter()
+    response = call()
+    elapsed = time.perf_counter() - started
+    assert response.status_code in (200, 201), response.get_json()
+    print(f'{label:<28} {rows:>8} rows  {elapsed:7.2f}s  {rows / elapsed:10.0f} rows/s')
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--single-rows', type=int, default=1000,
+                        help='rows to create one request at a time, for comparison')
+    args = parser.parse_args()
+
+    client = login(make_app())
+
+    single = make_rows(args.single_rows)
+    started = time.perf_counter()
+    for row in single:
+        client.post('/api/followups/', json=row)
+    elapsed = time.perf_counter() - started
+    print(f'{"POST /api/followups/ x N":<28} {len(single):>8} rows  {elapsed:7.2f}s  '
+          f'{len(single) / elapsed:10.0f} rows/s')
+
+    rows = make_rows(args.rows, offset=args.single_rows)
+    timed('bulk JSON', len(rows), lambda: client.post('/api/followups/bulk', json=rows))
+
+    ndjson = '\n'.join(json.dumps(r) for r in rows)
+    timed('bulk NDJSON', len(rows), lambda: client.post(
+        '/api/followups/bulk', data=ndjson, content_type='application/x-ndjson'))
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    response = timed('bulk CSV', len(rows), lambda: client.post(
+        '/api/followups/bulk', data=buffer.getvalue(), content_type='text/csv'))
+
+    ids = response.get_json()['ids']
+    timed('bulk status change', len(ids), lambda: client.put(
+        '/api/followups/bulk/status', json={'ids': ids, 'status': 'Completed'}))
+
+
+if __name__ == '__main__':
+    main()
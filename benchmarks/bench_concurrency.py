@@ -0,0 +1,118 @@
+"""How many idle live-update connections one process can hold.
+
+Starts the app once under gunicorn (the current sync deployment) and once
+under uvicorn (backend.asgi), opens N long-lived /api/events/stream
+connections against each, and while they are held measures whether a
+plain list request still gets through and how long it takes.
+
+    python -m benchmarks.bench_concurrency --connections 100,1000,2000
+    python -m benchmarks.bench_concurrency --servers asgi --connections 5000
+
+Opening thousands of sockets needs a matching `ulimit -n`.
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.datagen import generate
+from benchmarks.loadtest import percentile, start_gunicorn, start_uvicorn
+
+
+def login(base_url):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    request = urllib.request.Request(
+        base_url + '/api/auth/login', method='POST', headers={'Content-Type': 'application/json'},
+        data=json.dumps({'username': 'admin', 'password': 'admin123'}).encode())
+    opener.open(request).read()
+    return '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+
+
+async def open_stream(port, cookie, timeout):
+    """Open one SSE connection; return its writer once the first bytes arrive, else None."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    writer.write((f'GET /api/events/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                  f'Cookie: {cookie}\r\nAccept: text/event-stream\r\n\r\n').encode())
+    try:
+        await asyncio.wait_for(reader.readuntil(b'retry:'), timeout)
+        return writer
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        writer.close()
+        return None
+
+
+def probe(base_url, cookie, timeout):
+    """Time one list request; None if it failed or timed out."""
+    request = urllib.request.Request(base_url + '/api/followups/?limit=20', headers={'Cookie': cookie})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except (OSError, urllib.error.URLError):
+        return None
+    return time.perf_counter() - started
+
+
+async def measure(base_url, connections, probes, timeout):
+    port = int(base_url.rsplit(':', 1)[1])
+    cookie = login(base_url)
+    loop = asyncio.get_running_loop()
+
+    writers = await asyncio.gather(*(open_stream(port, cookie, timeout) for _ in range(connections)))
+    held = [w for w in writers if w is not None]
+    try:
+        timings = [await loop.run_in_executor(None, probe, base_url, cookie, timeout) for _ in range(probes)]
+    finally:
+        for writer in held:
+            writer.close()
+    ok = sorted(t for t in timings if t is not None)
+    return {
+        'held': len(held),
+        'probes_ok': len(ok),
+        'probe_p50_ms': percentile(ok, 0.50) * 1000,
+        'probe_p95_ms': percentile(ok, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', default='wsgi,asgi', help='comma-separated: wsgi (gunicorn), asgi (uvicorn)')
+    parser.add_argument('--connections', default='100,1000', help='comma-separated levels of idle SSE clients')
+    parser.add_argument('--probes', type=int, default=20, help='list requests timed at each level')
+    parser.add_argument('--timeout', type=float, default=5, help='seconds before a connection or probe gives up')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads (sync deployment)')
+    parser.add_argument('--followups', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='crm-conc-'), 'crm.db')
+    generate(db_path, args.followups, progress=False)
+    levels = [int(level) for level in args.connections.split(',')]
+
+    print(f"{'server':<8}{'clients':>9}{'held':>8}{'probes ok':>11}{'p50 ms':>10}{'p95 ms':>10}")
+    for server in args.servers.split(','):
+        for level in levels:
+            # A fresh process per level so lingering sockets from the last level do not count
+            if server == 'wsgi':
+                process, base_url = start_gunicorn(db_path, 1, args.threads)
+            else:
+                process, base_url = start_uvicorn(db_path)
+            try:
+                result = asyncio.run(measure(base_url, level, args.probes, args.timeout))
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{server:<8}{level:>9}{result['held']:>8}{result['probes_ok']:>7}/{args.probes:<3}"
+                  f"{result['probe_p50_ms']:>10.1f}{result['probe_p95_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
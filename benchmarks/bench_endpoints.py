@@ -0,0 +1,82 @@
+"""Requests/sec for the hot read endpoints.
+
+Seeds a throwaway SQLite file, logs in through the Flask test client and
+hammers ``/api/followups/`` and ``/api/dashboard/`` from a few threads.
+
+    python -m benchmarks.bench_endpoints --rows 2000 --threads 8 --seconds 5
+"""
+import argparse
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import database, login, make_app
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    user_ids = [r[0] for r in conn.execute("SELECT id FROM users")]
+    now = datetime.now()
+    followups = []
+    for i in range(rows):
+        when = now + timedelta(minutes=random.randint(-60 * 24 * 30, 60 * 24 * 30))
+        followups.append((
+            f'L-{i}', None, random.choice(['Call', 'Meeting', 'Visit', 'Task']),
+            when.isoformat(timespec='minutes'), random.choice(['Low', 'Medium', 'High']),
+            random.choice(['Pending', 'Completed', 'Missed']), random.choice(user_ids),
+            'seeded', now.isoformat(), now.isoformat(),
+        ))
+    conn.executemany("""
+        INSERT INTO follow_ups (
+            lead_id, customer_id, followup_type, followup_datetime,
+            priority, status, assigned_to, notes, created_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, followups)
+    conn.commit()
+    conn.close()
+
+
+def run(app, url, threads, seconds):
+    clients = [login(app) for _ in range(threads)]
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot):
+        client = clients[slot]
+        while time.perf_counter() < deadline:
+            response = client.get(url)
+            if response.status_code != 200:
+                errors[slot] += 1
+            counts[slot] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return sum(counts) / elapsed, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    seed(database.DATABASE, args.rows)
+
+    for url in ('/api/followups/', '/api/dashboard/'):
+        rps, errors = run(app, url, args.threads, args.seconds)
+        print(f'{url:<20} {rps:10.1f} req/s  errors={errors}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Team report latency over a generated history.
+
+Times GET /api/reports/team for the last 180 days three ways: with no
+rollups yet (every closed day aggregated from history, read-only), with
+rollups in place, and as a single live aggregation straight over
+followup_history. The roll-up the background job runs is timed in between.
+
+    python -m benchmarks.bench_reports --followups 300000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import database
+from benchmarks.datagen import generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--followups', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=180)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='crm-reports-'), 'crm.db')
+    generate(db_path, args.followups, progress=False)
+    from backend.app import app
+    from backend import models
+
+    conn = database.get_db_connection()
+    history_rows = conn.execute("SELECT COUNT(*) FROM followup_history").fetchone()[0]
+    conn.close()
+    print(f'{args.followups:,} follow-ups, {history_rows:,} history rows')
+
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    today = date.today()
+    day_from = (today - timedelta(days=args.days - 1)).isoformat()
+    url = f'/api/reports/team?from={day_from}&to={today.isoformat()}'
+
+    for label in ('cold (no rollups)', 'warm (rollups)'):
+        if label.startswith('warm'):
+            started = time.perf_counter()
+            models.roll_up_closed_days(args.days)
+            print(f"{'roll-up':<22}{(time.perf_counter() - started) * 1000:10.1f} ms")
+        started = time.perf_counter()
+        response = client.get(url, headers={'Cache-Control': 'no-cache'})
+        assert response.status_code == 200, response.get_json()
+        print(f'{label:<22}{(time.perf_counter() - started) * 1000:10.1f} ms  '
+              f"{len(response.get_json()['team'])} assignees")
+        # Drop the response cache entry so the next call recomputes
+        conn = database.get_db_connection()
+        database.bump_data_version(conn.cursor())
+        conn.commit()
+        conn.close()
+
+    conn = database.get_db_connection()
+    started = time.perf_counter()
+    conn.execute(models._TEAM_REPORT_SQL.format(day='', group=''), (day_from, models._next_day(today.isoformat()))).fetchall()
+    print(f"{'live aggregation':<22}{(time.perf_counter() - started) * 1000:10.1f} ms")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
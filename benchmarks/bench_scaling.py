@@ -0,0 +1,88 @@
+"""Throughput as gunicorn workers are added, up to the core count.
+
+Starts the app with gunicorn.conf.py at 1, 2, 4 ... workers against one
+generated database and drives each level from several client processes
+(each running loadtest scenarios on its own threads). Prints requests per
+second, the speed-up over one worker and the scaling efficiency
+(speed-up / workers). Sessions are logged in once and then spread over all
+workers, so a run with no errors also shows every worker accepts the
+shared session secret.
+
+Read scenarios (list, dashboard) should scale close to linearly until the
+workers use every core; write scenarios flatten sooner, since SQLite
+commits one writer at a time. The client processes run on the same
+machine and need cores too, so near the core count the efficiency column
+understates the server; read it against the cores left for gunicorn.
+
+    python -m benchmarks.bench_scaling --workers 1,2,4,8 --scenarios list,dashboard
+"""
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.datagen import generate
+from benchmarks.loadtest import (SCENARIOS, HttpSession, run_scenario, scenario_context,
+                                 start_gunicorn)
+
+
+def drive(base_url, name, threads, seconds, ctx, seed):
+    """One client process: run a scenario on `threads` HTTP sessions."""
+    return run_scenario(SCENARIOS[name], lambda: HttpSession(base_url), threads, seconds, ctx, seed)
+
+
+def measure(base_url, name, clients, threads, seconds, ctx, seed):
+    with ProcessPoolExecutor(clients) as pool:
+        results = list(pool.map(drive, [base_url] * clients, [name] * clients, [threads] * clients,
+                                [seconds] * clients, [ctx] * clients,
+                                [seed + i * threads for i in range(clients)]))
+    return {
+        'rps': sum(r['rps'] for r in results),
+        'p95_ms': max(r['p95_ms'] for r in results),
+        'errors': sum(r['errors'] for r in results),
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_levels = ','.join(str(n) for n in sorted({1, 2, 4, 8, 16, cores}) if n <= cores)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default=default_levels, help='comma-separated worker counts')
+    parser.add_argument('--worker-threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--scenarios', default='list,dashboard')
+    parser.add_argument('--clients', type=int, default=4, help='client processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per client process')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--followups', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # All clients share one address; the login storm measures hashing, not the limiter
+    os.environ.setdefault('CRM_LOGIN_IP_LIMIT', '1000000/1')
+    os.environ.setdefault('CRM_LOGIN_USER_LIMIT', '1000000/1')
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='crm-scale-'), 'crm.db')
+    print(f'Generating {args.followups:,} follow-ups into {db_path} ({cores} cores)')
+    generate(db_path, args.followups, args.users, seed=args.seed, progress=False)
+    ctx = scenario_context(db_path)
+    levels = [int(n) for n in args.workers.split(',')]
+
+    print(f"{'scenario':<14}{'workers':>8}{'req/s':>10}{'speed-up':>10}{'efficiency':>12}{'p95 ms':>10}{'errors':>8}")
+    for name in args.scenarios.split(','):
+        single = None
+        for workers in levels:
+            process, base_url = start_gunicorn(db_path, workers, args.worker_threads)
+            try:
+                result = measure(base_url, name, args.clients, args.threads, args.seconds, ctx, args.seed)
+            finally:
+                process.terminate()
+                process.wait()
+            single = single or result['rps'] / workers
+            speedup = result['rps'] / single
+            print(f"{name:<14}{workers:>8}{result['rps']:>10.1f}{speedup:>9.2f}x{speedup / workers:>11.0%}"
+                  f"{result['p95_ms']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
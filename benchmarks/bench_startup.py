@@ -0,0 +1,69 @@
+"""Cold start: import, app construction and first-request latency.
+
+Each sample is a fresh interpreter, like a newly scheduled container. It
+times `import backend.app`, create_app(), the first request (which sets
+up the database) and a second request, against a database file that does
+not exist yet and against one that is already migrated and seeded. The
+report shows the median of --runs samples.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import backend.app
+imported = time.perf_counter()
+app = backend.app.create_app()
+created = time.perf_counter()
+client = app.test_client()
+assert client.get('/login').status_code == 200
+first = time.perf_counter()
+assert client.get('/login').status_code == 200
+second = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first - created) * 1000,
+    'second_request_ms': (second - first) * 1000,
+}))
+"""
+
+COLUMNS = ('import_ms', 'create_app_ms', 'first_request_ms', 'second_request_ms')
+
+
+def sample(db_path):
+    env = dict(os.environ, CRM_DATABASE=db_path)
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='crm-startup-')
+    warm_db = os.path.join(workdir, 'warm.db')
+    sample(warm_db)  # migrate and seed once
+
+    print(f"{'database':<10}" + ''.join(f'{column:>20}' for column in COLUMNS))
+    for label in ('new', 'existing'):
+        samples = [sample(os.path.join(workdir, f'new-{i}.db') if label == 'new' else warm_db)
+                   for i in range(args.runs)]
+        print(f'{label:<10}' + ''.join(f'{statistics.median(s[column] for s in samples):>20.1f}'
+                                        for column in COLUMNS))
+
+
+if __name__ == '__main__':
+    main()
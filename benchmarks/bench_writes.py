@@ -0,0 +1,73 @@
+"""Single-row write throughput as concurrency grows.
+
+Creates follow-ups and flips their status from 1..N threads through the
+Flask test client, with the write coordinator's group commit window at
+its configured value and at zero (one transaction per mutation), and
+counts failures such as "database is locked".
+
+    python -m benchmarks.bench_writes --threads 1,4,16,64 --seconds 3
+"""
+import argparse
+import random
+import threading
+import time
+
+from backend.writer import write_coordinator
+from benchmarks.common import login, make_app
+
+
+def run(app, threads, seconds):
+    clients = [login(app) for _ in range(threads)]
+    counts = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot):
+        client, rng = clients[slot], random.Random(slot)
+        created = []
+        while time.perf_counter() < deadline:
+            if created and rng.random() < 0.5:
+                response = client.put(f'/api/followups/{rng.choice(created)}/status',
+                                      json={'status': rng.choice(['Completed', 'Pending'])})
+            else:
+                response = client.post('/api/followups/', json={
+                    'lead_id': f'W-{slot}-{counts[slot]}', 'followup_type': 'Call',
+                    'followup_datetime': '2031-01-01T10:00', 'priority': 'Low', 'assigned_to': 3,
+                })
+                if response.status_code == 201:
+                    created.append(response.get_json()['id'])
+            if response.status_code not in (200, 201):
+                errors[slot] += 1
+            counts[slot] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts) / (time.perf_counter() - started), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', default='1,4,16,64')
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    app = make_app()
+    window = write_coordinator.window
+    print(f"{'window ms':>10}{'threads':>9}{'writes/s':>11}{'errors':>8}{'avg group':>11}")
+    for group_window in (window, 0.0):
+        write_coordinator.window = group_window
+        for threads in [int(t) for t in args.threads.split(',')]:
+            before = write_coordinator.metrics()
+            rate, errors = run(app, threads, args.seconds)
+            after = write_coordinator.metrics()
+            groups = after['groups'] - before['groups']
+            average = (after['jobs'] - before['jobs']) / groups if groups else 0
+            print(f'{group_window * 1000:>10.1f}{threads:>9}{rate:>11.1f}{errors:>8}{average:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""EXPLAIN QUERY PLAN regression check for the hot queries in models.py.
+
+Runs each hot model function against a throwaway database, captures every
+SELECT it issues and fails if any plan falls back to a full table scan of
+follow_ups or followup_history, or stops using the index EXPECTED_INDEXES
+names for it. tests/test_query_plans.py runs the same check under pytest.
+
+    python -m benchmarks.check_query_plans
+"""
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import database, models  # noqa: E402
+from benchmarks.common import make_app  # noqa: E402
+
+# "SCAN f" / "SCAN follow_ups" without an index is a full scan; an ordered
+# walk of an index ("SCAN f USING INDEX ...") is fine.
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?! VIRTUAL TABLE)')
+WATCHED_TABLES = {'f', 'fh', 'follow_ups', 'followup_history'}
+
+# The index (or access path) each hot call's plans must mention
+EXPECTED_INDEXES = {
+    'get_all_followups (admin)': 'idx_follow_ups_datetime',
+    'get_all_followups (exec)': 'idx_follow_ups_assignee_datetime',
+    'get_followups_page (admin)': 'idx_follow_ups_datetime',
+    'get_followups_page (admin, status)': 'idx_follow_ups_status_datetime',
+    'get_followups_page (exec, cursor)': 'idx_follow_ups_assignee_datetime',
+    'get_followups_page (exec, status, desc)': 'idx_follow_ups_assignee_status_datetime',
+    'get_followups_page (exec, search)': 'follow_ups_fts VIRTUAL TABLE',
+    'search_followups (exec)': 'follow_ups_fts VIRTUAL TABLE',
+    'get_followup_by_id': 'INTEGER PRIMARY KEY',
+    'get_followup_history': 'idx_followup_history_followup_date',
+    'get_dashboard_data (admin)': 'idx_follow_ups_status_datetime',
+    'get_dashboard_data (exec)': 'idx_follow_ups_assignee_status_datetime',
+    'get_lead_customer_history (lead)': 'idx_follow_ups_lead_id',
+    'get_lead_customer_history (customer)': 'idx_follow_ups_customer_id',
+    'get_lead_customer_history (lead, days)': 'idx_followup_history_followup_date',
+    'get_status_counts': 'followup_counters',
+    'get_status_counts (days)': 'idx_followup_daily_counters_day',
+    'get_team_report': 'idx_followup_history_action_date',
+    'get_calendar (day, rows)': 'idx_follow_ups_epoch',
+    'get_calendar (hour, exec)': 'idx_follow_ups_assignee_epoch',
+    '_schedule_conflicts': 'idx_follow_ups_assignee_epoch',
+}
+
+
+def hot_calls(admin_id, exec_id, followup_id):
+    return [
+        ('get_all_followups (admin)', lambda: models.get_all_followups(admin_id, 'Admin')),
+        ('get_all_followups (exec)', lambda: models.get_all_followups(exec_id, 'Sales Executive')),
+        ('get_followups_page (admin)', lambda: models.get_followups_page(admin_id, 'Admin')),
+        ('get_followups_page (admin, status)',
+         lambda: models.get_followups_page(admin_id, 'Admin', {'status': 'Pending'})),
+        ('get_followups_page (exec, cursor)',
+         lambda: models.get_followups_page(exec_id, 'Sales Executive',
+                                           cursor=models.encode_cursor('2030-01-05T10:00', 1))),
+        ('get_followups_page (exec, status, desc)',
+         lambda: models.get_followups_page(exec_id, 'Sales Executive', {'status': 'Missed'},
+                                           sort='-followup_datetime')),
+        ('get_followups_page (exec, search)',
+         lambda: models.get_followups_page(exec_id, 'Sales Executive', {'search': 'L-1'})),
+        ('search_followups (exec)', lambda: models.search_followups(exec_id, 'Sales Executive', 'plan')),
+        ('get_followup_by_id', lambda: models.get_followup_by_id(followup_id, exec_id, 'Sales Executive')),
+        ('get_followup_history', lambda: models.get_followup_history(followup_id)),
+        ('get_dashboard_data (admin)', lambda: models.get_dashboard_data(admin_id, 'Admin')),
+        ('get_dashboard_data (exec)', lambda: models.get_dashboard_data(exec_id, 'Sales Executive')),
+        ('get_lead_customer_history (lead)', lambda: models.get_lead_customer_history('lead_id', 'L-1')),
+        ('get_lead_customer_history (customer)', lambda: models.get_lead_customer_history('customer_id', 'C-1')),
+        ('get_lead_customer_history (lead, days)',
+         lambda: models.get_lead_customer_history('lead_id', 'L-1', '2030-01-01', '2030-01-31')),
+        ('get_status_counts', lambda: models.get_status_counts()),
+        ('get_status_counts (days)', lambda: models.get_status_counts('2030-01-01', '2030-01-31')),
+        ('get_team_report', lambda: models.get_team_report(
+            (date.today() - timedelta(days=30)).isoformat(), date.today().isoformat())),
+        ('get_calendar (day, rows)',
+         lambda: models.get_calendar('2030-01-01', '2030-01-07', with_rows=True)),
+        ('get_calendar (hour, exec)',
+         lambda: models.get_calendar('2030-01-01', '2030-01-07', 'hour', count_scope=exec_id,
+                                     with_rows=True, row_scope=exec_id)),
+        ('_schedule_conflicts', lambda: models._schedule_conflicts(
+            database.get_db_connection().cursor(), followup_id, '2030-01-01T10:00', exec_id)),
+    ]
+
+
+def seed(conn, user_ids, rows=5000):
+    statuses = ['Pending', 'Completed', 'Missed', 'Rescheduled']
+    conn.executemany("""
+        INSERT INTO follow_ups (
+            lead_id, customer_id, followup_type, followup_datetime,
+            priority, status, assigned_to, notes, created_at, updated_at
+        )
+        VALUES (?, ?, 'Call', ?, 'Low', ?, ?, NULL, ?, ?)
+    """, [
+        (f'L-{i}', f'C-{i}', f'2030-01-{i % 28 + 1:02d}T10:00', statuses[i % 4],
+         user_ids[i % len(user_ids)], '2029-12-01T00:00', '2029-12-01T00:00')
+        for i in range(rows)
+    ])
+    conn.execute("""
+        INSERT INTO followup_history (followup_id, action, remarks, action_date, acted_by)
+        SELECT id, 'Created', 'seeded', created_at, assigned_to FROM follow_ups
+    """)
+    conn.commit()
+
+
+def collect_plans():
+    """{hot call name: [(sql, [plan lines]), ...]} for every SELECT each call issues."""
+    make_app()  # a fresh database, with the caches of any previous one dropped
+    conn = database.get_db_connection()
+    admin_id = conn.execute("SELECT id FROM users WHERE username = 'admin'").fetchone()[0]
+    exec_id = conn.execute("SELECT id FROM users WHERE username = 'executive1'").fetchone()[0]
+    followup_id, _ = models.add_followup('L-1', 'C-1', 'Call', '2030-01-01T10:00', 'High',
+                                         exec_id, 'plan check', admin_id)
+    # Give the planner realistic statistics instead of a one-row table
+    seed(conn, [admin_id, exec_id])
+    conn.execute("ANALYZE")
+
+    plans = {}
+    for name, call in hot_calls(admin_id, exec_id, followup_id):
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            conn.set_trace_callback(None)
+        plans[name] = [(sql, [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)])
+                       for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    return plans
+
+
+def full_scans(plan):
+    return [line for line in plan if (m := FULL_SCAN.search(line)) and m.group(1) in WATCHED_TABLES]
+
+
+def uses_expected_index(name, plans):
+    return any(EXPECTED_INDEXES[name] in line for _, plan in plans for line in plan)
+
+
+def main():
+    failures = 0
+    for name, plans in collect_plans().items():
+        for sql, plan in plans:
+            scans = full_scans(plan)
+            if scans:
+                failures += 1
+                print(f"FAIL {name}: {'; '.join(scans)}")
+                print("     " + " ".join(sql.split()))
+            else:
+                print(f"ok   {name}: {'; '.join(plan)}")
+        if not uses_expected_index(name, plans):
+            failures += 1
+            print(f"FAIL {name}: no longer uses {EXPECTED_INDEXES[name]}")
+
+    if failures:
+        print(f"{failures} hot quer{'y' if failures == 1 else 'ies'} lost their index")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
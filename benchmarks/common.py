@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import database  # noqa: E402
+
+
+def make_app():
+    """Build the Flask app against a fresh throwaway database file."""
+    from backend.app import create_app
+
+    workdir = tempfile.mkdtemp(prefix='crm-bench-')
+    app = create_app({'DATABASE': os.path.join(workdir, 'bench.db')})
+    database.ensure_db()  # benchmarks also read and write the file directly
+    return app
+
+
+def login(app, username='admin', password='admin123'):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return client
@@ -0,0 +1,132 @@
+"""Synthetic CRM data at a chosen scale.
+
+Creates (or extends) a SQLite file with the app's schema, sales users,
+follow-ups spread over +/- 90 days and a few history rows per follow-up.
+Rows are generated and inserted in chunks so 10M follow-ups never sit in
+memory at once. The same --seed gives the same data.
+
+    python -m benchmarks.datagen --scale 1m --out /tmp/crm-1m.db
+    python -m benchmarks.datagen --followups 50000 --users 40 --out /tmp/crm.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import database
+from backend.models import FOLLOWUP_TYPES, PRIORITIES, STATUSES
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+CHUNK_SIZE = 10_000
+USER_PASSWORD = 'bench123'  # every generated user logs in with this
+
+STATUS_WEIGHTS = [40, 40, 5, 15]  # same order as models.STATUSES
+NOTES = ['left voicemail', 'asked for pricing', 'demo booked', 'renewal due',
+         'sent proposal', 'follow up on invoice', 'intro call', 'no answer']
+
+
+def _insert_users(conn, users):
+    password_hash = generate_password_hash(USER_PASSWORD)  # hashing per user would dominate small runs
+    roles = ['Sales Manager'] + ['Sales Executive'] * 9
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+        [(f'bench{i}', password_hash, roles[i % len(roles)]) for i in range(users)]
+    )
+    return [row[0] for row in conn.execute("SELECT id FROM users")]
+
+
+def _followup_rows(rng, start_id, count, user_ids, now):
+    for followup_id in range(start_id, start_id + count):
+        created = now - timedelta(days=rng.randint(0, 180))
+        due = now + timedelta(minutes=rng.randint(-90 * 24 * 60, 90 * 24 * 60))
+        has_lead = rng.random() < 0.7
+        yield (
+            followup_id,
+            f'L-{rng.randint(1, count // 5 + 1)}' if has_lead else None,
+            None if has_lead else f'C-{rng.randint(1, count // 5 + 1)}',
+            rng.choice(FOLLOWUP_TYPES),
+            due.isoformat(timespec='minutes'),
+            rng.choice(PRIORITIES),
+            rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+            rng.choice(user_ids),
+            rng.choice(NOTES),
+            created.isoformat(),
+            created.isoformat(),
+        )
+
+
+def _history_rows(rng, followups, user_ids, history_per_followup):
+    for row in followups:
+        followup_id, created = row[0], datetime.fromisoformat(row[9])
+        yield followup_id, 'Created', None, created.isoformat(), row[7]
+        for step in range(rng.randint(0, 2 * history_per_followup)):
+            yield (
+                followup_id, rng.choice(['Updated', 'Completed', 'Rescheduled', 'Notes Added']),
+                rng.choice(NOTES), (created + timedelta(hours=step + 1)).isoformat(), rng.choice(user_ids),
+            )
+
+
+def generate(path, followups, users=20, history_per_followup=2, seed=42, progress=True):
+    """Fill ``path`` with ``followups`` synthetic rows; return rows/sec."""
+    database.DATABASE = path
+    database.init_db()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-131072")
+    rng = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    user_ids = _insert_users(conn, users)
+    start_id = (conn.execute("SELECT MAX(id) FROM follow_ups").fetchone()[0] or 0) + 1
+    conn.commit()
+
+    started = time.perf_counter()
+    for offset in range(0, followups, CHUNK_SIZE):
+        chunk = list(_followup_rows(rng, start_id + offset, min(CHUNK_SIZE, followups - offset), user_ids, now))
+        with conn:
+            conn.executemany("""
+                INSERT INTO follow_ups (
+                    id, lead_id, customer_id, followup_type, followup_datetime,
+                    priority, status, assigned_to, notes, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+            conn.executemany("""
+                INSERT INTO followup_history (followup_id, action, remarks, action_date, acted_by)
+                VALUES (?, ?, ?, ?, ?)
+            """, _history_rows(rng, chunk, user_ids, history_per_followup))
+        if progress and (offset // CHUNK_SIZE) % 10 == 9:
+            print(f'  {offset + len(chunk):>12,} follow-ups', flush=True)
+
+    with conn:
+        database.bump_data_version(conn.cursor())
+    conn.execute("ANALYZE")
+    conn.close()
+    elapsed = time.perf_counter() - started
+    return followups / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    size.add_argument('--followups', type=int)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--history', type=int, default=2, help='average history rows per follow-up')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='SQLite file to create or extend (default: a new temp file)')
+    args = parser.parse_args()
+
+    path = args.out or os.path.join(tempfile.mkdtemp(prefix='crm-data-'), 'crm.db')
+    count = args.followups if args.followups is not None else SCALES[args.scale]
+    rate = generate(path, count, args.users, args.history, args.seed)
+    print(f'{count:,} follow-ups written to {path} ({rate:,.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""Scenario load test with latency percentiles and a regression baseline.
+
+Generates a synthetic database (see ``benchmarks.datagen``), then drives
+the real app either in-process through the Flask test client or over HTTP
+against a locally started gunicorn. Each scenario runs for a fixed time
+from N threads; the report shows throughput and p50/p95/p99 latency.
+
+    python -m benchmarks.loadtest --followups 10000 --seconds 5
+    python -m benchmarks.loadtest --driver gunicorn --worker-threads 8 --threads 16
+    python -m benchmarks.loadtest --update-baseline          # record
+    python -m benchmarks.loadtest                            # compare, exit 1 on regression
+
+Baselines live in benchmarks/baseline.json keyed by driver, scale and
+scenario, and only make sense on the machine that recorded them.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+from benchmarks.common import database
+from benchmarks.datagen import USER_PASSWORD, generate
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+# --- Drivers: one session per worker thread ---
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, url, body=None):
+        response = self.client.open(url, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, url, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + url, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(name, argv, db_path):
+    """Run ``python -m <argv>`` with a free port substituted for {port}; return (process, base_url)."""
+    port = _free_port()
+    env = dict(os.environ, CRM_DATABASE=db_path)
+    process = subprocess.Popen([sys.executable, '-m'] + [arg.format(port=port) for arg in argv],
+                               cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{name} exited during startup (is it installed?)')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit(f'{name} did not start listening within 30s')
+
+
+def start_gunicorn(db_path, workers, threads):
+    """Start gunicorn on a free port against ``db_path``; return (process, base_url)."""
+    # The deployment config (preload, shared backends), with the sizes overridden
+    return start_server('gunicorn', [
+        'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(workers), '--threads', str(threads),
+        '--bind', '127.0.0.1:{port}', '--log-level', 'warning', 'backend.app:app',
+    ], db_path)
+
+
+def start_uvicorn(db_path):
+    """Start the ASGI entry point under uvicorn; return (process, base_url)."""
+    return start_server('uvicorn', [
+        'uvicorn', 'backend.asgi:app', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning',
+    ], db_path)
+
+
+# --- Scenarios: each call makes one request and returns (expected, status) ---
+
+class Scenario:
+    def __init__(self, name, username='admin', password='admin123'):
+        self.name = name
+        self.username = username
+        self.password = password
+
+    def setup(self, session):
+        status = session.request('POST', '/api/auth/login', {'username': self.username, 'password': self.password})
+        if status != 200:
+            raise SystemExit(f'{self.name}: login as {self.username} failed with {status}')
+
+
+class DashboardPolling(Scenario):
+    def __call__(self, session, rng, ctx):
+        return 200, session.request('GET', '/api/dashboard/')
+
+
+class ListLoad(Scenario):
+    def __call__(self, session, rng, ctx):
+        status = rng.choice(['', '&status=Pending', '&status=Missed'])
+        return 200, session.request('GET', f'/api/followups/?limit=50{status}')
+
+
+class StatusChange(Scenario):
+    def __call__(self, session, rng, ctx):
+        followup_id = rng.randint(1, ctx['followups'])
+        body = {'status': rng.choice(['Completed', 'Pending']), 'remarks': 'load test'}
+        return 200, session.request('PUT', f'/api/followups/{followup_id}/status', body)
+
+
+class BulkCreate(Scenario):
+    size = 100
+
+    def __call__(self, session, rng, ctx):
+        due = (datetime.now() + timedelta(days=rng.randint(1, 30))).isoformat(timespec='minutes')
+        rows = [{
+            'lead_id': f'LT-{rng.randint(1, 10 ** 6)}', 'followup_type': 'Call', 'followup_datetime': due,
+            'priority': 'Low', 'assigned_to': rng.choice(ctx['user_ids']), 'notes': 'bulk load test',
+        } for _ in range(self.size)]
+        return 201, session.request('POST', '/api/followups/bulk', rows)
+
+
+class EntityHistory(Scenario):
+    def __call__(self, session, rng, ctx):
+        lead = rng.randint(1, ctx['followups'] // 5 + 1)
+        return 200, session.request('GET', f'/api/followups/history_by_entity?lead_id=L-{lead}')
+
+
+class LoginStorm(Scenario):
+    def setup(self, session):
+        pass
+
+    def __call__(self, session, rng, ctx):
+        username = f"bench{rng.randrange(ctx['users'])}"
+        return 200, session.request('POST', '/api/auth/login', {'username': username, 'password': USER_PASSWORD})
+
+
+SCENARIOS = {
+    'dashboard': DashboardPolling('dashboard', 'executive1', 'exec123'),
+    'list': ListLoad('list'),
+    'status_change': StatusChange('status_change'),
+    'bulk_create': BulkCreate('bulk_create'),
+    'entity_history': EntityHistory('entity_history'),
+    'login': LoginStorm('login'),
+}
+
+
+# --- Runner ---
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(scenario, make_session, threads, seconds, ctx, seed):
+    sessions = [make_session() for _ in range(threads)]
+    for session in sessions:
+        scenario.setup(session)
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(slot):
+        rng = random.Random(seed + slot)
+        session, samples = sessions[slot], latencies[slot]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            expected, status = scenario(session, rng, ctx)
+            samples.append(time.perf_counter() - started)
+            if status != expected:
+                errors[slot] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(s for slot in latencies for s in slot)
+    return {
+        'requests': len(samples),
+        'errors': sum(errors),
+        'rps': len(samples) / elapsed,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+    }
+
+
+def scenario_context(db_path):
+    """What the scenarios need to know about a generated database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            'followups': conn.execute("SELECT MAX(id) FROM follow_ups").fetchone()[0] or 1,
+            'users': conn.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'bench%'").fetchone()[0] or 1,
+            'user_ids': [row[0] for row in conn.execute("SELECT id FROM users")],
+        }
+    finally:
+        conn.close()
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if result['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rps']:.0f} req/s vs baseline {base['rps']:.0f} req/s")
+        if result['errors'] > base['errors']:
+            regressions.append(f"{key}: {result['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--driver', choices=['testclient', 'gunicorn'], default='testclient')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset')
+    parser.add_argument('--followups', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--db', help='reuse an existing generated database instead of generating one')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--worker-threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed fractional slowdown')
+    args = parser.parse_args()
+
+    # Every simulated client shares one address; the login storm measures hashing, not the limiter
+    os.environ.setdefault('CRM_LOGIN_IP_LIMIT', '1000000/1')
+    os.environ.setdefault('CRM_LOGIN_USER_LIMIT', '1000000/1')
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='crm-load-'), 'crm.db')
+    if not args.db:
+        print(f'Generating {args.followups:,} follow-ups into {db_path}')
+        generate(db_path, args.followups, args.users, seed=args.seed, progress=False)
+    database.DATABASE = db_path
+    ctx = scenario_context(db_path)
+
+    server = None
+    if args.driver == 'gunicorn':
+        server, base_url = start_gunicorn(db_path, args.workers, args.worker_threads)
+        make_session = lambda: HttpSession(base_url)  # noqa: E731
+    else:
+        from backend.app import app
+        make_session = lambda: TestClientSession(app)  # noqa: E731
+
+    scale = f"{ctx['followups'] // 1000}k"
+    results = {}
+    try:
+        print(f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in names:
+            result = run_scenario(SCENARIOS[name], make_session, args.threads, args.seconds, ctx, args.seed)
+            results[f'{args.driver}/{scale}/{name}'] = result
+            print(f"{name:<16}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                  f"{result['p99_ms']:>10.2f}{result['errors']:>8}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f'REGRESSION {line}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -87,9 +87,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (currentRoleSpan) currentRoleSpan.textContent = userData.role;
             }
         } catch (error) {
+            // Offline: the service worker serves the cached page and data, and
+            // the server still rejects any request without a valid session
             console.error('Auth check error:', error);
-            // Even if there's a network error, assume not logged in for security
-            window.location.href = '/login';
         }
     }
 
@@ -97,8 +97,31 @@ document.addEventListener('DOMContentLoaded', () => {
     if (window.location.pathname !== '/login') {
         checkAuthAndRedirect();
     }
+
+    // Offline support: cached reads and an outbox for writes made offline
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/service-worker.js');
+        const replayOutbox = () => navigator.serviceWorker.ready
+            .then(registration => registration.active && registration.active.postMessage({ type: 'replay-outbox' }));
+        window.addEventListener('online', replayOutbox);
+        replayOutbox();
+    }
 });
 
+/**
+ * Run a handler for messages of one type from the service worker:
+ * 'api-updated' ({url}) when a cached API response turned out stale, and
+ * 'outbox-replayed' ({sent, rejected}) after queued offline writes were sent.
+ * @param {string} type - The message type.
+ * @param {function} handler - Called with the message data.
+ */
+function onServiceWorkerMessage(type, handler) {
+    if (!('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.addEventListener('message', (event) => {
+        if (event.data && event.data.type === type) handler(event.data);
+    });
+}
+
 /**
  * Helper function to retrieve the current user's role.
  * @returns {string|null} The user's role (e.g., 'Admin', 'Sales Manager', 'Sales Executive') or null if not set.
@@ -128,4 +151,40 @@ async function authenticatedFetch(url, options = {}) {
         window.location.href = '/login';
     }
     return response;
-}
\ No newline at end of file
+}
+/**
+ * GET a JSON endpoint with If-None-Match, reusing the last body on 304.
+ * Bodies are kept in sessionStorage so repeat loads across pages skip both
+ * the server-side query and the payload.
+ * @param {string} url - The URL to fetch.
+ * @param {object} options - Extra fetch options; { cache: 'no-cache' } skips the service worker's cached copy.
+ * @returns {Promise<Response>} The fetch response, or a rebuilt 200 response on 304.
+ */
+async function conditionalFetch(url, options = {}) {
+    const storageKey = `etag:${url}`;
+    let cached = null;
+    try {
+        cached = JSON.parse(sessionStorage.getItem(storageKey));
+    } catch (error) {
+        cached = null;
+    }
+
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await authenticatedFetch(url, { ...options, method: 'GET', headers });
+
+    if (response.status === 304 && cached) {
+        return new Response(cached.body, { status: 200, headers: { 'Content-Type': 'application/json' } });
+    }
+
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        const body = await response.clone().text();
+        try {
+            sessionStorage.setItem(storageKey, JSON.stringify({ etag, body }));
+        } catch (error) {
+            // Storage full: fall back to plain requests for this URL
+            sessionStorage.removeItem(storageKey);
+        }
+    }
+    return response;
+}
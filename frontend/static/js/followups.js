@@ -39,11 +39,19 @@ document.addEventListener('DOMContentLoaded', () => {
     const priorityFilter = document.getElementById('priority-filter');
     const assignedFilter = document.getElementById('assigned-filter');
     const searchInput = document.getElementById('search-input');
-
-    let allFollowups = []; // Cache all follow-ups for client-side filtering
+    const loadMoreBtn = document.getElementById('load-more-btn');
+
+    const PAGE_SIZE = 50;
+    const LIVE_REFRESH_LIMIT = 20; // Larger change batches reload the first page instead
+    let loadedFollowups = []; // Pages fetched so far for the current filters
+    let nextCursor = null; // Keyset cursor for the next page, null when exhausted
+    let searchTimer = null;
+    let liveUpdates = null; // EventSource for server-sent change events
     let users = []; // Cache users for assigned_to dropdown
 
     const currentUserRole = getCurrentUserRole(); // From auth.js
+    // From the server-rendered template, so the page does not need /api/auth/me
+    const currentUserId = document.getElementById('current-user-id') ? parseInt(document.getElementById('current-user-id').textContent) : null;
 
     // --- Event Listeners ---
     addFollowupBtn.addEventListener('click', () => openFollowupModal());
@@ -66,15 +74,33 @@ document.addEventListener('DOMContentLoaded', () => {
     followupForm.addEventListener('submit', handleFollowupFormSubmit);
     rescheduleForm.addEventListener('submit', handleRescheduleFormSubmit);
 
-    // Filter change listeners
-    statusFilter.addEventListener('change', renderFollowups);
-    typeFilter.addEventListener('change', renderFollowups);
-    priorityFilter.addEventListener('change', renderFollowups);
-    assignedFilter.addEventListener('change', renderFollowups);
-    searchInput.addEventListener('input', renderFollowups);
+    // Filter change listeners: filtering happens on the server, one page at a time
+    statusFilter.addEventListener('change', () => loadFollowups());
+    typeFilter.addEventListener('change', () => loadFollowups());
+    priorityFilter.addEventListener('change', () => loadFollowups());
+    assignedFilter.addEventListener('change', () => loadFollowups());
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadFollowups(), 300);
+    });
+    loadMoreBtn.addEventListener('click', () => loadFollowups(true));
 
     // Initial load
     fetchUsersAndFollowups();
+    connectLiveUpdates();
+
+    // The service worker answered from its cache and has since seen newer data
+    onServiceWorkerMessage('api-updated', ({ url }) => {
+        if (url === `/api/followups/?${buildListQuery(null)}`) loadFollowups();
+    });
+    // Writes queued while offline have been sent
+    onServiceWorkerMessage('outbox-replayed', ({ rejected }) => {
+        loadFollowups(false, true);
+        if (rejected.length) {
+            alert(`${rejected.length} change(s) made offline were rejected:\n` +
+                  rejected.map(r => r.message || `HTTP ${r.status}`).join('\n'));
+        }
+    });
 
     // Check URL for pre-filling add form
     const urlParams = new URLSearchParams(window.location.search);
@@ -87,34 +113,122 @@ document.addEventListener('DOMContentLoaded', () => {
 
     async function fetchUsersAndFollowups() {
         try {
-            // Fetch users for dropdowns
-            const userResponse = await authenticatedFetch('/api/auth/users');
-            if (!userResponse.ok) throw new Error('Failed to fetch users.');
-            users = await userResponse.json();
+            // Fetch users for dropdowns; a Sales Executive can only assign to themselves
+            if (currentUserRole === 'Sales Executive') {
+                users = [{
+                    id: currentUserId,
+                    username: document.getElementById('current-username').textContent,
+                    role: currentUserRole
+                }];
+            } else {
+                const userResponse = await conditionalFetch('/api/auth/users');
+                if (!userResponse.ok) throw new Error('Failed to fetch users.');
+                users = await userResponse.json();
+            }
             populateAssignedToDropdown(assignedToField, users);
             populateAssignedToDropdown(assignedFilter, users, true); // For filter
 
-            // Fetch follow-ups
-            const followupResponse = await authenticatedFetch('/api/followups/', {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json'
-                }
-            });
+            await loadFollowups();
+
+        } catch (error) {
+            console.error('Error initialising page:', error);
+            followupListTable.innerHTML = `<tr><td colspan="9" class="error-message">Error loading data: ${error.message}</td></tr>`;
+        }
+    }
+
+    function buildListQuery(cursor) {
+        const params = new URLSearchParams({ limit: PAGE_SIZE });
+        if (statusFilter.value) params.set('status', statusFilter.value);
+        if (typeFilter.value) params.set('type', typeFilter.value);
+        if (priorityFilter.value) params.set('priority', priorityFilter.value);
+        if (assignedFilter.value) params.set('assigned_to', assignedFilter.value);
+        if (searchInput.value.trim()) params.set('search', searchInput.value.trim());
+        if (cursor) params.set('cursor', cursor);
+        return params.toString();
+    }
+
+    // Fetch the first page for the current filters, or append the next page
+    async function loadFollowups(append = false, fresh = false) {
+        try {
+            const response = await conditionalFetch(`/api/followups/?${buildListQuery(append ? nextCursor : null)}`,
+                                                    fresh ? { cache: 'no-cache' } : {});
 
-            if (!followupResponse.ok) {
-                const errorData = await followupResponse.json();
+            if (!response.ok) {
+                const errorData = await response.json();
                 throw new Error(errorData.message || 'Failed to fetch follow-ups.');
             }
-            allFollowups = await followupResponse.json();
+            const page = await response.json();
+            loadedFollowups = append ? loadedFollowups.concat(page.items) : page.items;
+            nextCursor = page.next_cursor;
             renderFollowups();
 
         } catch (error) {
-            console.error('Error initialising page:', error);
+            console.error('Error loading follow-ups:', error);
             followupListTable.innerHTML = `<tr><td colspan="9" class="error-message">Error loading data: ${error.message}</td></tr>`;
         }
     }
 
+    // --- Live updates ---
+
+    function connectLiveUpdates() {
+        if (!window.EventSource) return;
+        liveUpdates = new EventSource('/api/events/stream');
+        ['followup.created', 'followup.updated', 'followup.status'].forEach(type => {
+            liveUpdates.addEventListener(type, (e) => refreshFollowups(JSON.parse(e.data).ids));
+        });
+        liveUpdates.addEventListener('resync', () => loadFollowups(false, true));
+    }
+
+    // Our own writes arrive as events too; only fetch them directly when the stream is down
+    function applyOwnWrite(ids) {
+        if (!liveUpdates || liveUpdates.readyState !== EventSource.OPEN) {
+            refreshFollowups(ids);
+        }
+    }
+
+    // The server saves regardless; it only reports other open follow-ups due close by
+    function warnConflicts(conflicts) {
+        if (conflicts && conflicts.length) {
+            alert('Saved, but the assignee has other open follow-ups close to this time:\n' +
+                  conflicts.map(c => `#${c.id} ${c.followup_type} at ${new Date(c.followup_datetime).toLocaleString()}`).join('\n'));
+        }
+    }
+
+    function matchesFilters(followup) {
+        return (statusFilter.value === '' || followup.status === statusFilter.value) &&
+               (typeFilter.value === '' || followup.followup_type === typeFilter.value) &&
+               (priorityFilter.value === '' || followup.priority === priorityFilter.value) &&
+               (assignedFilter.value === '' || followup.assigned_to == assignedFilter.value);
+    }
+
+    // Fetch only the changed rows and merge them into the loaded pages
+    async function refreshFollowups(ids) {
+        if (ids.length > LIVE_REFRESH_LIMIT || searchInput.value.trim()) {
+            loadFollowups(false, true); // Search ranking and big batches are the server's job
+            return;
+        }
+        try {
+            for (const id of ids) {
+                const response = await conditionalFetch(`/api/followups/${id}`, { cache: 'no-cache' });
+                const index = loadedFollowups.findIndex(f => f.id == id);
+                if (index !== -1) loadedFollowups.splice(index, 1);
+                if (!response.ok) continue; // Deleted or reassigned away from us
+
+                const followup = await response.json();
+                const last = loadedFollowups[loadedFollowups.length - 1];
+                // Rows past the last loaded one belong to a page we have not fetched yet
+                const withinLoadedPages = !nextCursor || !last || followup.followup_datetime <= last.followup_datetime;
+                if (matchesFilters(followup) && withinLoadedPages) {
+                    loadedFollowups.push(followup);
+                }
+            }
+            loadedFollowups.sort((a, b) => a.followup_datetime.localeCompare(b.followup_datetime) || a.id - b.id);
+            renderFollowups();
+        } catch (error) {
+            console.error('Error applying follow-up changes:', error);
+        }
+    }
+
     function populateAssignedToDropdown(selectElement, usersList, isFilter = false) {
         selectElement.innerHTML = '';
         if (isFilter) {
@@ -132,16 +246,9 @@ document.addEventListener('DOMContentLoaded', () => {
         });
 
         // If not a filter and current user is Sales Executive, pre-select them and disable
-        if (!isFilter && currentUserRole === 'Sales Executive') {
-            fetch('/api/auth/me')
-                .then(response => response.json())
-                .then(userData => {
-                    if (userData && userData.user_id) {
-                        selectElement.value = userData.user_id;
-                        selectElement.disabled = true; // Sales Executive can only assign to self
-                    }
-                })
-                .catch(error => console.error('Error fetching current user for dropdown:', error));
+        if (!isFilter && currentUserRole === 'Sales Executive' && currentUserId) {
+            selectElement.value = currentUserId;
+            selectElement.disabled = true; // Sales Executive can only assign to self
         } else {
             selectElement.disabled = false; // Ensure it's not disabled for Admin/Manager/filters
         }
@@ -149,27 +256,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
 
     function renderFollowups() {
-        const filteredFollowups = allFollowups.filter(followup => {
-            const statusMatch = statusFilter.value === '' || followup.status === statusFilter.value;
-            const typeMatch = typeFilter.value === '' || followup.followup_type === typeFilter.value;
-            const priorityMatch = priorityFilter.value === '' || followup.priority === priorityFilter.value;
-            const assignedMatch = assignedFilter.value === '' || followup.assigned_to == assignedFilter.value;
-            const searchLower = searchInput.value.toLowerCase();
-            const searchMatch = searchInput.value === '' ||
-                                (followup.lead_id && followup.lead_id.toLowerCase().includes(searchLower)) ||
-                                (followup.customer_id && followup.customer_id.toLowerCase().includes(searchLower)) ||
-                                (followup.notes && followup.notes.toLowerCase().includes(searchLower));
-            return statusMatch && typeMatch && priorityMatch && assignedMatch && searchMatch;
-        });
-
         followupListTable.innerHTML = ''; // Clear existing rows
+        loadMoreBtn.style.display = nextCursor ? '' : 'none';
 
-        if (filteredFollowups.length === 0) {
+        if (loadedFollowups.length === 0) {
             followupListTable.innerHTML = '<tr><td colspan="9">No follow-ups to display.</td></tr>';
             return;
         }
 
-        filteredFollowups.forEach(followup => {
+        loadedFollowups.forEach(followup => {
             const row = document.createElement('tr');
             row.innerHTML = `
                 <td>${followup.id}</td>
@@ -200,7 +295,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Attach event listeners for dynamically created buttons
         document.querySelectorAll('.edit-btn').forEach(btn => btn.addEventListener('click', (e) => {
             const id = e.target.dataset.id;
-            const followup = allFollowups.find(f => f.id == id);
+            const followup = loadedFollowups.find(f => f.id == id);
             openFollowupModal(followup);
         }));
         document.querySelectorAll('.complete-btn').forEach(btn => btn.addEventListener('click', (e) => {
@@ -211,7 +306,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }));
         document.querySelectorAll('.reschedule-btn').forEach(btn => btn.addEventListener('click', (e) => {
             const id = e.target.dataset.id;
-            const followup = allFollowups.find(f => f.id == id);
+            const followup = loadedFollowups.find(f => f.id == id);
             openRescheduleModal(followup);
         }));
         document.querySelectorAll('.history-btn').forEach(btn => btn.addEventListener('click', (e) => {
@@ -225,9 +320,6 @@ document.addEventListener('DOMContentLoaded', () => {
         }));
     }
 
-    // This is needed because currentUserId is from the server-rendered template
-    const currentUserId = document.getElementById('current-user-id') ? parseInt(document.getElementById('current-user-id').textContent) : null;
-
 
     function openFollowupModal(followup = null) {
         formErrorMessage.textContent = ''; // Clear errors
@@ -313,9 +405,13 @@ document.addEventListener('DOMContentLoaded', () => {
 
             const data = await response.json();
 
-            if (response.ok) {
+            if (response.ok && data.queued) {
+                followupModal.style.display = 'none';
+                alert(data.message); // Offline: the service worker will send it later
+            } else if (response.ok) {
                 followupModal.style.display = 'none';
-                fetchUsersAndFollowups(); // Refresh the list
+                applyOwnWrite([id ? parseInt(id) : data.id]);
+                warnConflicts(data.conflicts);
             } else {
                 formErrorMessage.textContent = data.message || 'Error saving follow-up.';
             }
@@ -337,10 +433,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 const errorData = await response.json();
                 throw new Error(errorData.message || `Failed to update status to ${newStatus}`);
             }
+            const queued = response.status === 202 && (await response.json()).queued;
 
             // Optionally auto-create next follow-up after marking completed
             if (newStatus === 'Completed') {
-                const followup = allFollowups.find(f => f.id == id);
+                const followup = loadedFollowups.find(f => f.id == id);
                 if (confirm('Follow-up completed! Do you want to schedule a new follow-up for this Lead/Customer?')) {
                     openFollowupModal(null); // Open a new form
                     leadIdField.value = followup.lead_id || '';
@@ -357,7 +454,14 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             }
 
-            fetchUsersAndFollowups(); // Refresh the list
+            if (queued) {
+                // Offline: show the change now, the outbox sends it later
+                const followup = loadedFollowups.find(f => f.id == id);
+                if (followup) followup.status = newStatus;
+                renderFollowups();
+            } else {
+                applyOwnWrite([parseInt(id)]);
+            }
         } catch (error) {
             console.error('Error updating follow-up status:', error);
             alert(`Failed to update status: ${error.message}`);
@@ -395,7 +499,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         try {
             // First, update the datetime and notes (if any)
-            const currentFollowup = allFollowups.find(f => f.id == id);
+            const currentFollowup = loadedFollowups.find(f => f.id == id);
             const updatedNotes = remarks ? `${currentFollowup.notes || ''}\nRescheduled: ${new Date().toLocaleString()} - ${remarks}`.trim() : currentFollowup.notes;
 
             const updateResponse = await authenticatedFetch(`/api/followups/${id}`, {
@@ -430,7 +534,8 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
             rescheduleModal.style.display = 'none';
-            fetchUsersAndFollowups(); // Refresh the list
+            applyOwnWrite([parseInt(id)]);
+            warnConflicts((await updateResponse.json()).conflicts);
         } catch (error) {
             console.error('Reschedule error:', error);
             rescheduleErrorMessage.textContent = `Error rescheduling: ${error.message}`;
@@ -444,10 +549,7 @@ document.addEventListener('DOMContentLoaded', () => {
         historyModal.style.display = 'block';
 
         try {
-            const response = await authenticatedFetch(`/api/followups/${followupId}/history`, {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' }
-            });
+            const response = await conditionalFetch(`/api/followups/${followupId}/history`);
 
             if (!response.ok) {
                 const errorData = await response.json();
@@ -1,41 +1,41 @@
 document.addEventListener('DOMContentLoaded', () => {
 
-    if ("serviceWorker" in navigator) {
-        navigator.serviceWorker.register("/static/service-worker.js");
-    }
-
     const dashboardContainer = document.querySelector('.dashboard');
-    if (dashboardContainer) {
-        loadDashboardData();
-    }
-
-    async function loadDashboardData() {
-        try {
-            const response = await fetch('/api/dashboard');
+    const DASHBOARD_POLL_MS = 60000;
 
-            const data = await response.json();
-
-            document.getElementById('pending-count').innerText = data.pending_count;
-            document.getElementById('missed-count').innerText = data.missed_count;
+    let refreshTimer = null;
 
-        } catch (err) {
-            console.error(err);
+    if (dashboardContainer) {
+        loadDashboardData();
+        // Reload when the server reports a change, coalescing bursts of events
+        if (window.EventSource) {
+            const liveUpdates = new EventSource('/api/events/stream');
+            ['followup.created', 'followup.updated', 'followup.status', 'resync'].forEach(type => {
+                liveUpdates.addEventListener(type, () => {
+                    clearTimeout(refreshTimer);
+                    refreshTimer = setTimeout(() => loadDashboardData(true), 500);
+                });
+            });
         }
+        // The service worker answered from its cache and has since seen newer data
+        onServiceWorkerMessage('api-updated', ({ url }) => {
+            if (url === '/api/dashboard/') loadDashboardData();
+        });
+        onServiceWorkerMessage('outbox-replayed', () => loadDashboardData(true));
+        // Fallback poll keeps the "next 24h" window moving; the server caches per user
+        setInterval(() => {
+            if (document.visibilityState === 'visible') loadDashboardData();
+        }, DASHBOARD_POLL_MS);
     }
 
-    async function loadDashboardData() {
+    async function loadDashboardData(fresh = false) {
         const pendingCountElem = document.getElementById('pending-count');
         const missedCountElem = document.getElementById('missed-count');
         const upcomingListElem = document.getElementById('upcoming-list');
         const missedListElem = document.getElementById('missed-list');
 
         try {
-            const response = await authenticatedFetch('/api/dashboard/', {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json'
-                }
-            });
+            const response = await conditionalFetch('/api/dashboard/', fresh ? { cache: 'no-cache' } : {});
 
             if (!response.ok) {
                 const errorData = await response.json();
@@ -0,0 +1,221 @@
+// Rendered by backend/app.py at /service-worker.js. CACHE_VERSION changes
+// whenever a static file or this script changes, which installs a new
+// worker; activating it deletes every cache of older versions.
+const CACHE_VERSION = {{ cache_version|tojson }};
+const STATIC_CACHE = `crm-static-${CACHE_VERSION}`;
+const PAGE_CACHE = `crm-pages-${CACHE_VERSION}`;
+const API_CACHE = `crm-api-${CACHE_VERSION}`;
+const PRECACHE_URLS = {{ precache_urls|tojson }};
+
+const PAGES = ['/', '/followups'];
+// GET endpoints answered from cache first and refreshed in the background
+const STALE_WHILE_REVALIDATE = ['/api/followups/', '/api/dashboard/'];
+const NETWORK_ONLY = ['/api/followups/export', '/api/followups/history_by_entity/export'];
+// Writes that are queued in the outbox when the network is down
+const OUTBOX_ROUTES = [
+    { method: 'POST', pattern: /^\/api\/followups\/$/ },
+    { method: 'PUT', pattern: /^\/api\/followups\/\d+\/status$/ },
+];
+const OUTBOX_DB = 'crm-outbox';
+const OUTBOX_STORE = 'requests';
+const OUTBOX_SYNC_TAG = 'crm-outbox';
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    const current = [STATIC_CACHE, PAGE_CACHE, API_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(name => !current.includes(name)).map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+            .then(() => replayOutbox())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (url.pathname === '/api/auth/login' || url.pathname === '/api/auth/logout') {
+        event.respondWith(changeSession(request));
+        return;
+    }
+    if (OUTBOX_ROUTES.some(route => route.method === request.method && route.pattern.test(url.pathname))) {
+        event.respondWith(sendOrQueue(request));
+        return;
+    }
+    if (request.method !== 'GET') return;
+
+    if (request.mode === 'navigate' && PAGES.includes(url.pathname)) {
+        event.respondWith(networkFirst(request, PAGE_CACHE));
+    } else if (PRECACHE_URLS.includes(url.pathname + url.search)) {
+        event.respondWith(caches.match(request).then(cached => cached || fetch(request)));
+    } else if (STALE_WHILE_REVALIDATE.some(prefix => url.pathname.startsWith(prefix))
+               && !NETWORK_ONLY.includes(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event, request));
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === OUTBOX_SYNC_TAG) event.waitUntil(replayOutbox());
+});
+
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'replay-outbox') event.waitUntil(replayOutbox());
+});
+
+function notifyClients(message) {
+    return self.clients.matchAll({ type: 'window' })
+        .then(clients => clients.forEach(client => client.postMessage(message)));
+}
+
+// --- Reads ---
+
+async function networkFirst(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    try {
+        const response = await fetch(request);
+        if (response.ok && !response.redirected) await cache.put(request, response.clone());
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request);
+        if (cached) return cached;
+        throw error;
+    }
+}
+
+// Cached responses belong to one session; drop them when it changes
+async function changeSession(request) {
+    await Promise.all([caches.delete(API_CACHE), caches.delete(PAGE_CACHE)]);
+    const response = await fetch(request);
+    if (response.ok && new URL(request.url).pathname === '/api/auth/login') replayOutbox();
+    return response;
+}
+
+async function staleWhileRevalidate(event, request) {
+    const cache = await caches.open(API_CACHE);
+    const cached = await cache.match(request.url);
+    // A caller asking for fresh data (live updates, own writes) waits for the network
+    if (!cached || request.cache === 'no-cache') {
+        try {
+            return await revalidate(cache, request.url, cached);
+        } catch (error) {
+            if (cached) return cached;
+            throw error;
+        }
+    }
+    event.waitUntil(revalidate(cache, request.url, cached, true).catch(() => {}));
+    return cached;
+}
+
+// Fetch with the cached ETag; on a change, store it and optionally tell the pages
+async function revalidate(cache, key, cached, notify = false) {
+    const etag = cached ? cached.headers.get('ETag') : null;
+    const response = await fetch(key, {
+        credentials: 'same-origin',
+        cache: 'no-cache',
+        headers: etag ? { 'If-None-Match': etag } : {},
+    });
+    if (response.status === 304 && cached) return cached;
+    if (response.ok) {
+        await cache.put(key, response.clone());
+        if (notify && response.headers.get('ETag') !== etag) {
+            const url = new URL(key);
+            await notifyClients({ type: 'api-updated', url: url.pathname + url.search });
+        }
+    } else if (response.status === 401) {
+        await cache.delete(key);
+    }
+    return response;
+}
+
+// --- Writes and the outbox ---
+
+function outbox(mode, work) {
+    return new Promise((resolve, reject) => {
+        const open = indexedDB.open(OUTBOX_DB, 1);
+        open.onupgradeneeded = () => open.result.createObjectStore(OUTBOX_STORE, { keyPath: 'id', autoIncrement: true });
+        open.onerror = () => reject(open.error);
+        open.onsuccess = () => {
+            const db = open.result;
+            const transaction = db.transaction(OUTBOX_STORE, mode);
+            const result = work(transaction.objectStore(OUTBOX_STORE));
+            transaction.oncomplete = () => { db.close(); resolve(result.result); };
+            transaction.onerror = () => { db.close(); reject(transaction.error); };
+        };
+    });
+}
+
+function send(entry) {
+    return fetch(entry.url, {
+        method: entry.method,
+        headers: new Headers(entry.headers),
+        body: entry.body,
+        credentials: 'same-origin',
+    });
+}
+
+async function sendOrQueue(request) {
+    const headers = new Headers(request.headers);
+    if (!headers.has('Idempotency-Key')) headers.set('Idempotency-Key', self.crypto.randomUUID());
+    const entry = {
+        method: request.method,
+        url: request.url,
+        headers: [...headers],
+        body: await request.text(),
+        queued_at: new Date().toISOString(),
+    };
+    await replayOutbox(); // keep writes in order behind anything already queued
+    try {
+        return await send(entry);
+    } catch (error) {
+        await outbox('readwrite', store => store.add(entry));
+        if (self.registration.sync) self.registration.sync.register(OUTBOX_SYNC_TAG).catch(() => {});
+        return new Response(JSON.stringify({
+            message: 'Saved offline; it will be sent when the connection returns.',
+            queued: true,
+        }), { status: 202, headers: { 'Content-Type': 'application/json' } });
+    }
+}
+
+let replaying = null;
+
+function replayOutbox() {
+    if (!replaying) replaying = drainOutbox().finally(() => { replaying = null; });
+    return replaying;
+}
+
+// Send queued writes oldest first in one pass. The Idempotency-Key stored
+// with each one makes a write that reached the server before the
+// connection dropped a no-op on replay.
+async function drainOutbox() {
+    const entries = await outbox('readonly', store => store.getAll());
+    let sent = 0;
+    const rejected = [];
+    for (const entry of entries) {
+        let response;
+        try {
+            response = await send(entry);
+        } catch (error) {
+            break; // Still offline
+        }
+        // Logged out, still in progress or a server error: keep it for the next pass
+        if (response.status === 401 || response.status === 409 || response.status >= 500) break;
+        await outbox('readwrite', store => store.delete(entry.id));
+        if (response.ok) {
+            sent++;
+        } else {
+            const data = await response.json().catch(() => ({}));
+            rejected.push({ url: new URL(entry.url).pathname, status: response.status, message: data.message });
+        }
+    }
+    if (sent || rejected.length) await notifyClients({ type: 'outbox-replayed', sent, rejected });
+    return sent;
+}
@@ -0,0 +1,49 @@
+"""gunicorn settings for running the app on several worker processes.
+
+    gunicorn -c gunicorn.conf.py backend.app:app
+
+Workers default to one per core. SQLite allows one writer at a time, but
+reads run in parallel across processes, and most requests are reads. Each
+worker runs CRM_THREADS threads, because requests spend much of their time
+waiting on SQLite I/O and on open live-update streams.
+
+The app is preloaded: the master builds it, loads the session secret and
+migrates the database once, then forks the workers. Background threads
+start in each worker after the fork (post_fork), never in the master.
+Workers share everything they must agree on through files next to the
+database: the session secret, the scheduler lease, live-update events and
+the login rate limits.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get('CRM_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('CRM_THREADS', 8))
+worker_class = 'gthread'
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Read by the app at import, which with preload_app happens after this file runs
+os.environ.setdefault('CRM_EVENTS_BACKEND', 'file')
+os.environ.setdefault('CRM_RATE_LIMIT_BACKEND', 'sqlite')
+
+
+def when_ready(server):
+    # Migrate once here rather than racing in every worker, then drop the
+    # master's SQLite handle: workers must not share it
+    from backend.database import close_db_connection, ensure_db
+    ensure_db()
+    close_db_connection()
+
+
+def post_fork(server, worker):
+    from backend.app import start_background
+    start_background()
+
+
+def worker_exit(server, worker):
+    from backend.scheduler import missed_scheduler
+    missed_scheduler.resign()
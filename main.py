@@ -1,10 +1,8 @@
-import sys
 import os
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
-
-from backend.app import app
+from backend.app import app, start_background
 
 if __name__ == "__main__":
+    start_background()
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,64 @@
+import os
+
+# Every test logs in from the same address; the login limiter has its own test
+os.environ.setdefault('CRM_LOGIN_IP_LIMIT', '1000000/1')
+os.environ.setdefault('CRM_LOGIN_USER_LIMIT', '1000000/1')
+
+import pytest  # noqa: E402
+
+from benchmarks.common import login, make_app  # noqa: E402
+from backend import database  # noqa: E402
+
+EXECUTIVE_ID = 3  # seeded users: admin 1, manager 2, executive1 3
+
+
+@pytest.fixture
+def app():
+    """The app on a fresh database file of its own."""
+    return make_app()
+
+
+@pytest.fixture
+def admin(app):
+    return login(app)
+
+
+@pytest.fixture
+def executive(app):
+    return login(app, 'executive1', 'exec123')
+
+
+@pytest.fixture
+def db(app):
+    """This thread's connection to the test's database."""
+    return database.get_db_connection()
+
+
+def followup(**fields):
+    """A valid create/import body; keyword arguments override its fields."""
+    body = {
+        'lead_id': 'L-1',
+        'followup_type': 'Call',
+        'followup_datetime': '2030-01-01T10:00',
+        'priority': 'Low',
+        'assigned_to': EXECUTIVE_ID,
+        'notes': None,
+    }
+    body.update(fields)
+    return body
+
+
+def create(client, **fields):
+    response = client.post('/api/followups/', json=followup(**fields))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def walk(page):
+    """Ids from every page of page(cursor) -> (rows, next_cursor), first to last."""
+    seen, cursor = [], None
+    while True:
+        rows, cursor = page(cursor)
+        seen.extend(row['id'] for row in rows)
+        if cursor is None:
+            return seen
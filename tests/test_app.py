@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from backend import database
+from backend.app import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_create_app_leaves_the_database_to_the_first_request(tmp_path):
+    path = str(tmp_path / 'lazy.db')
+    app = create_app({'DATABASE': path, 'SECRET_KEY': 'test'})
+    assert not os.path.exists(path)
+
+    response = app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    assert path in database._ready
+    conn = database.get_db_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+
+
+def test_importing_the_entry_point_starts_nothing(tmp_path):
+    # A fresh interpreter, as gunicorn would import it
+    script = (
+        "import threading, backend.app;"
+        "assert backend.app._app is None;"
+        "import main;"
+        "assert backend.app._app is not None;"
+        "assert threading.active_count() == 1, threading.enumerate()"
+    )
+    env = dict(os.environ, CRM_DATABASE=str(tmp_path / 'cold.db'), CRM_SECRET_KEY='test')
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True, timeout=60)
+    assert not os.path.exists(tmp_path / 'cold.db')
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from backend import archive, database, models
+
+from .conftest import create
+
+
+def test_history_export_touches_the_database_only_once_iterated(app, monkeypatch):
+    # Async callers drive the iterator on the SQLite thread, so creating it must do no I/O
+    calls = []
+    monkeypatch.setattr(models, 'get_db_connection',
+                        lambda: calls.append(1) or database.get_db_connection())
+    batches = models.iter_lead_customer_history('lead_id', 'L-1', 1, 'Admin')
+    assert calls == []
+    assert list(batches) == [] and calls
+
+
+def _archive_all():
+    # Everything closed counts as old a day from now
+    return archive.archive_closed(days=0, now=datetime.now() + timedelta(days=1))
+
+
+def test_closed_follow_ups_move_to_the_archive_and_still_read_back(admin, db):
+    closed = create(admin, lead_id='L-1')
+    open_ = create(admin, lead_id='L-1')
+    admin.put(f'/api/followups/{closed}/status', json={'status': 'Completed', 'remarks': 'done'})
+    before = models.get_followup_history(closed)
+    entity_before = models.get_lead_customer_history('lead_id', 'L-1')
+
+    assert _archive_all() == 1
+    assert archive.stats() == {'hot_followups': 1, 'hot_history': 1,
+                               'archived_followups': 1, 'archived_history': 2}
+    assert db.execute("SELECT id FROM follow_ups").fetchall()[0][0] == open_
+
+    # One follow-up's history, and a lead's history as a UNION of both tiers
+    assert models.get_followup_history(closed) == before
+    assert models.get_followup_history(closed, scope_user_id=1) is None
+    assert models.get_lead_customer_history('lead_id', 'L-1') == entity_before
+    exported = [row for batch in models.iter_lead_customer_history('lead_id', 'L-1', 1, 'Admin')
+                for row in batch]
+    assert sorted(row['id'] for row in exported) == sorted(row['id'] for row in entity_before)
+
+    # Counters drop the moved row with it
+    assert database.verify_counters(db.cursor()) == []
+
+
+def test_open_and_recent_follow_ups_stay_hot(admin):
+    create(admin)
+    recent = create(admin)
+    admin.put(f'/api/followups/{recent}/status', json={'status': 'Missed'})
+    assert archive.archive_closed(days=30) == 0
+    assert archive.stats()['hot_followups'] == 2
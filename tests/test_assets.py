@@ -0,0 +1,61 @@
+import gzip
+import os
+
+import pytest
+
+from backend import assets
+
+from .conftest import create
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    """Assets built into a directory of the test's own."""
+    monkeypatch.setattr(assets, 'ASSET_DIR', str(tmp_path))
+    monkeypatch.setattr(assets, '_manifest', assets.build(str(tmp_path)))
+    monkeypatch.setattr(assets, '_precache', None)
+    return tmp_path
+
+
+def test_build_fingerprints_and_precompresses(built):
+    name = assets.manifest()['css/style.css']
+    assert name.startswith('css/style.') and name.endswith('.css') and name != 'css/style.css'
+    with open(built / name, 'rb') as f, open(os.path.join(assets.STATIC_DIR, 'css/style.css'), 'rb') as src:
+        assert f.read() == src.read()
+    with gzip.open(built / (name + '.gz')) as f:
+        assert f.read() == (built / name).read_bytes()
+
+    mtime = os.stat(built / name).st_mtime_ns
+    assert assets.build(str(built)) == assets.manifest()
+    assert os.stat(built / name).st_mtime_ns == mtime
+
+
+def test_assets_are_immutable_and_served_compressed(app, built):
+    client = app.test_client()
+    url = f"/assets/{assets.manifest()['css/style.css']}"
+    plain = client.get(url)
+    assert plain.status_code == 200
+    assert plain.headers['Cache-Control'] == f'public, max-age={assets.ASSET_MAX_AGE}, immutable'
+    assert 'Accept-Encoding' in plain.headers['Vary'] and 'Content-Encoding' not in plain.headers
+
+    zipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.data) == plain.data
+    assert client.get('/assets/css/style.css').status_code == 404
+
+
+def test_pages_link_the_fingerprinted_names(app, built):
+    page = app.test_client().get('/login').get_data(as_text=True)
+    assert f"/assets/{assets.manifest()['css/style.css']}" in page
+
+
+def test_large_json_is_gzipped_with_a_weak_tag(admin):
+    for i in range(20):
+        create(admin, notes='call back about the renewal quote ' * 3)
+    response = admin.get('/api/followups/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(response.data)) > len(response.data)
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    again = admin.get('/api/followups/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304
@@ -0,0 +1,44 @@
+from backend import database
+
+from .conftest import create, followup
+
+
+def _statements(monkeypatch):
+    seen = []
+    monkeypatch.setattr(database, 'query_observers',
+                        database.query_observers + [lambda sql, seconds, rows: seen.append(sql)])
+    return seen
+
+
+def test_executives_cannot_touch_someone_elses_follow_up(admin, executive, db):
+    theirs = create(admin, assigned_to=1, notes='admin only')
+    assert executive.put(f'/api/followups/{theirs}', json=followup(notes='mine now')).status_code == 404
+    assert executive.put(f'/api/followups/{theirs}/status', json={'status': 'Completed'}).status_code == 404
+    assert executive.get(f'/api/followups/{theirs}/history').status_code == 404
+    assert tuple(db.execute("SELECT notes, status FROM follow_ups WHERE id = ?", (theirs,)).fetchone()) == \
+        ('admin only', 'Pending')
+
+    mine = create(admin)
+    response = executive.put('/api/followups/bulk/status', json={'ids': [mine, theirs], 'status': 'Completed'})
+    assert response.status_code == 207
+    assert [error['id'] for error in response.get_json()['errors']] == [theirs]
+
+
+def test_owners_and_admins_can_write(admin, executive):
+    mine = create(admin)
+    assert executive.put(f'/api/followups/{mine}/status', json={'status': 'Completed'}).status_code == 200
+    assert executive.put(f'/api/followups/{mine}/status', json={'status': 'Missed'}).status_code == 403
+    assert admin.put(f'/api/followups/{mine}/status', json={'status': 'Missed'}).status_code == 200
+
+
+def test_permission_checks_need_no_extra_queries(app, executive, monkeypatch):
+    seen = _statements(monkeypatch)
+    assert app.test_client().get('/api/followups/').status_code == 401
+    assert seen == []
+
+    # The ownership check is part of the write itself: no users lookup, no separate fetch
+    followup_id = create(executive)
+    seen.clear()
+    assert executive.put(f'/api/followups/{followup_id}/status', json={'status': 'Completed'}).status_code == 200
+    assert not any('FROM users' in sql for sql in seen)
+    assert sum(sql.lstrip().startswith('SELECT') and 'follow_ups' in sql for sql in seen) == 1
@@ -0,0 +1,70 @@
+import json
+
+from backend import database, models
+
+from .conftest import create, followup
+
+
+def test_due_times_are_stored_in_one_canonical_form(admin, db):
+    rows = [followup(followup_datetime=due) for due in
+            ('2030-01-01 09:15', '2030-01-01T09:15:30.250', '2030-01-01')]
+    response = admin.post('/api/followups/bulk', json=rows)
+    assert response.status_code == 201
+    stored = [row[0] for row in db.execute("SELECT followup_datetime FROM follow_ups ORDER BY id")]
+    assert stored == ['2030-01-01T09:15', '2030-01-01T09:15:30', '2030-01-01T00:00']
+
+
+def test_offsets_are_converted_to_local_time():
+    local = models.normalize_followup_datetime('2030-01-01T23:30:00-05:00')
+    assert len(local) == 16 and 'T' in local and '+' not in local
+
+
+def test_single_row_writes_store_the_same_form(admin, db):
+    followup_id = create(admin, followup_datetime='2030-01-01 09:15:00')
+    assert admin.put(f'/api/followups/{followup_id}',
+                     json=followup(followup_datetime='2030-01-02T08:00:00.5')).status_code == 200
+    assert db.execute("SELECT followup_datetime FROM follow_ups").fetchone()[0] == '2030-01-02T08:00'
+
+
+def test_migration_rewrites_rows_stored_before_normalisation(app, db):
+    stored = ['2030-01-01T10:00', '2030-01-01T10:00:30', '2030-01-01 10:00',
+              '2030-01-01T10:00:00', '2030-01-01T23:30:00-05:00', 'someday']
+    for due in stored:
+        db.execute("""
+            INSERT INTO follow_ups (lead_id, followup_type, followup_datetime, priority, status,
+                                    assigned_to, created_at, updated_at)
+            VALUES ('L-1', 'Call', ?, 'Low', 'Pending', 3, '2029-01-01T00:00', '2029-01-01T00:00')
+        """, (due,))
+    db.commit()
+    version = database.get_data_version()
+
+    assert database.normalize_stored_due_times(db.cursor()) == 3
+    db.commit()
+    rows = [row[0] for row in db.execute("SELECT followup_datetime FROM follow_ups ORDER BY id")]
+    assert rows == ['2030-01-01T10:00', '2030-01-01T10:00:30', '2030-01-01T10:00', '2030-01-01T10:00',
+                    models.normalize_followup_datetime('2030-01-01T23:30:00-05:00'), 'someday']
+    assert database.get_data_version() == version + 1
+    assert database.verify_counters(db.cursor()) == []
+    assert database.normalize_stored_due_times(db.cursor()) == 0
+
+
+def test_invalid_rows_are_reported_per_row(admin):
+    rows = [followup(), followup(followup_datetime='tomorrow'), followup(priority='Urgent')]
+    body = admin.post('/api/followups/bulk', json=rows).get_json()
+    assert body['created'] == 1
+    assert [error['index'] for error in body['errors']] == [1, 2]
+    assert admin.post('/api/followups/', json=followup(followup_datetime='tomorrow')).status_code == 400
+
+
+def test_body_that_is_not_an_array_is_rejected(admin):
+    assert admin.post('/api/followups/bulk', json={'lead_id': 'L-1'}).status_code == 400
+
+
+def test_stream_that_stops_decoding_reports_what_was_created(admin, db):
+    lines = ''.join(json.dumps(followup(lead_id=f'L-{i}')) + '\n' for i in range(models.BULK_CHUNK_SIZE * 3))
+    response = admin.post('/api/followups/bulk', data=lines.encode() + b'\xff\xfe\n',
+                          content_type='application/x-ndjson')
+    body = response.get_json()
+    assert response.status_code == 400
+    assert body['created'] > 0
+    assert body['created'] == len(body['ids']) == db.execute("SELECT COUNT(*) FROM follow_ups").fetchone()[0]
@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+
+import pytest
+
+from backend import database, models, routes
+
+from .conftest import create
+
+
+def _calendar(client, query):
+    response = client.get(f'/api/followups/calendar?{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _assert_complete(calendar):
+    assert not calendar['truncated']
+    for bucket in calendar['buckets']:
+        assert bucket['count'] == len(bucket['items']) == sum(bucket['by_status'].values())
+        assert bucket['count'] == sum(row['total'] for row in bucket['by_assignee'])
+
+
+def test_day_buckets(admin):
+    for due in ('2030-01-01T09:00', '2030-01-01T23:59', '2030-01-03T00:00', '2030-01-05T10:00'):
+        create(admin, followup_datetime=due)
+    admin.put('/api/followups/1/status', json={'status': 'Completed'})
+
+    calendar = _calendar(admin, 'from=2030-01-01&to=2030-01-03&rows=1')
+    _assert_complete(calendar)
+    assert [(b['start'], b['count']) for b in calendar['buckets']] == [('2030-01-01', 2), ('2030-01-03', 1)]
+    assert calendar['buckets'][0]['by_status'] == {'Completed': 1, 'Pending': 1}
+    assert [row['id'] for row in calendar['buckets'][0]['items']] == [1, 2]
+
+
+def test_hour_buckets(admin):
+    for due in ('2030-01-01T09:00', '2030-01-01T09:59', '2030-01-01T10:00'):
+        create(admin, followup_datetime=due)
+    calendar = _calendar(admin, 'from=2030-01-01&to=2030-01-01&bucket=hour&rows=1')
+    _assert_complete(calendar)
+    assert [(b['start'], b['count']) for b in calendar['buckets']] == [('2030-01-01T09:00', 2),
+                                                                      ('2030-01-01T10:00', 1)]
+
+
+def test_rows_either_side_of_midnight_land_in_their_counted_bucket(admin):
+    for due in ('2030-01-01T23:59:59', '2030-01-02T00:00'):
+        create(admin, followup_datetime=due)
+
+    for bucket in ('day', 'hour'):
+        calendar = _calendar(admin, f'from=2030-01-01&to=2030-01-02&bucket={bucket}&rows=1')
+        _assert_complete(calendar)
+        assert sum(b['count'] for b in calendar['buckets']) == 2
+    days = _calendar(admin, 'from=2030-01-01&to=2030-01-02&rows=1')['buckets']
+    assert [(b['start'], b['count']) for b in days] == [('2030-01-01', 1), ('2030-01-02', 1)]
+    first_day = _calendar(admin, 'from=2030-01-01&to=2030-01-01&rows=1')
+    _assert_complete(first_day)
+    assert first_day['buckets'][0]['count'] == 1
+
+
+def test_default_range_moves_with_the_day(admin, monkeypatch):
+    etag = admin.get('/api/followups/calendar').headers['ETag']
+    assert admin.get('/api/followups/calendar', headers={'If-None-Match': etag}).status_code == 304
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(routes, 'date', Tomorrow)
+    response = admin.get('/api/followups/calendar', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['from'] == Tomorrow.today().isoformat()
+
+
+def test_rows_are_capped_and_marked_truncated(admin, monkeypatch):
+    monkeypatch.setattr(models, 'CALENDAR_MAX_ROWS', 2)
+    for _ in range(3):
+        create(admin)
+    calendar = _calendar(admin, 'from=2030-01-01&to=2030-01-01&rows=1')
+    assert calendar['truncated']
+    assert calendar['buckets'][0]['count'] == 3 and len(calendar['buckets'][0]['items']) == 2
+
+
+def test_executives_only_see_their_own_calendar(admin, executive):
+    create(admin)
+    create(admin, assigned_to=1)
+    calendar = _calendar(executive, 'from=2030-01-01&to=2030-01-01&rows=1')
+    _assert_complete(calendar)
+    assert calendar['buckets'][0]['count'] == 1
+    assert executive.get('/api/followups/calendar?from=2030-01-01&assignee=1').status_code == 403
+
+
+@pytest.mark.parametrize('query', ['bucket=week', 'from=2030-02-01&to=2030-01-01', 'from=soon',
+                                   'from=2030-01-01&to=2030-03-01&bucket=hour', 'status=Lost'])
+def test_bad_ranges_are_rejected(admin, query):
+    assert admin.get(f'/api/followups/calendar?{query}').status_code == 400
+
+
+def test_conflicts_are_reported_but_do_not_block(admin):
+    first = create(admin, followup_datetime='2030-01-01T10:00')
+    create(admin, followup_datetime='2030-01-01T10:40')
+    create(admin, followup_datetime='2030-01-01T10:10', assigned_to=1)
+
+    response = admin.post('/api/followups/', json={
+        'lead_id': 'L-2', 'followup_type': 'Call', 'followup_datetime': '2030-01-01T10:20',
+        'priority': 'Low', 'assigned_to': 3})
+    assert response.status_code == 201
+    assert [row['id'] for row in response.get_json()['conflicts']] == [first, 2]
+
+    admin.put(f'/api/followups/{first}/status', json={'status': 'Completed'})
+    _, conflicts = models.add_followup('L-3', None, 'Call', '2030-01-01T09:45', 'Low', 3, None, 1)
+    assert conflicts == []
+    assert database.verify_counters(database.get_db_connection().cursor()) == []
@@ -0,0 +1,30 @@
+import os
+import stat
+import time
+
+from backend import coordination
+from backend.coordination import Lease
+
+
+def test_lease_is_exclusive_until_it_expires_or_is_released(app):
+    first, second = Lease('test', ttl=0.2), Lease('test', ttl=0.2)
+    assert first.acquire()
+    assert not second.acquire()
+    assert first.acquire()  # renewal
+
+    time.sleep(0.3)
+    assert second.acquire()
+    assert not first.acquire()
+    second.release()
+    assert first.acquire()
+
+
+def test_secret_key_is_generated_once_and_kept_private(tmp_path, monkeypatch):
+    monkeypatch.delenv('CRM_SECRET_KEY', raising=False)
+    monkeypatch.setenv('CRM_SECRET_KEY_FILE', str(tmp_path / 'secret'))
+    key = coordination.secret_key()
+    assert len(key) == 64 and coordination.secret_key() == key
+    assert stat.S_IMODE(os.stat(tmp_path / 'secret').st_mode) == 0o600
+
+    monkeypatch.setenv('CRM_SECRET_KEY', 'configured')
+    assert coordination.secret_key() == 'configured'
@@ -0,0 +1,36 @@
+from backend import database, models
+
+from .conftest import create, followup
+
+
+def test_counters_match_follow_ups_after_every_write_path(admin, db):
+    ids = [create(admin, followup_datetime=f'2030-01-0{i % 3 + 1}T10:00', priority=models.PRIORITIES[i % 3])
+           for i in range(6)]
+    assert admin.put(f'/api/followups/{ids[0]}',
+                     json=followup(followup_datetime='2030-02-01T09:00', priority='High')).status_code == 200
+    assert admin.put(f'/api/followups/{ids[1]}/status', json={'status': 'Completed'}).status_code == 200
+    assert admin.put('/api/followups/bulk/status', json={'ids': ids[2:4], 'status': 'Rescheduled'}).status_code == 200
+    assert admin.post('/api/followups/bulk', json=[followup(lead_id=f'B-{i}') for i in range(3)]).status_code == 201
+    assert models.mark_missed_followups(100, now='2030-01-02T00:00')[0] == 3
+
+    assert database.verify_counters(db.cursor()) == []
+
+
+def test_status_counts_come_from_the_counters(admin, db):
+    for i in range(4):
+        create(admin, followup_datetime=f'2030-03-0{i + 1}T10:00')
+    admin.put('/api/followups/1/status', json={'status': 'Completed'})
+
+    counts = {row['status']: row['total'] for row in models.get_status_counts()}
+    assert counts == {'Pending': 3, 'Completed': 1}
+    in_range = {row['status']: row['total'] for row in models.get_status_counts('2030-03-02', '2030-03-03')}
+    assert in_range == {'Pending': 2}
+
+
+def test_rebuild_restores_counters(admin, db):
+    create(admin)
+    db.execute("UPDATE followup_counters SET total = total + 5")
+    assert database.verify_counters(db.cursor())
+    database.rebuild_counters(db.cursor())
+    db.commit()
+    assert database.verify_counters(db.cursor()) == []
@@ -0,0 +1,35 @@
+from backend import database, models
+
+from .conftest import create
+
+
+def _dashboard(client):
+    response = client.get('/api/dashboard/')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_counts_and_lists(admin, executive):
+    create(admin, followup_datetime='2001-01-01T10:00')
+    create(admin, assigned_to=1)
+    models.mark_missed_followups(100)
+
+    mine = _dashboard(executive)
+    assert mine['missed_count'] == 1 and mine['pending_count'] == 0
+    assert [row['assigned_username'] for row in mine['missed']] == ['executive1']
+    assert _dashboard(admin)['status_counts'] == {'Missed': 1, 'Pending': 1}
+
+
+def test_a_write_from_another_process_is_seen_at_once(admin, db):
+    followup_id = create(admin)
+    assert models.get_dashboard_data(1, 'Admin')['pending_count'] == 1
+
+    # As another worker would: its own connection, no in-process invalidation
+    conn = database.open_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE follow_ups SET status = 'Completed' WHERE id = ?", (followup_id,))
+    database.bump_data_version(cursor)
+    conn.commit()
+    conn.dispose()
+
+    assert models.get_dashboard_data(1, 'Admin')['pending_count'] == 0
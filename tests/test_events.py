@@ -0,0 +1,62 @@
+import json
+
+from backend import events
+from backend.events import EventBus, event_bus
+
+from .conftest import EXECUTIVE_ID, create
+
+
+def _drain(subscription):
+    seen = []
+    while (event := subscription.get(timeout=0)) is not None:
+        seen.append(event)
+    return seen
+
+
+def test_writes_reach_only_the_users_who_can_see_them(admin):
+    subscriptions = {role: event_bus.subscribe(user_id, role)
+                     for user_id, role in ((1, 'Admin'), (2, 'Sales Manager'), (EXECUTIVE_ID, 'Sales Executive'))}
+    try:
+        followup_id = create(admin)
+        admin.put(f'/api/followups/{followup_id}/status', json={'status': 'Completed'})
+        seen = {role: [(e['type'], e['ids']) for e in _drain(s)] for role, s in subscriptions.items()}
+    finally:
+        for subscription in subscriptions.values():
+            event_bus.unsubscribe(subscription)
+
+    expected = [('followup.created', [followup_id]), ('followup.status', [followup_id])]
+    assert seen == {'Admin': expected, 'Sales Manager': [], 'Sales Executive': expected}
+
+
+def test_a_client_that_falls_behind_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(events, 'SUBSCRIBER_QUEUE_SIZE', 3)
+    bus = EventBus('memory')
+    subscription = bus.subscribe(1, 'Admin')
+    for i in range(5):
+        bus.publish({'type': 'followup.updated', 'ids': [i], 'assignees': [1]})
+    # The fourth event overflows the queue; the fifth follows the resync
+    assert [event['type'] for event in _drain(subscription)] == ['resync', 'followup.updated']
+
+
+def test_file_backend_delivers_events_from_other_processes(app):
+    # Two buses on one file stand in for two workers, reading it the way the tailer does
+    listener, writer = EventBus('memory'), EventBus('file')
+    subscription = listener.subscribe(EXECUTIVE_ID, 'Sales Executive')
+    open(writer._path(), 'a').close()
+    with open(writer._path()) as handle:
+        writer.publish({'type': 'followup.created', 'ids': [7], 'assignees': [EXECUTIVE_ID]})
+        writer.publish({'type': 'followup.created', 'ids': [8], 'assignees': [1]})
+        listener._read_lines(handle)
+    assert [event['ids'] for event in _drain(subscription)] == [[7]]
+
+
+def test_stream_sends_events_as_sse(admin, executive):
+    response = executive.get('/api/events/stream', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b'retry: 5000\n\n'
+    followup_id = create(admin)
+    event, data = next(chunks).decode().splitlines()[:2]
+    assert event == 'event: followup.created'
+    assert json.loads(data[len('data: '):])['ids'] == [followup_id]
+    response.close()
@@ -0,0 +1,25 @@
+import csv
+import io
+import json
+
+from .conftest import create
+
+
+def test_csv_export_streams_every_visible_row(admin, executive):
+    create(admin)
+    create(admin, assigned_to=1)
+    rows = list(csv.DictReader(io.StringIO(executive.get('/api/followups/export?format=csv').get_data(as_text=True))))
+    assert [row['assigned_username'] for row in rows] == ['executive1']
+
+    history = admin.get('/api/followups/history_by_entity/export?lead_id=L-1&format=ndjson')
+    assert len(history.get_data(as_text=True).splitlines()) == 2
+
+
+def test_ndjson_export_is_one_object_per_line_in_due_order(admin):
+    for due in ('2030-01-03T10:00', '2030-01-01T10:00', '2030-01-02T10:00'):
+        create(admin, followup_datetime=due)
+    response = admin.get('/api/followups/export?format=ndjson')
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['followup_datetime'][:10] for row in rows] == ['2030-01-01', '2030-01-02', '2030-01-03']
+    assert admin.get('/api/followups/export?format=xml').status_code == 400
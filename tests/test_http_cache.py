@@ -0,0 +1,42 @@
+from backend import http_cache, routes
+
+from .conftest import create
+
+
+def test_unchanged_data_is_answered_with_304(admin):
+    create(admin)
+    first = admin.get('/api/followups/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+
+    again = admin.get('/api/followups/', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_a_write_changes_the_tag(admin):
+    etag = admin.get('/api/followups/').headers['ETag']
+    create(admin)
+    response = admin.get('/api/followups/', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and len(response.get_json()['items']) == 1
+    assert response.headers['ETag'] != etag
+
+
+def test_tags_differ_per_user_and_query(admin, executive):
+    mine = executive.get('/api/followups/').headers['ETag']
+    assert admin.get('/api/followups/').headers['ETag'] != mine
+    assert executive.get('/api/followups/?limit=5').headers['ETag'] != mine
+    assert admin.get('/api/followups/', headers={'If-None-Match': mine}).status_code == 200
+
+
+def test_repeat_reads_are_served_from_the_response_cache(admin, monkeypatch):
+    create(admin)
+    first = admin.get('/api/followups/')
+
+    def not_called(*args, **kwargs):
+        raise AssertionError('the view ran')
+
+    monkeypatch.setattr(routes, 'get_followups_page', not_called)
+    assert admin.get('/api/followups/').data == first.data
+    monkeypatch.setattr(http_cache, 'RESPONSE_CACHE_ENABLED', False)
+    assert admin.get('/api/followups/').status_code == 500
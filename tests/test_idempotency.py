@@ -0,0 +1,41 @@
+from .conftest import followup
+
+
+def _post(client, key, **fields):
+    return client.post('/api/followups/', json=followup(**fields), headers={'Idempotency-Key': key})
+
+
+def test_replay_returns_the_stored_response_without_writing_again(admin, db):
+    first = _post(admin, 'k-1')
+    replay = _post(admin, 'k-1')
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json()['id'] == first.get_json()['id']
+    assert db.execute("SELECT COUNT(*) FROM follow_ups").fetchone()[0] == 1
+
+
+def test_key_reused_for_a_different_body_is_rejected(admin, db):
+    _post(admin, 'k-1')
+    assert _post(admin, 'k-1', lead_id='L-2').status_code == 422
+    assert db.execute("SELECT COUNT(*) FROM follow_ups").fetchone()[0] == 1
+
+
+def test_keys_are_per_user(admin, executive, db):
+    _post(admin, 'shared')
+    response = _post(executive, 'shared')
+    assert response.status_code == 201 and 'Idempotent-Replayed' not in response.headers
+    assert db.execute("SELECT COUNT(*) FROM follow_ups").fetchone()[0] == 2
+
+
+def test_requests_without_a_key_are_not_deduplicated(admin, db):
+    admin.post('/api/followups/', json=followup())
+    admin.post('/api/followups/', json=followup())
+    assert db.execute("SELECT COUNT(*) FROM follow_ups").fetchone()[0] == 2
+
+
+def test_service_worker_is_served_from_the_root_and_always_revalidated(app):
+    response = app.test_client().get('/service-worker.js')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/javascript'
+    assert response.headers['Cache-Control'] == 'no-cache'
@@ -0,0 +1,24 @@
+from backend import instrumentation
+
+
+def test_metrics_need_an_admin_session_without_a_token(app, admin, executive):
+    assert app.test_client().get('/metrics').status_code == 403
+    assert executive.get('/metrics').status_code == 403
+    response = admin.get('/metrics')
+    assert response.status_code == 200
+    assert 'crm_writer_jobs_total' in response.get_data(as_text=True)
+
+
+def test_metrics_need_the_token_when_one_is_set(app, admin, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'METRICS_TOKEN', 'scrape-me')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert admin.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'}).status_code == 200
+
+
+def test_requests_are_timed(admin):
+    response = admin.get('/api/followups/')
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    text = admin.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="followups.get_followups"' in text
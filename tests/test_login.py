@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from backend import auth, passwords
+from backend.passwords import PasswordPool, PasswordPoolBusy
+from benchmarks.common import login
+
+
+def test_pool_rejects_work_beyond_its_queue_at_once():
+    pool = PasswordPool(workers=1, queue_limit=1, timeout=5)
+    release = threading.Event()
+    running = threading.Thread(target=pool._run, args=(release.wait,))
+    running.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with pytest.raises(PasswordPoolBusy):
+        pool._run(release.wait)
+    assert time.monotonic() - started < 0.5
+    release.set()
+    running.join()
+    assert pool._run(lambda: 'free again') == 'free again'
+
+
+def test_a_saturated_pool_answers_503_with_retry_after(app, monkeypatch):
+    def busy(*args):
+        raise PasswordPoolBusy()
+
+    monkeypatch.setattr(auth.password_pool, 'check', busy)
+    response = app.test_client().post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_requests_are_served_while_logins_hash(app):
+    client = login(app)
+    started = time.perf_counter()
+    passwords._check(passwords.dummy_hash(), 'wrong', passwords.PASSWORD_HASH_METHOD,
+                     passwords.configured_prefix())
+    one_check = time.perf_counter() - started
+
+    logins = [threading.Thread(target=login, args=(app,)) for _ in range(4)]
+    for thread in logins:
+        thread.start()
+    latencies = []
+    while any(thread.is_alive() for thread in logins):
+        started = time.perf_counter()
+        assert client.get('/api/followups/').status_code == 200
+        latencies.append(time.perf_counter() - started)
+    for thread in logins:
+        thread.join()
+
+    # scrypt runs without the GIL, so reads keep going rather than queueing behind each hash
+    assert len(latencies) > 4
+    assert sorted(latencies)[len(latencies) // 2] < one_check / 2
@@ -0,0 +1,42 @@
+from backend import models
+
+from .conftest import create, walk
+
+
+def test_keyset_pages_cover_every_row_once_in_order(admin):
+    # Several rows share a due time, so the id tie-break matters
+    for i in range(11):
+        create(admin, followup_datetime=f'2030-01-0{i % 4 + 1}T10:00')
+    expected = [row['id'] for row in sorted(models.get_all_followups(1, 'Admin'),
+                                            key=lambda r: (r['followup_datetime'], r['id']))]
+
+    for sort, ordered in (('followup_datetime', expected), ('-followup_datetime', expected[::-1])):
+        assert walk(lambda cursor: models.get_followups_page(1, 'Admin', sort=sort, limit=3,
+                                                              cursor=cursor)) == ordered
+
+
+def test_keyset_cursor_over_http(admin):
+    for i in range(5):
+        create(admin, followup_datetime=f'2030-01-0{i + 1}T10:00')
+    first = admin.get('/api/followups/?limit=2').get_json()
+    second = admin.get(f"/api/followups/?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [row['id'] for row in first['items'] + second['items']] == [1, 2, 3, 4]
+    assert admin.get('/api/followups/?cursor=not-a-cursor').status_code == 400
+
+
+def test_executives_only_page_through_their_own(admin, executive):
+    create(admin)
+    create(admin, assigned_to=1)
+    rows, _ = models.get_followups_page(3, 'Sales Executive')
+    assert [row['assigned_to'] for row in rows] == [3]
+
+
+def test_filters_and_limits_apply_before_paging(admin):
+    for priority in ('Low', 'High', 'High', 'High'):
+        create(admin, priority=priority)
+    first = admin.get('/api/followups/?priority=High&limit=2').get_json()
+    rest = admin.get(f"/api/followups/?priority=High&limit=2&cursor={first['next_cursor']}").get_json()
+    assert [row['priority'] for row in first['items'] + rest['items']] == ['High'] * 3
+    assert rest['next_cursor'] is None
+    assert admin.get('/api/followups/?sort=notes').status_code == 400
+    assert len(admin.get(f'/api/followups/?limit={models.MAX_PAGE_SIZE + 1}').get_json()['items']) == 4
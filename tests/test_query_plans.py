@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks import check_query_plans
+
+
+@pytest.fixture(scope='module')
+def plans():
+    return check_query_plans.collect_plans()
+
+
+def test_every_hot_call_has_an_expected_index(plans):
+    assert sorted(plans) == sorted(check_query_plans.EXPECTED_INDEXES)
+
+
+@pytest.mark.parametrize('name', sorted(check_query_plans.EXPECTED_INDEXES))
+def test_hot_query_uses_its_index(plans, name):
+    assert plans[name], f'{name} issued no SELECT'
+    for sql, plan in plans[name]:
+        assert check_query_plans.full_scans(plan) == [], ' '.join(sql.split())
+    assert check_query_plans.uses_expected_index(name, plans[name]), plans[name]
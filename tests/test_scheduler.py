@@ -0,0 +1,70 @@
+import threading
+import time
+from datetime import datetime
+
+from backend import database
+from backend.scheduler import MissedFollowupScheduler, _local_time
+
+
+def _insert_pending(db, due):
+    db.execute("""
+        INSERT INTO follow_ups (lead_id, followup_type, followup_datetime, priority, status,
+                                assigned_to, created_at, updated_at)
+        VALUES ('L-1', 'Call', ?, 'Low', 'Pending', 3, '2000-01-01T00:00', '2000-01-01T00:00')
+    """, (due,))
+    db.commit()
+
+
+def test_scheduler_marks_overdue_rows_in_batches(app, db):
+    for day in range(1, 6):
+        _insert_pending(db, f'2001-01-0{day}T10:00')
+    scheduler = MissedFollowupScheduler(batch_size=2)
+    scheduler.run_once()
+    metrics = scheduler.metrics()
+    assert metrics['marked_total'] == 5 and metrics['batches'] == 3
+    assert db.execute("SELECT COUNT(*) FROM follow_ups WHERE status = 'Missed'").fetchone()[0] == 5
+    assert database.verify_counters(db.cursor()) == []
+
+
+def test_scheduler_sleeps_until_the_next_deadline(app, db):
+    scheduler = MissedFollowupScheduler(max_sleep=60)
+    assert scheduler._seconds_until_next_due() == 60
+    _insert_pending(db, f'{datetime.now().year + 1}-01-01T10:00')
+    assert scheduler._seconds_until_next_due() == 60
+    _insert_pending(db, datetime.now().isoformat(timespec='seconds'))
+    assert scheduler._seconds_until_next_due() < 1
+
+
+def test_due_times_with_an_offset_compare_with_local_time():
+    assert _local_time('2001-01-01T23:30:00-05:00').tzinfo is None
+    assert _local_time('someday') is None
+
+
+def test_a_write_by_another_process_ends_the_sleep(app):
+    scheduler = MissedFollowupScheduler(poll_interval=0.05)
+    version = database.get_data_version()
+
+    def write_elsewhere():
+        # Its own connection and no notify(), as another worker would
+        conn = database.open_db_connection()
+        database.bump_data_version(conn.cursor())
+        conn.commit()
+        conn.dispose()
+
+    threading.Timer(0.2, write_elsewhere).start()
+    started = time.monotonic()
+    scheduler._wait(30, version)
+    assert time.monotonic() - started < 5
+
+
+def test_notify_ends_the_sleep_and_a_quiet_sleep_runs_to_its_timeout(app):
+    scheduler = MissedFollowupScheduler(poll_interval=0.05)
+    version = database.get_data_version()
+    started = time.monotonic()
+    scheduler._wait(0.3, version)
+    assert time.monotonic() - started >= 0.3
+
+    threading.Timer(0.1, scheduler.notify).start()
+    started = time.monotonic()
+    scheduler._wait(30, version)
+    assert time.monotonic() - started < 5
@@ -0,0 +1,36 @@
+import pytest
+
+from backend import models
+
+from .conftest import create, followup, walk
+
+
+def test_search_cursor_pages_by_relevance(admin):
+    for i in range(7):
+        create(admin, lead_id=f'L-{i}', notes='pricing ' * (i + 1) + 'call back')
+    create(admin, lead_id='L-other', notes='unrelated')
+
+    everything, cursor = models.search_followups(1, 'Admin', 'pricing', limit=100)
+    assert cursor is None and len(everything) == 7
+    paged = walk(lambda cursor: models.search_followups(1, 'Admin', 'pricing', limit=2, cursor=cursor))
+    assert paged == [row['id'] for row in everything]
+
+
+@pytest.mark.parametrize('text', ['', '   '])
+def test_empty_search_returns_nothing(admin, text):
+    create(admin)
+    assert models.search_followups(1, 'Admin', text) == ([], None)
+
+
+def test_search_matches_ids_and_edited_notes_within_scope(admin, executive):
+    mine = create(admin, lead_id='L-1042', notes='send the quote')
+    create(admin, lead_id='L-1043', notes='send the quote', assigned_to=1)
+
+    found = executive.get('/api/followups/search?q=quote').get_json()['items']
+    assert [row['id'] for row in found] == [mine]
+    assert [row['id'] for row in admin.get('/api/followups/search?q=L-1042').get_json()['items']] == [mine]
+
+    admin.put(f'/api/followups/{mine}', json=followup(lead_id='L-1042', notes='renewal call'))
+    assert admin.get('/api/followups/search?q=quote').get_json()['items'][0]['id'] != mine
+    assert admin.get('/api/followups/search?q=renewal').get_json()['items'][0]['id'] == mine
+    assert admin.get('/api/followups/search').status_code == 400
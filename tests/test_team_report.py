@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from backend import cli, models, routes
+from backend.scheduler import MissedFollowupScheduler
+from backend.writer import write_coordinator
+
+from .conftest import create
+
+
+def _days_ago(n):
+    return (date.today() - timedelta(days=n)).isoformat()
+
+
+def _act(db, followup_id, action, day):
+    db.execute("""
+        INSERT INTO followup_history (followup_id, action, remarks, action_date, acted_by)
+        VALUES (?, ?, '', ?, 1)
+    """, (followup_id, action, f'{day}T12:00'))
+    db.commit()
+
+
+def _rolled_up_days(db):
+    return db.execute("SELECT COUNT(*) FROM team_rollup_days").fetchone()[0]
+
+
+def test_report_only_reads_and_matches_after_roll_up(admin, db):
+    ids = [create(admin) for _ in range(3)]
+    _act(db, ids[0], 'Completed', _days_ago(1))
+    _act(db, ids[1], 'Missed', _days_ago(2))
+    _act(db, ids[2], 'Rescheduled', _days_ago(5))
+    _act(db, ids[2], 'Completed', date.today().isoformat())
+
+    jobs = write_coordinator.metrics()['jobs']
+    before = models.get_team_report(_days_ago(10), date.today().isoformat())
+    assert write_coordinator.metrics()['jobs'] == jobs
+    assert _rolled_up_days(db) == 0
+    assert [(r['username'], r['completed'], r['missed'], r['rescheduled']) for r in before] == \
+        [('executive1', 2, 1, 1)]
+
+    models.roll_up_closed_days(10)
+    assert _rolled_up_days(db) == 10
+    assert models.get_team_report(_days_ago(10), date.today().isoformat()) == before
+
+
+def test_scheduler_leader_rolls_up_once_a_day(app, db):
+    scheduler = MissedFollowupScheduler()
+    scheduler._roll_up_team_days()
+    assert _rolled_up_days(db) == models.TEAM_ROLLUP_LOOKBACK_DAYS
+    jobs = write_coordinator.metrics()['jobs']
+    scheduler._roll_up_team_days()
+    assert write_coordinator.metrics()['jobs'] == jobs
+
+
+def test_cli_rolls_up_closed_days(app, db):
+    assert cli.main(['team', 'roll-up', '--days', '3']) == 0
+    assert _rolled_up_days(db) == 3
+
+
+def test_default_range_moves_with_the_day(admin, monkeypatch):
+    first = admin.get('/api/reports/team')
+    etag = first.headers['ETag']
+    assert admin.get('/api/reports/team', headers={'If-None-Match': etag}).status_code == 304
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    # No write happens overnight, so only the date can change the tag
+    monkeypatch.setattr(routes, 'date', Tomorrow)
+    response = admin.get('/api/reports/team', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['to'] == Tomorrow.today().isoformat()
+
+
+def test_range_is_validated(admin, executive):
+    assert admin.get('/api/reports/team?from=2030-02-01&to=2030-01-01').status_code == 400
+    assert admin.get('/api/reports/team?from=2000-01-01&to=2030-01-01').status_code == 400
+    assert executive.get('/api/reports/team').status_code == 403
@@ -0,0 +1,58 @@
+from backend import database, users
+from backend.users import UserDirectory, user_directory
+
+from .conftest import create
+
+
+def _insert_user(db, username):
+    # As another worker would: straight into the table, nothing invalidated here
+    cursor = db.execute("INSERT INTO users (username, password_hash, role) VALUES (?, 'x', 'Sales Executive')",
+                        (username,))
+    db.commit()
+    return cursor.lastrowid
+
+
+def _user_loads(monkeypatch):
+    loads = []
+    monkeypatch.setattr(database, 'query_observers', database.query_observers + [
+        lambda sql, seconds, rows: 'FROM users' in sql and loads.append(sql)])
+    return loads
+
+
+def test_registered_users_are_listed_at_once(app, admin):
+    assert [user['username'] for user in admin.get('/api/auth/users').get_json()] == \
+        ['admin', 'manager', 'executive1']
+    assert app.test_client().post('/api/auth/register', json={
+        'username': 'executive2', 'password': 'exec456'}).status_code == 201
+    assert admin.get('/api/auth/users').get_json()[-1]['username'] == 'executive2'
+
+
+def test_lists_take_usernames_from_the_directory(admin, monkeypatch):
+    create(admin)
+    user_directory.all()
+    loads = _user_loads(monkeypatch)
+    rows = admin.get('/api/followups/').get_json()['items']
+    assert [row['assigned_username'] for row in rows] == ['executive1']
+    assert loads == []
+
+
+def test_a_user_added_by_another_worker_resolves(app, db, monkeypatch):
+    monkeypatch.setattr(users, 'USER_DIRECTORY_MISS_RELOAD', 0)
+    directory = UserDirectory()
+    directory.all()
+    new_id = _insert_user(db, 'elsewhere')
+    assert directory.username(new_id) == 'elsewhere'
+    assert directory.annotate([{'assigned_to': new_id}], 'assigned_to', 'name') == \
+        [{'assigned_to': new_id, 'name': 'elsewhere'}]
+
+
+def test_unknown_ids_reload_at_most_once_a_second(app, monkeypatch):
+    directory = UserDirectory()
+    directory.all()
+    loads = _user_loads(monkeypatch)
+    for _ in range(10):
+        assert directory.get(999) is None
+    assert loads == []
+    monkeypatch.setattr(users, 'USER_DIRECTORY_MISS_RELOAD', 0)
+    directory.get(999)
+    assert len(loads) == 1
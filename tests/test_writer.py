@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from backend.writer import WriteCoordinator, write_coordinator
+
+from .conftest import create
+
+
+def _insert(cursor, key, fail=False):
+    cursor.execute("INSERT INTO app_meta (key, value) VALUES (?, 0)", (key,))
+    if fail:
+        raise RuntimeError(key)
+    return key
+
+
+def _keys(db):
+    return {row[0] for row in db.execute("SELECT key FROM app_meta WHERE key LIKE 'w-%'")}
+
+
+def test_failing_mutation_is_rolled_back_alone(app, db):
+    # A long window so the three jobs are committed as one group
+    writer = WriteCoordinator(window=0.2)
+    futures = [writer.submit(_insert, 'w-1'), writer.submit(_insert, 'w-2', fail=True),
+               writer.submit(_insert, 'w-3')]
+
+    assert futures[0].result() == 'w-1' and futures[2].result() == 'w-3'
+    with pytest.raises(RuntimeError):
+        futures[1].result()
+    assert _keys(db) == {'w-1', 'w-3'}
+    assert writer.metrics()['failed_jobs'] == 1
+
+
+def test_concurrent_writers_are_grouped(app, db):
+    writer = WriteCoordinator(window=0.05)
+    barrier = threading.Barrier(8)
+
+    def write(i):
+        barrier.wait()
+        writer.run(_insert, f'w-{i}')
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _keys(db) == {f'w-{i}' for i in range(8)}
+    assert writer.metrics()['groups'] < 8
+
+
+def test_follow_up_writes_go_through_the_shared_writer(admin):
+    jobs = write_coordinator.metrics()['jobs']
+    followup_id = create(admin)
+    admin.put(f'/api/followups/{followup_id}/status', json={'status': 'Completed'})
+    assert write_coordinator.metrics()['jobs'] == jobs + 2